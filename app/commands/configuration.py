@@ -0,0 +1,84 @@
+import json
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from app.config import (
+    LEDGER_REBUILD_WORKERS,
+    LEDGER_REBUILD_CHUNK_SIZE,
+    RECURRING_PROCESSING_WORKERS,
+    RECURRING_PROCESSING_EXECUTOR,
+    RECURRING_PROCESSING_CHUNK_SIZE
+)
+from app.persistent.configuration import sa
+from app.persistent.storage import TRANSACTION_STORAGES, convert_storage
+from app.service.configuration import ledger_service, recurring_transaction_service
+
+ledger_cli = AppGroup('ledger', help='Maintain per-user and per-category ledger totals.')
+recurring_cli = AppGroup('recurring', help='Process recurring transactions.')
+
+
+@ledger_cli.command('rebuild')
+@click.option('--workers', default=LEDGER_REBUILD_WORKERS, show_default=True)
+@click.option('--chunk-size', default=LEDGER_REBUILD_CHUNK_SIZE, show_default=True)
+def rebuild_ledger(workers: int, chunk_size: int) -> None:
+    rebuilt = ledger_service.rebuild_totals(workers, chunk_size)
+    click.echo(f'Rebuilt {rebuilt} ledger totals')
+
+
+@ledger_cli.command('verify')
+@click.option('--workers', default=LEDGER_REBUILD_WORKERS, show_default=True)
+@click.option('--chunk-size', default=LEDGER_REBUILD_CHUNK_SIZE, show_default=True)
+def verify_ledger(workers: int, chunk_size: int) -> None:
+    diffs = ledger_service.verify_totals(workers, chunk_size)
+    for diff in diffs:
+        click.echo(json.dumps(diff))
+
+    if diffs:
+        raise click.ClickException(f'{len(diffs)} ledger totals differ from transactions')
+    click.echo('Ledger totals match transactions')
+
+
+@ledger_cli.command('convert-storage')
+@click.argument('storage', type=click.Choice(TRANSACTION_STORAGES))
+@click.option('--chunk-size', default=10000, show_default=True)
+def convert_transaction_storage(storage: str, chunk_size: int) -> None:
+    """Converts the transactions tables to STORAGE, run it after flask db upgrade with the app stopped."""
+    try:
+        copied = convert_storage(sa.engine, storage, chunk_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Copied {copied} transactions, start the app with TRANSACTION_STORAGE={storage}')
+
+
+@recurring_cli.command('process')
+@click.option('--workers', default=RECURRING_PROCESSING_WORKERS, show_default=True)
+@click.option('--executor', type=click.Choice(['thread', 'process']), default=RECURRING_PROCESSING_EXECUTOR,
+              show_default=True)
+@click.option('--chunk-size', default=RECURRING_PROCESSING_CHUNK_SIZE, show_default=True)
+@click.option('--shard-count', type=int, help='Shards the schedules are split in, defaults to --workers.')
+@click.option('--shard', 'shards', type=int, multiple=True, help='Shard to process, all of them when not given.')
+def process_recurring(
+        workers: int,
+        executor: str,
+        chunk_size: int,
+        shard_count: int | None,
+        shards: tuple[int, ...]) -> None:
+    if shards and not shard_count:
+        raise click.UsageError('--shard requires --shard-count')
+    if any(not 0 <= shard < (shard_count or workers) for shard in shards):
+        raise click.UsageError('--shard must be below --shard-count')
+
+    counts = recurring_transaction_service.process_recurring_transactions(
+        chunk_size,
+        workers=workers,
+        executor=executor,
+        shard_count=shard_count,
+        shards=list(shards) or None
+    )
+    click.echo(f'Posted {counts["posted"]} and caught up {counts["caught_up"]} recurring transactions')
+
+
+def configure_commands(app: Flask) -> None:
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(recurring_cli)
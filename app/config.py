@@ -22,6 +22,84 @@ DB_TEST_PORT = getenv('DB_PORT', '3308')
 DB_NAME = getenv('DB_NAME', 'db_1')
 DB_HOST = getenv('DB_HOST', 'mysql')
 DB_URL = f'mysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+# Comma separated read replicas of DB_URL, plain SELECTs are spread over them round-robin
+DB_REPLICA_URLS = [url for url in getenv('DB_REPLICA_URLS', '').split(',') if url]
+DB_REPLICA_RETRY_SECONDS = int(getenv('DB_REPLICA_RETRY_SECONDS', '30'))
+# 'joined' keeps incomes and expenses in their own tables next to transactions, 'single' stores them
+# in transactions with an inline category_id. The migrations create the joined tables, switching an existing
+# database requires flask ledger convert-storage
+TRANSACTION_STORAGE = getenv('TRANSACTION_STORAGE', 'joined')
+
+# ------------------------------------------------------------
+# SLOW QUERY LOG CONFIGURATION
+# ------------------------------------------------------------
+# Statements slower than the threshold, and a sampled fraction of the rest, are logged as JSON lines
+SLOW_QUERY_THRESHOLD_MS = float(getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_SAMPLE_RATE = float(getenv('SLOW_QUERY_SAMPLE_RATE', '0'))
+SLOW_QUERY_EXPLAIN = getenv('SLOW_QUERY_EXPLAIN', '1') == '1'
+SLOW_QUERY_LOG_FILE = getenv('SLOW_QUERY_LOG_FILE')
+
+# ------------------------------------------------------------
+# LEDGER ROLLUP CONFIGURATION
+# ------------------------------------------------------------
+LEDGER_REBUILD_WORKERS = int(getenv('LEDGER_REBUILD_WORKERS', '4'))
+LEDGER_REBUILD_CHUNK_SIZE = int(getenv('LEDGER_REBUILD_CHUNK_SIZE', '1000'))
+
+# ------------------------------------------------------------
+# BULK WRITE CONFIGURATION
+# ------------------------------------------------------------
+# Rows written per statement batch and transaction by CrudRepositoryORM.bulk_insert / bulk_save_or_update
+BULK_WRITE_BATCH_SIZE = int(getenv('BULK_WRITE_BATCH_SIZE', '1000'))
+
+# Schedules processed and committed per transaction by the recurring transactions run
+RECURRING_PROCESSING_CHUNK_SIZE = int(getenv('RECURRING_PROCESSING_CHUNK_SIZE', '1000'))
+# With more than one worker the run is split in user_id shards processed on a 'thread' or 'process' pool
+RECURRING_PROCESSING_WORKERS = int(getenv('RECURRING_PROCESSING_WORKERS', '1'))
+RECURRING_PROCESSING_EXECUTOR = getenv('RECURRING_PROCESSING_EXECUTOR', 'thread')
+
+# ------------------------------------------------------------
+# RECURRING SCHEDULER CONFIGURATION
+# ------------------------------------------------------------
+# Jobs run in apps created with create_app(start_scheduler=True), the gunicorn workers, never in flask CLI commands.
+# Every worker with the scheduler enabled fires on the crontab, a lease in scheduler_leases lets one of them
+# run each tick. A lease outlives a worker that died while running for RECURRING_SCHEDULER_LEASE_SECONDS
+RECURRING_SCHEDULER_ENABLED = getenv('RECURRING_SCHEDULER_ENABLED', '0') == '1'
+RECURRING_SCHEDULER_CRON = getenv('RECURRING_SCHEDULER_CRON', '5 0 * * *')
+RECURRING_SCHEDULER_LEASE_SECONDS = int(getenv('RECURRING_SCHEDULER_LEASE_SECONDS', '3600'))
+
+# Every worker with the due index enabled keeps the due dates of all schedules in memory and books the due ones
+# each RECURRING_DUE_INDEX_TICK_SECONDS. Reloaded from the database every RECURRING_DUE_INDEX_RESYNC_SECONDS
+RECURRING_DUE_INDEX_ENABLED = getenv('RECURRING_DUE_INDEX_ENABLED', '0') == '1'
+RECURRING_DUE_INDEX_TICK_SECONDS = int(getenv('RECURRING_DUE_INDEX_TICK_SECONDS', '60'))
+RECURRING_DUE_INDEX_RESYNC_SECONDS = int(getenv('RECURRING_DUE_INDEX_RESYNC_SECONDS', '3600'))
+
+# ------------------------------------------------------------
+# PAGINATION CONFIGURATION
+# ------------------------------------------------------------
+PAGE_SIZE_DEFAULT = int(getenv('PAGE_SIZE_DEFAULT', '100'))
+PAGE_SIZE_MAX = int(getenv('PAGE_SIZE_MAX', '1000'))
+ITER_ALL_BATCH_SIZE = int(getenv('ITER_ALL_BATCH_SIZE', '1000'))
+
+# ------------------------------------------------------------
+# BUDGET REPORT CONFIGURATION
+# ------------------------------------------------------------
+BUDGET_REPORT_BATCH_SIZE = int(getenv('BUDGET_REPORT_BATCH_SIZE', '500'))
+# With more than one worker the all-users report is computed in user id shards on a 'thread' or 'process' pool
+BUDGET_REPORT_WORKERS = int(getenv('BUDGET_REPORT_WORKERS', '1'))
+BUDGET_REPORT_EXECUTOR = getenv('BUDGET_REPORT_EXECUTOR', 'thread')
+BUDGET_REPORT_SHARD_SIZE = int(getenv('BUDGET_REPORT_SHARD_SIZE', '2000'))
+BUDGET_ANALYTICS_BATCH_SIZE = int(getenv('BUDGET_ANALYTICS_BATCH_SIZE', '100000'))
+
+# Per-user budget summaries are cached per worker and invalidated by users.ledger_version
+BUDGET_CACHE_ENABLED = getenv('BUDGET_CACHE_ENABLED', '1') == '1'
+BUDGET_CACHE_MAX_SIZE = int(getenv('BUDGET_CACHE_MAX_SIZE', '10000'))
+BUDGET_CACHE_TTL_SECONDS = int(getenv('BUDGET_CACHE_TTL_SECONDS', '300'))
+
+# Percentages of the planned category amount whose crossing is recorded in budget_alerts
+BUDGET_ALERT_THRESHOLDS = [int(t) for t in getenv('BUDGET_ALERT_THRESHOLDS', '80,100').split(',')]
+
+# Months after the current one a cash flow forecast may reach, later ends are rejected
+FORECAST_MAX_MONTHS = int(getenv('FORECAST_MAX_MONTHS', '24'))
 
 # ------------------------------------------------------------
 # MAIL CONFIGURATION
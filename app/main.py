@@ -1,17 +1,23 @@
-from flask import Flask
+from flask import Flask, request
 from flask_restful import Api
 from flask_migrate import Migrate
 import logging
 
 from app.security.configuration import configure_security
+from app.commands.configuration import configure_commands
+from app.scheduler.configuration import configure_scheduler
 from app.mail.configuration import MailSender
-from app.config import MAIL_SETTINGS, DB_URL, SECURITY_SETTINGS
+from app.config import MAIL_SETTINGS, DB_URL, DB_REPLICA_URLS, SECURITY_SETTINGS, BUDGET_ALERT_THRESHOLDS
 from app.persistent.configuration import sa
+from app.persistent.routing import configure_replicas, pin_primary, PRIMARY_HEADER
+from app.persistent.query_log import configure_query_log_file
 from app.routes.resource import (
     RegisterUserResource,
     ActivationUserResource,
     UserIdResource,
     UserIdTotalIncomeResource,
+    UserIdForecastResource,
+    UserIdAlertsResource,
     CreateUserResource,
     CategoryIdResource,
     CategoryNameResource,
@@ -20,28 +26,44 @@ from app.routes.resource import (
     TransactionsFilterResource,
     BudgetSummaryResource,
     BudgetListSummaryResource,
+    BudgetSummaryCacheResource,
+    BudgetWhatIfResource,
     ProcessRecurringTransactionsResource,
     CreateRecurringTransactionResource,
     TransactionListByCategoryResource,
     ChangeExpenseCategoryPercentageResource,
-    RecurringTransactionIdResource
+    RecurringTransactionIdResource,
+    RecurringRunsResource,
+    RecurringDueIndexResource
 )
 
 logging.basicConfig(level=logging.INFO)
 
 
-def create_app() -> Flask:
+def create_app(start_scheduler: bool = False) -> Flask:
     app = Flask(__name__)
     with app.app_context():
         app.config['SQLALCHEMY_DATABASE_URI'] = DB_URL
-        app.config['SQLALCHEMY_ECHO'] = True
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
         app.config.update(MAIL_SETTINGS)
         app.config.update(SECURITY_SETTINGS)
+        app.config['BUDGET_ALERT_THRESHOLDS'] = BUDGET_ALERT_THRESHOLDS
 
         sa.init_app(app)
+        configure_replicas(app, DB_REPLICA_URLS)
+        configure_query_log_file()
+
+        @app.before_request
+        def _route_reads() -> None:
+            # Writing requests, and readers that need their own earlier writes, never read from a replica
+            if request.method != 'GET' or request.headers.get(PRIMARY_HEADER):
+                pin_primary(sa.session)
 
         configure_security(app)
+        configure_commands(app)
+        # Only the serving process starts the jobs, apps that flask CLI commands and tests create run none
+        if start_scheduler:
+            configure_scheduler(app)
         MailSender(app, 'ula.malin35@gmail.com')
         migrate = Migrate(app, sa)
         api = Api(app)
@@ -50,6 +72,8 @@ def create_app() -> Flask:
         api.add_resource(ActivationUserResource, '/users/activate')
         api.add_resource(UserIdResource, '/users/<int:user_id>')
         api.add_resource(UserIdTotalIncomeResource, '/users/<int:user_id>/total-income')
+        api.add_resource(UserIdForecastResource, '/users/<int:user_id>/forecast')
+        api.add_resource(UserIdAlertsResource, '/users/<int:user_id>/alerts')
         api.add_resource(CreateUserResource, '/users')
 
         api.add_resource(CategoryIdResource, '/categories/<int:category_id>')
@@ -64,9 +88,13 @@ def create_app() -> Flask:
         api.add_resource(CreateRecurringTransactionResource, '/recurring-transaction')
         api.add_resource(RecurringTransactionIdResource, '/recurring-transactions/<int:transaction_id>')
         api.add_resource(ProcessRecurringTransactionsResource, '/recurring-transactions')
+        api.add_resource(RecurringRunsResource, '/recurring-transactions/runs')
+        api.add_resource(RecurringDueIndexResource, '/recurring-transactions/due-index')
 
         api.add_resource(BudgetSummaryResource, '/users/budget-summary/<int:user_id>')
         api.add_resource(BudgetListSummaryResource, '/users/budget-summary/')
+        api.add_resource(BudgetSummaryCacheResource, '/users/budget-summary/cache')
+        api.add_resource(BudgetWhatIfResource, '/users/budget-summary/what-if')
 
     return app
 
@@ -97,15 +97,28 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Batch migrations rebuild SQLite tables, dropping the old table would cascade into the tables
+            # referencing it while foreign keys are enforced
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
+        # Backfills commit their chunks in autocommit blocks, which also commit the migrations run before
+        # them, so every migration gets a transaction of its own
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
+            transaction_per_migration=True,
             **conf_args
         )
 
         with context.begin_transaction():
             context.run_migrations()
 
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,41 @@
+"""transactions user fk set null
+
+Revision ID: 0c6d2a9e4f15
+Revises: e3f9a7b1c2d8
+Create Date: 2026-10-18 16:47:55.318262
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c6d2a9e4f15'
+down_revision = 'e3f9a7b1c2d8'
+branch_labels = None
+depends_on = None
+
+# SQLite reflects the foreign keys of d1ad4d5af38f without a name, batch mode names them by this convention
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _user_fk_name():
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys('transactions')
+    fk_name = next(fk['name'] for fk in foreign_keys if fk['referred_table'] == 'users')
+    return fk_name or 'fk_transactions_user_id_users'
+
+
+def upgrade():
+    fk_name = _user_fk_name()
+    with op.batch_alter_table('transactions', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(fk_name, type_='foreignkey')
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_foreign_key(fk_name, 'users', ['user_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade():
+    fk_name = _user_fk_name()
+    with op.batch_alter_table('transactions', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(fk_name, type_='foreignkey')
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key(fk_name, 'users', ['user_id'], ['id'])
@@ -0,0 +1,42 @@
+"""hot path indexes added
+
+Revision ID: 2e7c9a4f1b58
+Revises: 5f2b8d0c7e63
+Create Date: 2026-10-18 22:10:41.772903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e7c9a4f1b58'
+down_revision = '5f2b8d0c7e63'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns, unique) of every repository lookup that would otherwise scan its table
+INDEXES = [
+    ('uq_activation_tokens_token', 'activation_tokens', ['token'], True),
+    ('ix_activation_tokens_user_id', 'activation_tokens', ['user_id'], False),
+    ('uq_categories_name', 'categories', ['name'], True),
+    ('ix_transactions_type_amount', 'transactions', ['type_', 'amount'], False),
+    ('ix_ledger_totals_category_id', 'ledger_totals', ['category_id'], False),
+    ('ix_budget_alerts_category_id', 'budget_alerts', ['category_id'], False),
+    ('ix_recurring_transactions_user_id', 'recurring_transactions', ['user_id'], False),
+    ('ix_recurring_transactions_next_due_date', 'recurring_transactions', ['next_due_date'], False),
+    ('ix_income_recurring_transactions_category_id', 'income_recurring_transactions', ['category_id'], False),
+    ('ix_expense_recurring_transactions_category_id', 'expense_recurring_transactions', ['category_id'], False),
+    ('ix_incomes_category_id', 'incomes', ['category_id'], False),
+    ('ix_expenses_category_id', 'expenses', ['category_id'], False),
+]
+
+
+def upgrade():
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
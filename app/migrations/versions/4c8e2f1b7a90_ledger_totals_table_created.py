@@ -0,0 +1,45 @@
+"""ledger totals table created
+
+Revision ID: 4c8e2f1b7a90
+Revises: d1ad4d5af38f
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e2f1b7a90'
+down_revision = 'd1ad4d5af38f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ledger_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('type_', sa.String(length=50), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.Column('transactions_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'category_id', 'type_')
+    )
+
+    # Backfill rollups from the existing ledger
+    op.execute('''
+        INSERT INTO ledger_totals (user_id, category_id, type_, total, transactions_count)
+        SELECT t.user_id, i.category_id, t.type_, SUM(t.amount), COUNT(*)
+        FROM transactions t JOIN incomes i ON i.id = t.id
+        GROUP BY t.user_id, i.category_id, t.type_
+        UNION ALL
+        SELECT t.user_id, e.category_id, t.type_, SUM(t.amount), COUNT(*)
+        FROM transactions t JOIN expenses e ON e.id = t.id
+        GROUP BY t.user_id, e.category_id, t.type_
+    ''')
+
+
+def downgrade():
+    op.drop_table('ledger_totals')
@@ -0,0 +1,45 @@
+"""scheduler leases and recurring runs created
+
+Revision ID: 4d8a2f6c1e93
+Revises: 7c4e1b9d3a26
+Create Date: 2026-10-18 23:41:05.126884
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8a2f6c1e93'
+down_revision = '7c4e1b9d3a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduler_leases',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('holder', sa.String(length=255), nullable=False),
+        sa.Column('tick', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table(
+        'recurring_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('holder', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('posted', sa.Integer(), nullable=False),
+        sa.Column('caught_up', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(length=1000), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('recurring_runs')
+    op.drop_table('scheduler_leases')
@@ -0,0 +1,60 @@
+"""foreign keys on delete cascade
+
+Revision ID: 5f2b8d0c7e63
+Revises: 0c6d2a9e4f15
+Create Date: 2026-10-18 18:21:36.905147
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2b8d0c7e63'
+down_revision = '0c6d2a9e4f15'
+branch_labels = None
+depends_on = None
+
+# SQLite reflects the foreign keys of d1ad4d5af38f without a name, batch mode names them by this convention
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+# (table, column, referred table) of every foreign key that set-based deletes rely on to cascade,
+# transactions.user_id keeps ON DELETE SET NULL from 0c6d2a9e4f15
+CASCADING_FOREIGN_KEYS = [
+    ('activation_tokens', 'user_id', 'users'),
+    ('incomes', 'id', 'transactions'),
+    ('incomes', 'category_id', 'income_categories'),
+    ('expenses', 'id', 'transactions'),
+    ('expenses', 'category_id', 'expense_categories'),
+    ('income_categories', 'id', 'categories'),
+    ('expense_categories', 'id', 'categories'),
+    ('recurring_transactions', 'user_id', 'users'),
+    ('income_recurring_transactions', 'id', 'recurring_transactions'),
+    ('income_recurring_transactions', 'category_id', 'income_categories'),
+    ('expense_recurring_transactions', 'id', 'recurring_transactions'),
+    ('expense_recurring_transactions', 'category_id', 'expense_categories'),
+]
+
+
+def _fk_name(table, column, referred_table):
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys(table)
+    fk_name = next(fk['name'] for fk in foreign_keys if fk['constrained_columns'] == [column])
+    return fk_name or NAMING_CONVENTION['fk'] % {
+        'table_name': table, 'column_0_name': column, 'referred_table_name': referred_table
+    }
+
+
+def _recreate_foreign_keys(foreign_keys, ondelete):
+    for table, column, referred_table in foreign_keys:
+        fk_name = _fk_name(table, column, referred_table)
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(fk_name, type_='foreignkey')
+            batch_op.create_foreign_key(fk_name, referred_table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys(CASCADING_FOREIGN_KEYS, 'CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(CASCADING_FOREIGN_KEYS, None)
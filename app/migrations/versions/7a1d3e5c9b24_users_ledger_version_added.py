@@ -0,0 +1,26 @@
+"""users ledger version added
+
+Revision ID: 7a1d3e5c9b24
+Revises: 4c8e2f1b7a90
+Create Date: 2026-10-18 11:40:07.532911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1d3e5c9b24'
+down_revision = '4c8e2f1b7a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ledger_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('ledger_version')
@@ -0,0 +1,42 @@
+"""transactions recurring transaction id added
+
+Revision ID: 7c4e1b9d3a26
+Revises: 2e7c9a4f1b58
+Create Date: 2026-10-18 23:02:17.408311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1b9d3a26'
+down_revision = '2e7c9a4f1b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurring_transaction_id', sa.Integer(), nullable=True))
+        # Created before the foreign key, which MySQL then backs with it instead of an index of its own
+        batch_op.create_index(
+            'uq_transactions_recurring_transaction_id_booked_at',
+            ['recurring_transaction_id', 'booked_at'],
+            unique=True
+        )
+        batch_op.create_foreign_key(
+            'fk_transactions_recurring_transaction_id_recurring_transactions',
+            'recurring_transactions',
+            ['recurring_transaction_id'],
+            ['id'],
+            ondelete='SET NULL'
+        )
+
+
+def downgrade():
+    # MySQL backs the foreign key with the unique index, the constraint has to go first
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_transactions_recurring_transaction_id_recurring_transactions', type_='foreignkey')
+        batch_op.drop_index('uq_transactions_recurring_transaction_id_booked_at')
+        batch_op.drop_column('recurring_transaction_id')
@@ -0,0 +1,24 @@
+"""recurring transactions claimed by added
+
+Revision ID: 9a1d5e7b3c40
+Revises: 4d8a2f6c1e93
+Create Date: 2026-10-19 01:12:47.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a1d5e7b3c40'
+down_revision = '4d8a2f6c1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('recurring_transactions', sa.Column('claimed_by', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    op.drop_column('recurring_transactions', 'claimed_by')
@@ -0,0 +1,48 @@
+"""transactions booked at added
+
+Revision ID: b5e8c2d4f613
+Revises: 7a1d3e5c9b24
+Create Date: 2026-10-18 14:05:23.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8c2d4f613'
+down_revision = '7a1d3e5c9b24'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 10000
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('booked_at', sa.Date(), nullable=True))
+
+    # Existing rows have no booking date, backfill them in id chunks that commit one by one, so no transaction
+    # holds the locks of the whole table
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        first_id, last_id = connection.execute(sa.text('SELECT MIN(id), MAX(id) FROM transactions')).one()
+        if first_id is not None:
+            for chunk_start in range(first_id, last_id + 1, BACKFILL_CHUNK_SIZE):
+                connection.execute(
+                    sa.text(
+                        'UPDATE transactions SET booked_at = CURRENT_DATE '
+                        'WHERE id BETWEEN :first_id AND :last_id AND booked_at IS NULL'
+                    ),
+                    {'first_id': chunk_start, 'last_id': chunk_start + BACKFILL_CHUNK_SIZE - 1}
+                )
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.alter_column('booked_at', existing_type=sa.Date(), nullable=False)
+        batch_op.create_index('ix_transactions_user_id_booked_at', ['user_id', 'booked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_user_id_booked_at')
+        batch_op.drop_column('booked_at')
@@ -0,0 +1,40 @@
+"""budget alerts table created
+
+Revision ID: e3f9a7b1c2d8
+Revises: b5e8c2d4f613
+Create Date: 2026-10-18 15:32:10.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f9a7b1c2d8'
+down_revision = 'b5e8c2d4f613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('budget_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('threshold', sa.Integer(), nullable=False),
+    sa.Column('actual_amount', sa.BigInteger(), nullable=False),
+    sa.Column('planned_amount', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('budget_alerts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_budget_alerts_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('budget_alerts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_budget_alerts_user_id'))
+
+    op.drop_table('budget_alerts')
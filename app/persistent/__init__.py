@@ -0,0 +1 @@
+from app.persistent import ledger
@@ -0,0 +1,68 @@
+from collections import defaultdict
+from typing import Any
+from flask import current_app
+from sqlalchemy import insert, select, func, Connection
+
+from app.persistent.entity import ExpenseCategoryEntity, LedgerTotalEntity, BudgetAlertEntity
+
+
+def _is_threshold_reached(actual: int, income: int, percentage: int, threshold: int) -> bool:
+    # actual >= income * percentage / 100 * threshold / 100, kept in integers
+    return actual > 0 and actual * 10000 >= income * percentage * threshold
+
+
+def record_budget_alerts(connection: Connection, deltas: dict[tuple[int, int, str], list[int]]) -> list[dict[str, Any]]:
+    """Record thresholds crossed by already applied ledger deltas, using the rollups before and after them.
+
+    The thresholds, in percent of the planned amount, are the BUDGET_ALERT_THRESHOLDS of the app config.
+    """
+    thresholds = current_app.config.get('BUDGET_ALERT_THRESHOLDS', [])
+    income_deltas = defaultdict(int)
+    expense_deltas = {}
+    for (user_id, category_id, type_), (amount, _) in deltas.items():
+        if not amount:
+            continue
+        if type_ == 'income':
+            income_deltas[user_id] += amount
+        else:
+            expense_deltas[(user_id, category_id)] = amount
+
+    user_ids = set(income_deltas) | {user_id for user_id, _ in expense_deltas}
+    if not user_ids:
+        return []
+
+    totals = LedgerTotalEntity.__table__
+    categories = ExpenseCategoryEntity.__table__
+    incomes = dict(connection.execute(
+        select(totals.c.user_id, func.sum(totals.c.total))
+        .where(totals.c.user_id.in_(user_ids), totals.c.type_ == 'income')
+        .group_by(totals.c.user_id)
+    ).all())
+    expenses = connection.execute(
+        select(totals.c.user_id, totals.c.category_id, totals.c.total, categories.c.percentage)
+        .join(categories, categories.c.id == totals.c.category_id)
+        .where(totals.c.user_id.in_(user_ids), totals.c.type_ == 'expense')
+    )
+
+    alerts = []
+    for user_id, category_id, actual, percentage in expenses:
+        income_delta = income_deltas.get(user_id, 0)
+        expense_delta = expense_deltas.get((user_id, category_id), 0)
+        if not income_delta and not expense_delta:
+            continue
+
+        income = int(incomes.get(user_id) or 0)
+        for threshold in thresholds:
+            if _is_threshold_reached(actual, income, percentage, threshold) and not _is_threshold_reached(
+                    actual - expense_delta, income - income_delta, percentage, threshold):
+                alerts.append({
+                    'user_id': user_id,
+                    'category_id': category_id,
+                    'threshold': threshold,
+                    'actual_amount': actual,
+                    'planned_amount': income * percentage / 100,
+                })
+
+    if alerts:
+        connection.execute(insert(BudgetAlertEntity), alerts)
+    return alerts
@@ -1,10 +1,22 @@
-from flask_sqlalchemy import  SQLAlchemy
+import sqlite3
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, Engine
 from sqlalchemy.orm import DeclarativeBase
 
+from app.persistent.routing import RoutingSession
+
 
 class Base(DeclarativeBase):
     pass
 
 
-sa = SQLAlchemy(model_class=Base)
+sa = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
+
 
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    # Set-based deletes rely on ON DELETE CASCADE, which SQLite only enforces per connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
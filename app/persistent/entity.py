@@ -6,12 +6,16 @@ from sqlalchemy import (
     String,
     Boolean,
     ForeignKey,
-    Date
+    Date,
+    DateTime,
+    Float,
+    Index
 )
 import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from werkzeug.security import check_password_hash
 from enum import Enum
+from app.config import TRANSACTION_STORAGE
 from app.persistent.configuration import sa
 
 
@@ -30,10 +34,15 @@ class UserEntity(sa.Model):
     email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
     roles: Mapped[str] = mapped_column(String(15), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default='1')
+    ledger_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
 
+    # Write-only so the whole ledger is never loaded by accident, read it with user.transactions.select().
+    # Transactions are detached from a deleted user by the database, see transactions.user_id
     transactions: Mapped[list['TransactionEntity']] = relationship(
         'TransactionEntity',
-        backref='user'
+        backref='user',
+        lazy='write_only',
+        passive_deletes=True
     )
 
     def to_dict(self) -> dict[str, Any]:
@@ -93,21 +102,65 @@ class ActivationTokenEntity(sa.Model):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     token: Mapped[str] = mapped_column(String(255), nullable=False)
     timestamp: Mapped[int] = mapped_column(BigInteger)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'))
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), index=True)
 
     user: Mapped[UserEntity] = relationship('UserEntity', uselist=False)
 
+    __table_args__ = (
+        Index('uq_activation_tokens_token', 'token', unique=True),
+    )
+
     def is_active(self) -> bool:
         return self.timestamp > datetime.datetime.now(datetime.UTC).timestamp()
 
 
+def _transaction_category_id(category_table: str) -> Mapped[int]:
+    # In single table storage incomes and expenses share transactions.category_id, which can only
+    # reference the common categories table
+    if TRANSACTION_STORAGE == 'single':
+        return mapped_column(
+            Integer,
+            ForeignKey('categories.id', ondelete='CASCADE'),
+            nullable=False,
+            index=True,
+            active_history=True,
+            use_existing_column=True
+        )
+    return mapped_column(
+        Integer,
+        ForeignKey(f'{category_table}.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True,
+        active_history=True
+    )
+
+
 class TransactionEntity(sa.Model):
     __tablename__ = 'transactions'
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    amount: Mapped[int] = mapped_column(Integer, nullable=False)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'))
+    # The ledger listener needs the previous values of changed columns, even on expired instances
+    amount: Mapped[int] = mapped_column(Integer, nullable=False, active_history=True)
+    # NULL once the user is deleted, the transactions stay in the ledger
+    user_id: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey('users.id', ondelete='SET NULL'),
+        nullable=True,
+        active_history=True
+    )
     type_: Mapped[str] = mapped_column(String(50))
+    booked_at: Mapped[datetime.date] = mapped_column(Date, nullable=False, default=datetime.date.today)
+    # The schedule a transaction was booked from, it is booked at most once per due date
+    recurring_transaction_id: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey('recurring_transactions.id', ondelete='SET NULL')
+    )
+
+    __table_args__ = (
+        Index('ix_transactions_user_id_booked_at', 'user_id', 'booked_at'),
+        Index('ix_transactions_type_amount', 'type_', 'amount'),
+        Index('uq_transactions_recurring_transaction_id_booked_at', 'recurring_transaction_id', 'booked_at', unique=True),
+    )
 
     __mapper_args__ = {
         "polymorphic_on": type_,
@@ -120,6 +173,7 @@ class TransactionEntity(sa.Model):
             'amount': self.amount,
             'user_id': self.user_id,
             'type': self.type_,
+            'booked_at': self.booked_at.strftime('%Y-%m-%d') if self.booked_at else None,
         }
 
     def change_amount(self, amount: int) -> None:
@@ -129,10 +183,14 @@ class TransactionEntity(sa.Model):
 
 
 class IncomeEntity(TransactionEntity):
-    __tablename__ = 'incomes'
+    if TRANSACTION_STORAGE == 'joined':
+        __tablename__ = 'incomes'
+        id: Mapped[int] = mapped_column(Integer, ForeignKey('transactions.id', ondelete='CASCADE'), primary_key=True)
+    else:
+        # An explicit None keeps Flask-SQLAlchemy from generating a table name, so declarative sees single table
+        __tablename__ = None
 
-    id: Mapped[int] = mapped_column(Integer, ForeignKey('transactions.id'), primary_key=True)
-    category_id: Mapped[int] = mapped_column(Integer, ForeignKey('income_categories.id'), nullable=False)
+    category_id: Mapped[int] = _transaction_category_id('income_categories')
 
     __mapper_args__ = {
         'polymorphic_identity': 'income'
@@ -145,10 +203,14 @@ class IncomeEntity(TransactionEntity):
 
 
 class ExpenseEntity(TransactionEntity):
-    __tablename__ = 'expenses'
+    if TRANSACTION_STORAGE == 'joined':
+        __tablename__ = 'expenses'
+        id: Mapped[int] = mapped_column(Integer, ForeignKey('transactions.id', ondelete='CASCADE'), primary_key=True)
+    else:
+        # An explicit None keeps Flask-SQLAlchemy from generating a table name, so declarative sees single table
+        __tablename__ = None
 
-    id: Mapped[int] = mapped_column(Integer, ForeignKey('transactions.id'), primary_key=True)
-    category_id: Mapped[int] = mapped_column(Integer, ForeignKey('expense_categories.id'), nullable=False)
+    category_id: Mapped[int] = _transaction_category_id('expense_categories')
 
     __mapper_args__ = {
         'polymorphic_identity': 'expense'
@@ -161,6 +223,11 @@ class CategoryEntity(sa.Model):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     type_: Mapped[str] = mapped_column(String(50))
+
+    __table_args__ = (
+        Index('uq_categories_name', 'name', unique=True),
+    )
+
     __mapper_args__ = {
         'polymorphic_on': type_,
         'polymorphic_identity': 'category'
@@ -177,12 +244,13 @@ class CategoryEntity(sa.Model):
 class IncomeCategoryEntity(CategoryEntity):
     __tablename__ = 'income_categories'
 
-    id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id'), primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
 
     income_transactions: Mapped[list[IncomeEntity]] = relationship(
         'IncomeEntity',
         backref='category',
-        cascade='all, delete-orphan'
+        cascade='all, delete-orphan',
+        passive_deletes=True
     )
 
     __mapper_args__ = {
@@ -193,13 +261,14 @@ class IncomeCategoryEntity(CategoryEntity):
 class ExpenseCategoryEntity(CategoryEntity):
     __tablename__ = 'expense_categories'
 
-    id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id'), primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
     percentage: Mapped[int] = mapped_column(Integer, default=10)
 
     expense_transactions: Mapped[list[ExpenseEntity]] = relationship(
         'ExpenseEntity',
         backref='category',
-        cascade='all, delete-orphan'
+        cascade='all, delete-orphan',
+        passive_deletes=True
     )
 
     __mapper_args__ = {
@@ -225,14 +294,77 @@ class ExpenseCategoryEntity(CategoryEntity):
         return str(self)
 
 
+class LedgerTotalEntity(sa.Model):
+    __tablename__ = 'ledger_totals'
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    category_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('categories.id', ondelete='CASCADE'),
+        primary_key=True,
+        index=True
+    )
+    type_: Mapped[str] = mapped_column(String(50), primary_key=True)
+    total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    transactions_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'user_id': self.user_id,
+            'category_id': self.category_id,
+            'type': self.type_,
+            'total': self.total,
+            'transactions_count': self.transactions_count,
+        }
+
+
+class BudgetAlertEntity(sa.Model):
+    __tablename__ = 'budget_alerts'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    category_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('categories.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True
+    )
+    threshold: Mapped[int] = mapped_column(Integer, nullable=False)
+    actual_amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    planned_amount: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC)
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'category_id': self.category_id,
+            'threshold': self.threshold,
+            'actual_amount': self.actual_amount,
+            'planned_amount': self.planned_amount,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+
 class RecurringTransactionEntity(sa.Model):
     __tablename__ = 'recurring_transactions'
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     amount: Mapped[int] = mapped_column(Integer, nullable=False)
     frequency: Mapped[Frequency] = mapped_column(default=Frequency.MONTHLY)
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
-    next_due_date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    next_due_date: Mapped[datetime.date] = mapped_column(Date, nullable=False, index=True)
+    # Token of the processing worker holding the schedule on databases without row locks, see claim_due
+    claimed_by: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     type_: Mapped[str] = mapped_column(String(50))
 
@@ -271,8 +403,16 @@ class RecurringTransactionEntity(sa.Model):
 class IncomeRecurringTransactionEntity(RecurringTransactionEntity):
     __tablename__ = 'income_recurring_transactions'
 
-    id: Mapped[int] = mapped_column(Integer, ForeignKey('recurring_transactions.id'), primary_key=True)
-    category_id: Mapped[IncomeCategoryEntity] = mapped_column(Integer, ForeignKey('income_categories.id'))
+    id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('recurring_transactions.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    category_id: Mapped[IncomeCategoryEntity] = mapped_column(
+        Integer,
+        ForeignKey('income_categories.id', ondelete='CASCADE'),
+        index=True
+    )
 
     category: Mapped['IncomeCategoryEntity'] = relationship(
         'IncomeCategoryEntity',
@@ -290,9 +430,17 @@ class IncomeRecurringTransactionEntity(RecurringTransactionEntity):
 
 class ExpenseRecurringTransactionEntity(RecurringTransactionEntity):
     __tablename__ = 'expense_recurring_transactions'
-    id: Mapped[int] = mapped_column(Integer, ForeignKey('recurring_transactions.id'), primary_key=True)
+    id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey('recurring_transactions.id', ondelete='CASCADE'),
+        primary_key=True
+    )
 
-    category_id: Mapped[ExpenseCategoryEntity] = mapped_column(Integer, ForeignKey('expense_categories.id'))
+    category_id: Mapped[ExpenseCategoryEntity] = mapped_column(
+        Integer,
+        ForeignKey('expense_categories.id', ondelete='CASCADE'),
+        index=True
+    )
 
     category: Mapped[ExpenseCategoryEntity] = relationship(
         'ExpenseCategoryEntity',
@@ -306,3 +454,49 @@ class ExpenseRecurringTransactionEntity(RecurringTransactionEntity):
         data = super().to_dict()
         data['category_id'] = self.category_id
         return data
+
+
+class SchedulerLeaseEntity(sa.Model):
+    """Lease of a scheduled job, held by at most one worker per tick until it is released or expires."""
+    __tablename__ = 'scheduler_leases'
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(255), nullable=False)
+    tick: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+
+
+class RecurringRunEntity(sa.Model):
+    __tablename__ = 'recurring_runs'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    holder: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default='running')
+    started_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    duration_ms: Mapped[int | None] = mapped_column(Integer)
+    posted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    caught_up: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(String(1000))
+
+    def finish(self, finished_at: datetime.datetime, status: str, counts: dict[str, int] | None = None,
+               error: str | None = None) -> None:
+        self.finished_at = finished_at
+        self.duration_ms = int((finished_at - self.started_at).total_seconds() * 1000)
+        self.status = status
+        self.posted = (counts or {}).get('posted', 0)
+        self.caught_up = (counts or {}).get('caught_up', 0)
+        self.error = error[:1000] if error else None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'id': self.id,
+            'holder': self.holder,
+            'status': self.status,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+            'duration_ms': self.duration_ms,
+            'posted': self.posted,
+            'caught_up': self.caught_up,
+            'error': self.error,
+        }
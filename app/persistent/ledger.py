@@ -0,0 +1,201 @@
+from collections import defaultdict
+from typing import Any
+from sqlalchemy import event, inspect, update, insert, delete, select, union_all, bindparam, func, Connection, Select
+from sqlalchemy.orm import Session
+
+from app.persistent.alerts import record_budget_alerts
+from app.persistent.entity import (
+    UserEntity,
+    TransactionEntity,
+    IncomeEntity,
+    ExpenseEntity,
+    CategoryEntity,
+    ExpenseCategoryEntity,
+    LedgerTotalEntity
+)
+
+LedgerKey = tuple[int, int, str]
+
+_LEDGER_KEY_ATTRIBUTES = ('user_id', 'category_id', 'type_')
+
+
+def _is_ledger_transaction(entity: Any) -> bool:
+    return isinstance(entity, TransactionEntity) and hasattr(type(entity), 'category_id')
+
+
+def _old_and_new_value(entity: TransactionEntity, key: str) -> tuple[Any, Any]:
+    history = inspect(entity).attrs[key].history
+    current = history.unchanged[0] if history.unchanged else None
+    old = history.deleted[0] if history.deleted else current
+    new = history.added[0] if history.added else current
+    return old, new
+
+
+def _add_delta(deltas: dict[LedgerKey, list[int]], key: LedgerKey, amount: int, count: int) -> None:
+    # Transactions of deleted users keep a NULL user_id and count towards no ledger total
+    if key[0] is None:
+        return
+    deltas[key][0] += amount
+    deltas[key][1] += count
+
+
+def collect_ledger_deltas(session: Session) -> dict[LedgerKey, list[int]]:
+    deltas = defaultdict(lambda: [0, 0])
+
+    for entity in session.new:
+        if _is_ledger_transaction(entity):
+            _add_delta(deltas, (entity.user_id, entity.category_id, entity.type_), entity.amount, 1)
+
+    for entity in session.dirty:
+        if _is_ledger_transaction(entity) and session.is_modified(entity):
+            old_key, new_key = zip(*[_old_and_new_value(entity, key) for key in _LEDGER_KEY_ATTRIBUTES])
+            old_amount, new_amount = _old_and_new_value(entity, 'amount')
+            _add_delta(deltas, old_key, -old_amount, -1)
+            _add_delta(deltas, new_key, new_amount, 1)
+
+    for entity in session.deleted:
+        if _is_ledger_transaction(entity):
+            old_key = tuple(_old_and_new_value(entity, key)[0] for key in _LEDGER_KEY_ATTRIBUTES)
+            _add_delta(deltas, old_key, -_old_and_new_value(entity, 'amount')[0], -1)
+
+    return deltas
+
+
+def apply_ledger_deltas(connection: Connection, deltas: dict[LedgerKey, list[int]]) -> None:
+    table = LedgerTotalEntity.__table__
+    deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+    if not deltas:
+        return
+
+    existing_keys = {tuple(row) for row in connection.execute(
+        select(table.c.user_id, table.c.category_id, table.c.type_)
+        .where(table.c.user_id.in_({user_id for user_id, _, _ in deltas}))
+    )}
+
+    updates = [
+        {'b_user_id': user_id, 'b_category_id': category_id, 'b_type': type_, 'b_total': amount, 'b_count': count}
+        for (user_id, category_id, type_), (amount, count) in deltas.items()
+        if (user_id, category_id, type_) in existing_keys
+    ]
+    if updates:
+        connection.execute(
+            update(table)
+            .where(
+                table.c.user_id == bindparam('b_user_id'),
+                table.c.category_id == bindparam('b_category_id'),
+                table.c.type_ == bindparam('b_type')
+            )
+            .values(
+                total=table.c.total + bindparam('b_total'),
+                transactions_count=table.c.transactions_count + bindparam('b_count')
+            ),
+            updates
+        )
+
+    inserts = [
+        {'user_id': user_id, 'category_id': category_id, 'type_': type_, 'total': amount, 'transactions_count': count}
+        for (user_id, category_id, type_), (amount, count) in deltas.items()
+        if (user_id, category_id, type_) not in existing_keys
+    ]
+    if inserts:
+        connection.execute(insert(table), inserts)
+
+
+def collect_bulk_ledger_deltas(
+        entity_type: Any,
+        rows: list[dict[str, Any]],
+        old_rows: dict[int, dict[str, Any]] | None = None) -> dict[LedgerKey, list[int]]:
+    """Deltas of rows written with ORM bulk statements, which bypass the flush and so the listener below.
+
+    old_rows maps the id of each updated row to its user_id, category_id and amount before the update.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    if not (issubclass(entity_type, TransactionEntity) and hasattr(entity_type, 'category_id')):
+        return deltas
+
+    type_ = entity_type.__mapper__.polymorphic_identity
+    for row in rows:
+        old_row = (old_rows or {}).get(row.get('id'))
+        if old_row:
+            _add_delta(deltas, (old_row['user_id'], old_row['category_id'], type_), -old_row['amount'], -1)
+            row = {**old_row, **row}
+        _add_delta(deltas, (row['user_id'], row['category_id'], type_), row['amount'], 1)
+    return deltas
+
+
+def collect_deleted_ledger_deltas(connection: Connection, transaction_ids: Any) -> dict[LedgerKey, list[int]]:
+    """Deltas removing the transactions whose ids the given select returns, read before a set-based delete."""
+    deltas = defaultdict(lambda: [0, 0])
+    stmt = union_all(*[
+        select(e.user_id, e.category_id, e.type_, e.amount).where(e.id.in_(transaction_ids))
+        for e in (IncomeEntity, ExpenseEntity)
+    ])
+    for user_id, category_id, type_, amount in connection.execute(stmt):
+        _add_delta(deltas, (user_id, category_id, type_), -amount, -1)
+    return deltas
+
+
+def collect_selected_ledger_deltas(connection: Connection, type_: str, rows: Select) -> dict[LedgerKey, list[int]]:
+    """Deltas adding the transactions of type_ whose user_id, category_id and amount the given select returns.
+
+    Read before a set-based INSERT ... SELECT of the same rows, summed up in the database.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    selected = rows.subquery()
+    stmt = (
+        select(selected.c.user_id, selected.c.category_id, func.sum(selected.c.amount), func.count())
+        .group_by(selected.c.user_id, selected.c.category_id)
+    )
+    for user_id, category_id, amount, count in connection.execute(stmt):
+        _add_delta(deltas, (user_id, category_id, type_), int(amount), count)
+    return deltas
+
+
+def apply_bulk_ledger_deltas(connection: Connection, deltas: dict[LedgerKey, list[int]]) -> None:
+    if deltas:
+        apply_ledger_deltas(connection, deltas)
+        record_budget_alerts(connection, deltas)
+        bump_ledger_versions(connection, {user_id for user_id, _, _ in deltas})
+
+
+def bump_ledger_versions(connection: Connection, user_ids: set[int] | None = None) -> None:
+    table = UserEntity.__table__
+    stmt = update(table).values(ledger_version=table.c.ledger_version + 1)
+    if user_ids is not None:
+        stmt = stmt.where(table.c.id.in_(user_ids))
+    connection.execute(stmt)
+
+
+def delete_ledger_totals_for_categories(connection: Connection, category_ids: set[int]) -> set[int]:
+    table = LedgerTotalEntity.__table__
+    user_ids = set(connection.execute(
+        select(table.c.user_id).where(table.c.category_id.in_(category_ids)).distinct()
+    ).scalars())
+    connection.execute(delete(table).where(table.c.category_id.in_(category_ids)))
+    return user_ids
+
+
+def _is_percentage_changed(entity: Any) -> bool:
+    return isinstance(entity, ExpenseCategoryEntity) and inspect(entity).attrs.percentage.history.has_changes()
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_ledger_totals(session: Session, flush_context: Any) -> None:
+    deltas = collect_ledger_deltas(session)
+    deleted_category_ids = {c.id for c in session.deleted if isinstance(c, CategoryEntity)}
+    changed_user_ids = set()
+
+    if deleted_category_ids:
+        changed_user_ids |= delete_ledger_totals_for_categories(session.connection(), deleted_category_ids)
+        deltas = {key: delta for key, delta in deltas.items() if key[1] not in deleted_category_ids}
+
+    if deltas:
+        apply_ledger_deltas(session.connection(), deltas)
+        record_budget_alerts(session.connection(), deltas)
+        changed_user_ids |= {user_id for user_id, _, _ in deltas}
+
+    # A changed percentage changes the planned amounts of every user
+    if any(_is_percentage_changed(c) for c in session.dirty):
+        bump_ledger_versions(session.connection())
+    elif changed_user_ids:
+        bump_ledger_versions(session.connection(), changed_user_ids)
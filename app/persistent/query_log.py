@@ -0,0 +1,137 @@
+from typing import Any
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from flask import has_request_context, request
+from sqlalchemy import event, Engine
+
+from app.config import (
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_SAMPLE_RATE,
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_LOG_FILE
+)
+
+logger = logging.getLogger('app.slow_queries')
+
+_START_TIMES_KEY = 'query_start_times'
+_EXPLAINED_FINGERPRINTS_MAX = 10000
+_explained_fingerprints: set[str] = set()
+
+_EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'mysql': 'EXPLAIN ',
+}
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE)\b', re.IGNORECASE)
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def configure_query_log_file(path: str | None = SLOW_QUERY_LOG_FILE) -> None:
+    # Records are JSON lines, a dedicated file gets them without the logging prefix
+    if not path or any(getattr(h, 'baseFilename', None) == os.path.abspath(path) for h in logger.handlers):
+        return
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.propagate = False
+
+
+def fingerprint(statement: str) -> str:
+    """Hash of the statement with literals and IN lists of any length collapsed, equal for equal query shapes."""
+    normalized = _PLACEHOLDER_LIST.sub('(?)', _LITERAL.sub('?', _WHITESPACE.sub(' ', statement.strip())))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _value_shape(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> dict[str, Any]:
+    """Types of the bound parameters, never their values."""
+    if executemany:
+        return {'rows': len(parameters), 'row': _value_shape(parameters[0]) if parameters else None}
+    return {'rows': 1, 'row': _value_shape(parameters)}
+
+
+def _route() -> dict[str, Any] | None:
+    if not has_request_context():
+        return None
+    return {
+        'method': request.method,
+        'rule': request.url_rule.rule if request.url_rule else request.path,
+        'endpoint': request.endpoint,
+    }
+
+
+def _explain(conn: Any, context: Any, statement: str, parameters: Any, executemany: bool) -> Any:
+    prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if not prefix or not _EXPLAINABLE.match(statement):
+        return None
+    # A streamed result is still being read from this connection, another statement would interrupt it
+    if context is not None and context.execution_options.get('stream_results'):
+        return None
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters[0] if executemany else parameters)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    except Exception as err:
+        return {'error': str(err)}
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_timer(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _log_slow_query(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    start_times = conn.info.get(_START_TIMES_KEY)
+    if not start_times:
+        return
+    duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+    slow = duration_ms >= SLOW_QUERY_THRESHOLD_MS
+    if not slow and not (SLOW_QUERY_SAMPLE_RATE and random.random() < SLOW_QUERY_SAMPLE_RATE):
+        return
+
+    statement_fingerprint = fingerprint(statement)
+    record = {
+        'event': 'slow_query' if slow else 'sampled_query',
+        'duration_ms': round(duration_ms, 3),
+        'fingerprint': statement_fingerprint,
+        'statement': statement,
+        'parameters': parameter_shape(parameters, executemany),
+        'route': _route(),
+        'database': conn.engine.url.render_as_string(hide_password=True),
+    }
+
+    # The plan of a statement shape is captured the first time it is logged only
+    if SLOW_QUERY_EXPLAIN and statement_fingerprint not in _explained_fingerprints:
+        if len(_explained_fingerprints) >= _EXPLAINED_FINGERPRINTS_MAX:
+            _explained_fingerprints.clear()
+        _explained_fingerprints.add(statement_fingerprint)
+        record['explain'] = _explain(conn, context, statement, parameters, executemany)
+
+    logger.warning(json.dumps(record, default=str))
+
+
+@event.listens_for(Engine, 'handle_error')
+def _drop_timer(context: Any) -> None:
+    # A failed statement never reaches after_cursor_execute
+    connection = context.connection
+    if connection is not None and connection.info.get(_START_TIMES_KEY):
+        connection.info[_START_TIMES_KEY].pop()
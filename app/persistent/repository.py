@@ -1,10 +1,24 @@
-from typing import Any
+from typing import Any, Callable, Iterator
 import logging
+import datetime
+import uuid
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, func, delete, insert, update, union_all, literal, exists, or_, and_, bindparam, Date, Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, with_polymorphic, selectin_polymorphic
 
+from app.config import BULK_WRITE_BATCH_SIZE, ITER_ALL_BATCH_SIZE
 from app.persistent.configuration import sa
+from app.persistent.unit_of_work import in_unit_of_work
+from app.persistent.routing import use_primary
+from app.persistent.ledger import (
+    collect_bulk_ledger_deltas,
+    collect_deleted_ledger_deltas,
+    collect_selected_ledger_deltas,
+    apply_bulk_ledger_deltas,
+    delete_ledger_totals_for_categories,
+    bump_ledger_versions
+)
 from app.persistent.entity import (
     UserEntity,
     ActivationTokenEntity,
@@ -17,42 +31,251 @@ from app.persistent.entity import (
     RecurringTransactionEntity,
     IncomeRecurringTransactionEntity,
     ExpenseRecurringTransactionEntity,
+    LedgerTotalEntity,
+    BudgetAlertEntity,
+    SchedulerLeaseEntity,
+    RecurringRunEntity,
+    Frequency,
 )
 
 logging.basicConfig(level=logging.INFO)
 
 
+def _booked_between(entity: Any, date_from: datetime.date | None, date_to: datetime.date | None) -> list:
+    conditions = []
+    if date_from:
+        conditions.append(entity.booked_at >= date_from)
+    if date_to:
+        conditions.append(entity.booked_at <= date_to)
+    return conditions
+
+
 class CrudRepositoryORM[T:sa.Model]:
+    # How the find_* methods load the subclass tables of a joined inheritance hierarchy:
+    # 'joined' LEFT OUTER JOINs them into the query, 'selectin' loads them with one extra
+    # SELECT ... IN per subclass, 'select' leaves them to a lazy load per row
+    polymorphic_loading = 'select'
+
+    # Lookup statements by entity type and key, shared by every repository of that entity, see _statement
+    _statements: dict[tuple[Any, Any], Any] = {}
+
     def __init__(self, db: SQLAlchemy, entity_type: Any) -> None:
         self.sa = db
         self.entity_type = entity_type
 
+    def __getstate__(self) -> dict[str, Any]:
+        # Repositories are shipped to worker processes without the extension, which is re-bound there
+        return {'entity_type': self.entity_type}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.sa = sa
+        self.entity_type = state['entity_type']
+
+    def _commit(self) -> None:
+        # Inside a unit of work the caller commits, flushing still assigns ids and runs the ledger listener
+        if in_unit_of_work():
+            self.sa.session.flush()
+        else:
+            self.sa.session.commit()
+
     def save_or_update(self, entity: T) -> None:
         self.sa.session.add(self.sa.session.merge(entity) if entity.id else entity)
-        self.sa.session.commit()
+        self._commit()
 
     def save_or_update_many(self, entities: list[T]) -> None:
         self.sa.session.add_all(entities)
-        self.sa.session.commit()
-
-    def find_by_id(self, entity_id: int) -> T | None:
-        stmt = select(self.entity_type).filter_by(id=entity_id)
-        return self.sa.session.execute(stmt).scalar_one_or_none()
-
-    def find_all(self) -> list[T]:
-        stmt = select(self.entity_type)
+        self._commit()
+
+    def bulk_insert(self, rows: list[dict[str, Any]], batch_size: int = BULK_WRITE_BATCH_SIZE) -> int:
+        """Inserts rows given as column dicts without building entities, committing every batch.
+
+        Each table of a joined inheritance hierarchy gets one set-based INSERT per batch: a multi-row
+        INSERT into the root table, whose generated ids follow from LAST_INSERT_ID() on MySQL and come back
+        through RETURNING elsewhere, then an executemany into the child table.
+        """
+        mapper = self.entity_type.__mapper__
+        tables = list(dict.fromkeys(m.local_table for m in reversed(list(mapper.iterate_to_root()))))
+        identity = {mapper.polymorphic_on.key: mapper.polymorphic_identity} if mapper.polymorphic_on is not None else {}
+
+        for start in range(0, len(rows), batch_size):
+            batch = [{**identity, **row} for row in rows[start:start + batch_size]]
+            connection = self.sa.session.connection()
+            ids = self._insert_root_rows(connection, tables[0], batch, returning_ids=len(tables) > 1)
+            for table in tables[1:]:
+                connection.execute(insert(table), [
+                    {**{key: value for key, value in row.items() if key in table.c}, 'id': entity_id}
+                    for row, entity_id in zip(batch, ids)
+                ])
+
+            apply_bulk_ledger_deltas(connection, collect_bulk_ledger_deltas(self.entity_type, batch))
+            self._commit()
+        return len(rows)
+
+    @staticmethod
+    def _insert_root_rows(connection: Any, table: Any, rows: list[dict[str, Any]], returning_ids: bool) -> list[int]:
+        root_rows = [{key: value for key, value in row.items() if key in table.c} for row in rows]
+        if not returning_ids:
+            connection.execute(insert(table), root_rows)
+            return []
+        if all(row.get('id') for row in root_rows):
+            connection.execute(insert(table), root_rows)
+            return [row['id'] for row in root_rows]
+
+        if connection.dialect.name == 'sqlite':
+            # insertmanyvalues sends the batch as one multi-row INSERT .. RETURNING, which SQLite numbers row after
+            # row under its write lock, so the ids in ascending order are the ids of the rows in order
+            return sorted(connection.execute(insert(table).returning(table.c.id), root_rows).scalars())
+        if connection.dialect.name != 'mysql':
+            stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+            return connection.execute(stmt, root_rows).scalars().all()
+
+        # MySQL allocates the ids of a multi-row simple INSERT as one block in every innodb_autoinc_lock_mode,
+        # auto_increment_increment apart, and LAST_INSERT_ID() is the id of the first row
+        result = connection.execute(insert(table).values(root_rows))
+        step = connection.info.get('auto_increment_increment')
+        if step is None:
+            step = connection.info['auto_increment_increment'] = connection.exec_driver_sql(
+                'SELECT @@auto_increment_increment'
+            ).scalar()
+        return [result.lastrowid + step * i for i in range(len(root_rows))]
+
+    def bulk_save_or_update(self, rows: list[dict[str, Any]], batch_size: int = BULK_WRITE_BATCH_SIZE) -> int:
+        """Like save_or_update for column dicts: rows with an id are updated by primary key, the rest inserted."""
+        new_rows = [row for row in rows if not row.get('id')]
+        existing_rows = [row for row in rows if row.get('id')]
+
+        for start in range(0, len(existing_rows), batch_size):
+            batch = existing_rows[start:start + batch_size]
+            old_rows = self._find_ledger_columns([row['id'] for row in batch])
+            self.sa.session.execute(update(self.entity_type), batch)
+            apply_bulk_ledger_deltas(
+                self.sa.session.connection(),
+                collect_bulk_ledger_deltas(self.entity_type, batch, old_rows)
+            )
+            self._commit()
+
+        return self.bulk_insert(new_rows, batch_size) + len(existing_rows)
+
+    def _find_ledger_columns(self, entity_ids: list[int]) -> dict[int, dict[str, Any]]:
+        if not hasattr(self.entity_type, 'category_id') or not hasattr(self.entity_type, 'amount'):
+            return {}
+        e = self.entity_type
+        stmt = select(e.id, e.user_id, e.category_id, e.amount).where(e.id.in_(entity_ids))
+        return {row.id: row._asdict() for row in self.sa.session.execute(stmt)}
+
+    def _select(self, polymorphic_loading: str | None = None) -> tuple[Any, Any]:
+        """Select of the entity with its subclasses loaded as polymorphic_loading, or the repository default.
+
+        Returns the statement and the entity its criteria should refer to.
+        """
+        polymorphic_loading = polymorphic_loading or self.polymorphic_loading
+        mapper = self.entity_type.__mapper__
+        subclasses = [m.class_ for m in mapper.self_and_descendants if m is not mapper]
+        if not subclasses or polymorphic_loading == 'select':
+            return select(self.entity_type), self.entity_type
+        if polymorphic_loading == 'joined':
+            entity = with_polymorphic(self.entity_type, subclasses)
+            return select(entity), entity
+        if polymorphic_loading == 'selectin':
+            return select(self.entity_type).options(selectin_polymorphic(self.entity_type, subclasses)), \
+                self.entity_type
+        raise ValueError(f'Unknown polymorphic loading {polymorphic_loading}')
+
+    def _statement(self, key: Any, build: Callable[[], Any]) -> Any:
+        """Statement built once per entity type and key, with its values left to bindparams given on execute.
+
+        Executing the same statement object again skips building it and goes straight to its compiled form in
+        the engine's cache, which is most of the cost of a lookup by primary or unique key.
+        """
+        statement_key = (self.entity_type, key)
+        stmt = self._statements.get(statement_key)
+        if stmt is None:
+            stmt = self._statements[statement_key] = build()
+        return stmt
+
+    def _find_one_by(self, column: str, value: Any, polymorphic_loading: str | None = None) -> T | None:
+        polymorphic_loading = polymorphic_loading or self.polymorphic_loading
+
+        def build() -> Any:
+            stmt, entity = self._select(polymorphic_loading)
+            return stmt.where(getattr(entity, column) == bindparam(column))
+
+        stmt = self._statement(('find_one_by', column, polymorphic_loading), build)
+        return self.sa.session.execute(stmt, {column: value}).scalar_one_or_none()
+
+    def find_by_id(self, entity_id: int, polymorphic_loading: str | None = None) -> T | None:
+        return self._find_one_by('id', entity_id, polymorphic_loading)
+
+    def find_all(self, polymorphic_loading: str | None = None) -> list[T]:
+        stmt, _ = self._select(polymorphic_loading)
         return self.sa.session.execute(stmt).scalars().all()
 
-    def delete_by_id(self, entity_id: int) -> None:
-        entity = self.find_by_id(entity_id)
-        self.sa.session.delete(entity)
-        self.sa.session.commit()
+    def iter_all(self, batch_size: int = ITER_ALL_BATCH_SIZE, polymorphic_loading: str | None = None) -> Iterator[T]:
+        """Streams every entity in id order from a server side cursor, batch_size rows in memory at a time."""
+        stmt, entity = self._select(polymorphic_loading)
+        stmt = stmt.order_by(entity.id).execution_options(yield_per=batch_size)
+        yield from self.sa.session.execute(stmt).scalars()
+
+    def find_page(
+            self,
+            after_id: int | None,
+            limit: int,
+            order: str = 'asc',
+            polymorphic_loading: str | None = None,
+            **filters: Any) -> list[T]:
+        """Keyset page of entities with ids after after_id in the given order ('asc' or 'desc')."""
+        stmt, entity = self._select(polymorphic_loading)
+        entity_id = entity.id
+        stmt = stmt.filter_by(**filters).limit(limit)
+        if order == 'desc':
+            stmt = stmt.order_by(entity_id.desc())
+            if after_id is not None:
+                stmt = stmt.where(entity_id < after_id)
+        else:
+            stmt = stmt.order_by(entity_id)
+            if after_id is not None:
+                stmt = stmt.where(entity_id > after_id)
+        return self.sa.session.execute(stmt).scalars().all()
 
-    def delete_all(self) -> None:
-        entities = self.find_all()
-        for e in entities:
-            self.sa.session.delete(e)
-            self.sa.session.commit()
+    def delete_by_id(self, entity_id: int) -> int:
+        return self._delete_rows(self.entity_type.__mapper__.local_table.c.id == entity_id, entity_ids={entity_id})
+
+    def delete_all(self) -> int:
+        return self._delete_rows()
+
+    def _expunge_deleted(self, entity_ids: set[int] | None, entity_type: Any = None) -> None:
+        # Entities of deleted rows would stay persistent in the session and fail to refresh once the commit
+        # expires them, detached they keep the attributes loaded before the delete
+        entity_type = entity_type or self.entity_type
+        for (_, identity, _), entity in list(self.sa.session.identity_map.items()):
+            if isinstance(entity, entity_type) and (entity_ids is None or identity[0] in entity_ids):
+                self.sa.session.expunge(entity)
+
+    def _delete_rows(self, *criteria: Any, entity_ids: set[int] | None = None) -> int:
+        """Deletes with one DELETE on the root table of the hierarchy, child rows go by ON DELETE CASCADE.
+
+        criteria may only use columns of the entity's own table, which MySQL allows in a subquery of a DELETE.
+        """
+        mapper = self.entity_type.__mapper__
+        local_table, root_table = mapper.local_table, mapper.base_mapper.local_table
+        if mapper.single:
+            identities = [m.polymorphic_identity for m in mapper.self_and_descendants]
+            criteria += (local_table.c[mapper.polymorphic_on.key].in_(identities),)
+        stmt = delete(root_table)
+        if local_table is not root_table:
+            stmt = stmt.where(root_table.c.id.in_(select(local_table.c.id).where(*criteria)))
+        elif criteria:
+            stmt = stmt.where(*criteria)
+
+        connection = self.sa.session.connection()
+        if issubclass(self.entity_type, TransactionEntity):
+            deltas = collect_deleted_ledger_deltas(connection, select(local_table.c.id).where(*criteria))
+            apply_bulk_ledger_deltas(connection, deltas)
+
+        deleted_count = connection.execute(stmt).rowcount
+        self._expunge_deleted(entity_ids)
+        self._commit()
+        return deleted_count
 
 
 class UserRepository(CrudRepositoryORM[UserEntity]):
@@ -60,26 +283,120 @@ class UserRepository(CrudRepositoryORM[UserEntity]):
         super().__init__(db, UserEntity)
 
     def find_by_email(self, email: str) -> UserEntity | None:
-        stmt = select(UserEntity).filter_by(email=email)
-        return self.sa.session.execute(stmt).scalar_one_or_none()
+        return self._find_one_by('email', email)
 
     def find_by_name(self, name: str) -> UserEntity | None:
-        stmt = select(UserEntity).filter_by(name=name)
+        return self._find_one_by('name', name)
+
+    def find_ledger_version(self, user_id: int) -> int | None:
+        stmt = select(UserEntity.ledger_version).filter_by(id=user_id)
         return self.sa.session.execute(stmt).scalar_one_or_none()
 
-    def calculate_total_income(self, user_id: int) -> int:
-        user = self.find_by_id(user_id)
-        transactions = user.transactions
-        return sum([t.amount for t in transactions if t.type_ == 'income'])
+    def find_id_range(self) -> tuple[int, int] | None:
+        stmt = select(func.min(UserEntity.id), func.max(UserEntity.id))
+        first_id, last_id = self.sa.session.execute(stmt).one()
+        return (first_id, last_id) if first_id is not None else None
+
+    def calculate_total_income(
+            self,
+            user_id: int,
+            date_from: datetime.date | None = None,
+            date_to: datetime.date | None = None) -> int:
+        if date_from or date_to:
+            # Bounded periods are a range scan over (user_id, booked_at) instead of the lifetime rollups
+            stmt = select(func.sum(IncomeEntity.amount)).where(
+                IncomeEntity.user_id == user_id,
+                *_booked_between(IncomeEntity, date_from, date_to)
+            )
+        else:
+            stmt = select(func.sum(LedgerTotalEntity.total)).where(
+                LedgerTotalEntity.user_id == user_id,
+                LedgerTotalEntity.type_ == 'income'
+            )
+        return int(self.sa.session.execute(stmt).scalar() or 0)
 
     def calculate_total_expenses(self, user_id: int, category_id: int) -> int:
-        user = self.find_by_id(user_id)
-        return sum([t.amount for t in user.transactions if t.type_ == 'expense' and t.category_id == category_id])
+        stmt = select(LedgerTotalEntity.total).where(
+            LedgerTotalEntity.user_id == user_id,
+            LedgerTotalEntity.category_id == category_id,
+            LedgerTotalEntity.type_ == 'expense'
+        )
+        return int(self.sa.session.execute(stmt).scalar_one_or_none() or 0)
+
+    def find_names_page(self, after_id: int, limit: int, until_id: int | None = None) -> list[tuple[int, str]]:
+        stmt = select(UserEntity.id, UserEntity.name).where(UserEntity.id > after_id).order_by(UserEntity.id).limit(limit)
+        if until_id is not None:
+            stmt = stmt.where(UserEntity.id <= until_id)
+        return [tuple(row) for row in self.sa.session.execute(stmt)]
+
+    def find_all_names(self) -> list[tuple[int, str]]:
+        stmt = select(UserEntity.id, UserEntity.name).order_by(UserEntity.id)
+        return [tuple(row) for row in self.sa.session.execute(stmt)]
+
+    @staticmethod
+    def _expenses_by_category_stmt():
+        return (
+            select(
+                LedgerTotalEntity.user_id,
+                ExpenseCategoryEntity.name,
+                ExpenseCategoryEntity.percentage,
+                LedgerTotalEntity.total
+            )
+            .join(LedgerTotalEntity, LedgerTotalEntity.category_id == ExpenseCategoryEntity.id)
+            .where(LedgerTotalEntity.type_ == 'expense', LedgerTotalEntity.transactions_count > 0)
+            .order_by(LedgerTotalEntity.user_id, ExpenseCategoryEntity.id)
+        )
+
+    def calculate_expenses_by_category(
+            self,
+            user_id: int,
+            date_from: datetime.date | None = None,
+            date_to: datetime.date | None = None) -> list[tuple[str, int, int]]:
+        if date_from or date_to:
+            stmt = (
+                select(
+                    ExpenseEntity.user_id,
+                    ExpenseCategoryEntity.name,
+                    ExpenseCategoryEntity.percentage,
+                    func.sum(ExpenseEntity.amount)
+                )
+                .join(ExpenseEntity, ExpenseEntity.category_id == ExpenseCategoryEntity.id)
+                .where(ExpenseEntity.user_id == user_id, *_booked_between(ExpenseEntity, date_from, date_to))
+                .group_by(
+                    ExpenseEntity.user_id,
+                    ExpenseCategoryEntity.id,
+                    ExpenseCategoryEntity.name,
+                    ExpenseCategoryEntity.percentage
+                )
+                .order_by(ExpenseCategoryEntity.id)
+            )
+        else:
+            stmt = self._expenses_by_category_stmt().where(LedgerTotalEntity.user_id == user_id)
+        return [(name, percentage, int(total)) for _, name, percentage, total in self.sa.session.execute(stmt)]
+
+    def calculate_total_incomes_for_users(self, user_ids: list[int]) -> dict[int, int]:
+        stmt = (
+            select(LedgerTotalEntity.user_id, func.sum(LedgerTotalEntity.total))
+            .where(LedgerTotalEntity.user_id.in_(user_ids), LedgerTotalEntity.type_ == 'income')
+            .group_by(LedgerTotalEntity.user_id)
+        )
+        return {user_id: int(total) for user_id, total in self.sa.session.execute(stmt)}
+
+    def calculate_expenses_by_category_for_users(self, user_ids: list[int]) -> list[tuple[int, str, int, int]]:
+        stmt = self._expenses_by_category_stmt().where(LedgerTotalEntity.user_id.in_(user_ids))
+        return [
+            (user_id, name, percentage, int(total))
+            for user_id, name, percentage, total in self.sa.session.execute(stmt)
+        ]
 
     def get_expense_categories_idx(self, user_id: int) -> list[int]:
-        transactions = self.find_by_id(user_id).transactions
-        expenses = [t for t in transactions if t.type_ == 'expense']
-        return list(set([e.category_id for e in expenses]))
+        stmt = (
+            select(ExpenseEntity.category_id)
+            .where(ExpenseEntity.user_id == user_id)
+            .distinct()
+            .order_by(ExpenseEntity.category_id)
+        )
+        return list(self.sa.session.execute(stmt).scalars())
 
 
 class ActivationTokenRepository(CrudRepositoryORM[ActivationTokenEntity]):
@@ -87,23 +404,37 @@ class ActivationTokenRepository(CrudRepositoryORM[ActivationTokenEntity]):
         super().__init__(db, ActivationTokenEntity)
 
     def find_by_token(self, token: str) -> ActivationTokenEntity | None:
-        stmt = select(self.entity_type).filter_by(token=token).options(
-            joinedload(ActivationTokenEntity.user)
-        )
-        return self.sa.session.execute(stmt).scalar_one_or_none()
+        stmt = self._statement('find_by_token', lambda: select(ActivationTokenEntity).where(
+            ActivationTokenEntity.token == bindparam('token')
+        ).options(joinedload(ActivationTokenEntity.user)))
+        return self.sa.session.execute(stmt, {'token': token}).scalar_one_or_none()
 
 
 class TransactionRepository(CrudRepositoryORM[TransactionEntity]):
+    polymorphic_loading = 'joined'
+
     def __init__(self, db: SQLAlchemy) -> None:
         super().__init__(db, TransactionEntity)
 
+    def stream_ledger_columns(self, batch_size: int) -> Iterator[list[Row]]:
+        """Yields (user_id, category_id, is_income, amount) rows in partitions from a server side cursor
+
+        Transactions of deleted users, whose user_id is NULL, are left out.
+        """
+        stmt = union_all(*[
+            select(e.user_id, e.category_id, literal(is_income), e.amount).where(e.user_id.is_not(None))
+            for e, is_income in ((IncomeEntity, 1), (ExpenseEntity, 0))
+        ])
+        yield from self.sa.session.execute(stmt, execution_options={'yield_per': batch_size}).partitions()
+
 
 class IncomeRepository(CrudRepositoryORM[IncomeEntity]):
     def __init__(self, db: SQLAlchemy) -> None:
         super().__init__(db, IncomeEntity)
 
     def find_higher_than(self, amount: float) -> list[IncomeEntity]:
-        stmt = select(IncomeEntity).where(IncomeEntity.amount > amount)
+        # The type criterion is implied by the join, spelled out it lets ix_transactions_type_amount serve the range
+        stmt = select(IncomeEntity).where(IncomeEntity.type_ == 'income', IncomeEntity.amount > amount)
         return self.sa.session.execute(stmt).scalars().all()
 
 
@@ -112,22 +443,49 @@ class ExpenseRepository(CrudRepositoryORM[ExpenseEntity]):
         super().__init__(db, ExpenseEntity)
 
     def find_higher_than(self, amount: float) -> list[ExpenseEntity]:
-        stmt = select(ExpenseEntity).where(ExpenseEntity.amount > amount)
+        stmt = select(ExpenseEntity).where(ExpenseEntity.type_ == 'expense', ExpenseEntity.amount > amount)
         return self.sa.session.execute(stmt).scalars().all()
 
 
 class CategoryRepository(CrudRepositoryORM[CategoryEntity]):
+    polymorphic_loading = 'joined'
+
     def __init__(self, db: SQLAlchemy) -> None:
         super().__init__(db, CategoryEntity)
 
-    def find_by_name(self, name: str) -> CategoryEntity | None:
-        stmt = select(self.entity_type).filter_by(name=name)
-        return self.sa.session.execute(stmt).scalar_one_or_none()
-
-    def delete_by_name(self, name: str) -> None:
-        entity = self.find_by_name(name)
-        self.sa.session.delete(entity)
-        self.sa.session.commit()
+    def find_by_name(self, name: str, polymorphic_loading: str | None = None) -> CategoryEntity | None:
+        return self._find_one_by('name', name, polymorphic_loading)
+
+    def delete_by_name(self, name: str) -> dict[str, int]:
+        """Deletes the category with its transactions and recurring transactions without loading them."""
+        connection = self.sa.session.connection()
+        category_ids = list(connection.execute(
+            select(CategoryEntity.id).where(CategoryEntity.name == name)
+        ).scalars())
+
+        changed_user_ids = delete_ledger_totals_for_categories(connection, set(category_ids))
+        deleted_counts = {}
+        for label, root_entity, child_entities in (
+                ('transactions', TransactionEntity, (IncomeEntity, ExpenseEntity)),
+                ('recurring_transactions', RecurringTransactionEntity,
+                 (IncomeRecurringTransactionEntity, ExpenseRecurringTransactionEntity))):
+            child_ids = set(connection.execute(union_all(*[
+                select(e.__table__.c.id).where(e.__table__.c.category_id.in_(category_ids)) for e in child_entities
+            ])).scalars())
+            root_table = root_entity.__table__
+            deleted_counts[label] = connection.execute(
+                delete(root_table).where(root_table.c.id.in_(child_ids))
+            ).rowcount
+            self._expunge_deleted(child_ids, root_entity)
+
+        deleted_counts['categories'] = connection.execute(
+            delete(CategoryEntity.__table__).where(CategoryEntity.__table__.c.id.in_(category_ids))
+        ).rowcount
+        self._expunge_deleted(set(category_ids))
+        if changed_user_ids:
+            bump_ledger_versions(connection, changed_user_ids)
+        self._commit()
+        return deleted_counts
 
 
 class IncomeCategoryRepository(CrudRepositoryORM[IncomeCategoryEntity]):
@@ -139,6 +497,14 @@ class ExpenseCategoryRepository(CrudRepositoryORM[ExpenseCategoryEntity]):
     def __init__(self, db: SQLAlchemy) -> None:
         super().__init__(db, ExpenseCategoryEntity)
 
+    def find_names_and_percentages(self) -> list[tuple[int, str, int]]:
+        stmt = select(
+            ExpenseCategoryEntity.id,
+            ExpenseCategoryEntity.name,
+            ExpenseCategoryEntity.percentage
+        ).order_by(ExpenseCategoryEntity.id)
+        return [tuple(row) for row in self.sa.session.execute(stmt)]
+
     def calculate_all_percentages(self) -> float:
         expense_categories = self.find_all()
 
@@ -146,9 +512,205 @@ class ExpenseCategoryRepository(CrudRepositoryORM[ExpenseCategoryEntity]):
 
 
 class RecurringTransactionRepository(CrudRepositoryORM[RecurringTransactionEntity]):
+    polymorphic_loading = 'joined'
+
     def __init__(self, db: SQLAlchemy):
         super().__init__(db, RecurringTransactionEntity)
 
+    def find_due_keys(
+            self,
+            due_date: datetime.date,
+            after: tuple[datetime.date, int] | None,
+            limit: int,
+            shard: tuple[int, int] = (0, 1)) -> list[tuple[datetime.date, int]]:
+        """Keyset page of the (next_due_date, id) of schedules due on or before due_date, after the given key.
+
+        Read from ix_recurring_transactions_next_due_date, which also holds the id, without scanning or sorting
+        every schedule. shard is an (index, count) pair, only schedules whose user_id modulo count is index are
+        returned.
+        """
+        table = RecurringTransactionEntity.__table__
+        stmt = (
+            select(table.c.next_due_date, table.c.id)
+            .where(table.c.next_due_date <= due_date)
+            .order_by(table.c.next_due_date, table.c.id)
+            .limit(limit)
+        )
+        if after is not None:
+            after_date, after_id = after
+            stmt = stmt.where(or_(
+                table.c.next_due_date > after_date,
+                and_(table.c.next_due_date == after_date, table.c.id > after_id)
+            ))
+        shard_index, shard_count = shard
+        if shard_count > 1:
+            stmt = stmt.where(table.c.user_id % shard_count == shard_index)
+        # The page is claimed on the primary afterwards, read it there so a lagging replica does not hide any
+        with use_primary(self.sa.session):
+            return [tuple(row) for row in self.sa.session.execute(stmt)]
+
+    def claim_due(self, due_date: datetime.date, schedule_ids: list[int]) -> list[int]:
+        """Claims the given schedules that are still due and not held by another worker, until the transaction ends.
+
+        Where the database has row locks they are locked with SELECT ... FOR UPDATE SKIP LOCKED by primary key,
+        which locks no other rows. SQLite locks the whole database for writing instead, there claimed_by is set
+        with a conditional UPDATE. Either way a schedule booked by another worker meanwhile is no longer due and
+        not claimed.
+        """
+        if not schedule_ids:
+            return []
+        table = RecurringTransactionEntity.__table__
+        still_due = and_(table.c.id.in_(schedule_ids), table.c.next_due_date <= due_date)
+
+        if self.sa.session.connection().dialect.name == 'sqlite':
+            token = uuid.uuid4().hex
+            self.sa.session.execute(
+                update(table).where(still_due, table.c.claimed_by.is_(None)).values(claimed_by=token)
+            )
+            stmt = select(table.c.id).where(table.c.id.in_(schedule_ids), table.c.claimed_by == token)
+        else:
+            stmt = select(table.c.id).where(still_due).with_for_update(skip_locked=True)
+        return sorted(self.sa.session.execute(stmt).scalars())
+
+    def find_missed(self, due_date: datetime.date, schedule_ids: list[int]) -> list[RecurringTransactionEntity]:
+        """The given schedules whose next_due_date passed before due_date without being booked."""
+        stmt, entity = self._select()
+        stmt = stmt.where(entity.id.in_(schedule_ids), entity.next_due_date < due_date).order_by(entity.id)
+        return self.sa.session.execute(stmt).scalars().all()
+
+    def find_by_ids(self, schedule_ids: list[int]) -> list[RecurringTransactionEntity]:
+        """The given schedules in id order, refreshed from the rows set-based statements may have changed."""
+        stmt, entity = self._select()
+        stmt = stmt.where(entity.id.in_(schedule_ids)).order_by(entity.id)
+        return self.sa.session.execute(stmt.execution_options(populate_existing=True)).scalars().all()
+
+    def find_booked_dates(
+            self,
+            schedule_ids: list[int],
+            date_from: datetime.date,
+            date_to: datetime.date) -> set[tuple[int, datetime.date]]:
+        """(schedule id, booked_at) of the transactions already booked from the given schedules in the period."""
+        table = TransactionEntity.__table__
+        stmt = select(table.c.recurring_transaction_id, table.c.booked_at).where(
+            table.c.recurring_transaction_id.in_(schedule_ids),
+            table.c.booked_at.between(date_from, date_to)
+        )
+        return {tuple(row) for row in self.sa.session.execute(stmt)}
+
+    def find_next_due_dates(self, schedule_ids: list[int]) -> dict[int, datetime.date]:
+        table = RecurringTransactionEntity.__table__
+        stmt = select(table.c.id, table.c.next_due_date).where(table.c.id.in_(schedule_ids))
+        return {schedule_id: next_due_date for schedule_id, next_due_date in self.sa.session.execute(stmt)}
+
+    def update_next_due_dates(self, next_due_dates: dict[int, datetime.date]) -> int:
+        """Sets the next_due_date of each schedule id with one executemany UPDATE."""
+        if not next_due_dates:
+            return 0
+        table = RecurringTransactionEntity.__table__
+        self.sa.session.connection().execute(
+            update(table)
+            .where(table.c.id == bindparam('b_id'))
+            .values(next_due_date=bindparam('b_next_due_date'), claimed_by=None),
+            [{'b_id': schedule_id, 'b_next_due_date': date} for schedule_id, date in next_due_dates.items()]
+        )
+        self._commit()
+        return len(next_due_dates)
+
+    def post_due_transactions(self, due_date: datetime.date, schedule_ids: list[int]) -> int:
+        """Books the transaction of each given schedule due on due_date with INSERT ... SELECT statements.
+
+        Occurrences booked already are skipped. The ledger totals are updated from one aggregate read of the
+        booked rows per type.
+        """
+        connection = self.sa.session.connection()
+        transactions = TransactionEntity.__table__
+        posted_count = 0
+        for recurring_entity, transaction_entity in (
+                (IncomeRecurringTransactionEntity, IncomeEntity),
+                (ExpenseRecurringTransactionEntity, ExpenseEntity)):
+            type_ = transaction_entity.__mapper__.polymorphic_identity
+            occurrences = select(
+                recurring_entity.id,
+                recurring_entity.user_id,
+                recurring_entity.category_id,
+                recurring_entity.amount
+            ).where(
+                recurring_entity.id.in_(schedule_ids),
+                recurring_entity.next_due_date == due_date,
+                ~exists().where(
+                    transactions.c.recurring_transaction_id == recurring_entity.id,
+                    transactions.c.booked_at == due_date
+                )
+            )
+            deltas = collect_selected_ledger_deltas(connection, type_, occurrences)
+
+            # In single table storage the category is a column of transactions itself
+            single_table = transaction_entity.__table__ is transactions
+            columns = ['recurring_transaction_id', 'user_id', 'amount', 'type_', 'booked_at']
+            values = [recurring_entity.id, recurring_entity.user_id, recurring_entity.amount,
+                      literal(type_), literal(due_date, Date)]
+            if single_table:
+                columns.append('category_id')
+                values.append(recurring_entity.category_id)
+            posted_count += connection.execute(
+                insert(transactions).from_select(columns, occurrences.with_only_columns(*values))
+            ).rowcount
+
+            if not single_table:
+                child_table, recurring_table = transaction_entity.__table__, recurring_entity.__table__
+                connection.execute(insert(child_table).from_select(
+                    ['id', 'category_id'],
+                    select(transactions.c.id, recurring_table.c.category_id)
+                    .join(recurring_table, recurring_table.c.id == transactions.c.recurring_transaction_id)
+                    .where(
+                        transactions.c.recurring_transaction_id.in_(schedule_ids),
+                        transactions.c.booked_at == due_date,
+                        ~exists().where(child_table.c.id == transactions.c.id)
+                    )
+                ))
+
+            apply_bulk_ledger_deltas(connection, deltas)
+        self._commit()
+        return posted_count
+
+    def advance_next_due_dates(
+            self,
+            due_date: datetime.date,
+            schedule_ids: list[int],
+            intervals: dict[Frequency, datetime.timedelta]) -> int:
+        """Moves the given schedules due on due_date to their next occurrence, one UPDATE per frequency."""
+        table = RecurringTransactionEntity.__table__
+        connection = self.sa.session.connection()
+        advanced_count = 0
+        for frequency, interval in intervals.items():
+            advanced_count += connection.execute(
+                update(table)
+                .where(table.c.id.in_(schedule_ids), table.c.next_due_date == due_date, table.c.frequency == frequency)
+                .values(next_due_date=due_date + interval, claimed_by=None)
+            ).rowcount
+        self._commit()
+        return advanced_count
+
+    def find_schedules_by_user_id(self, user_id: int) -> list[Row]:
+        schedules = [
+            select(
+                literal(type_).label('type_'),
+                category_entity.id.label('category_id'),
+                category_entity.name,
+                recurring_entity.amount,
+                recurring_entity.frequency,
+                recurring_entity.next_due_date
+            )
+            .join(category_entity, category_entity.id == recurring_entity.category_id)
+            .where(recurring_entity.user_id == user_id)
+            for type_, recurring_entity, category_entity in (
+                ('income', IncomeRecurringTransactionEntity, IncomeCategoryEntity),
+                ('expense', ExpenseRecurringTransactionEntity, ExpenseCategoryEntity)
+            )
+        ]
+        stmt = union_all(*schedules).order_by('category_id')
+        return list(self.sa.session.execute(stmt))
+
 
 class ExpenseRecurringTransactionRepository(CrudRepositoryORM[ExpenseRecurringTransactionEntity]):
     def __init__(self, db: SQLAlchemy):
@@ -160,6 +722,115 @@ class IncomeRecurringTransactionRepository(CrudRepositoryORM[IncomeRecurringTran
         super().__init__(db, IncomeRecurringTransactionEntity)
 
 
+class LedgerTotalRepository(CrudRepositoryORM[LedgerTotalEntity]):
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db, LedgerTotalEntity)
+
+    @staticmethod
+    def _raw_totals_stmt(first_user_id: int, last_user_id: int):
+        return union_all(*[
+            select(e.user_id, e.category_id, e.type_, func.sum(e.amount), func.count())
+            .where(e.user_id.between(first_user_id, last_user_id))
+            .group_by(e.user_id, e.category_id, e.type_)
+            for e in (IncomeEntity, ExpenseEntity)
+        ])
+
+    def find_by_user_id(self, user_id: int) -> list[LedgerTotalEntity]:
+        stmt = select(LedgerTotalEntity).filter_by(user_id=user_id)
+        return self.sa.session.execute(stmt).scalars().all()
+
+    def find_totals(self, first_user_id: int, last_user_id: int) -> list[tuple[int, int, str, int, int]]:
+        stmt = select(
+            LedgerTotalEntity.user_id,
+            LedgerTotalEntity.category_id,
+            LedgerTotalEntity.type_,
+            LedgerTotalEntity.total,
+            LedgerTotalEntity.transactions_count
+        ).where(LedgerTotalEntity.user_id.between(first_user_id, last_user_id))
+        return [tuple(row) for row in self.sa.session.execute(stmt)]
+
+    def calculate_raw_totals(self, first_user_id: int, last_user_id: int) -> list[tuple[int, int, str, int, int]]:
+        stmt = self._raw_totals_stmt(first_user_id, last_user_id)
+        return [
+            (user_id, category_id, type_, int(total), count)
+            for user_id, category_id, type_, total, count in self.sa.session.execute(stmt)
+        ]
+
+    def rebuild_totals(self, first_user_id: int, last_user_id: int) -> int:
+        self.sa.session.execute(
+            delete(LedgerTotalEntity).where(LedgerTotalEntity.user_id.between(first_user_id, last_user_id))
+        )
+        result = self.sa.session.execute(
+            insert(LedgerTotalEntity).from_select(
+                ['user_id', 'category_id', 'type_', 'total', 'transactions_count'],
+                self._raw_totals_stmt(first_user_id, last_user_id)
+            )
+        )
+        self._commit()
+        return result.rowcount
+
+
+class BudgetAlertRepository(CrudRepositoryORM[BudgetAlertEntity]):
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db, BudgetAlertEntity)
+
+    def find_by_user_id(self, user_id: int, after_id: int = 0) -> list[BudgetAlertEntity]:
+        stmt = (
+            select(BudgetAlertEntity)
+            .where(BudgetAlertEntity.user_id == user_id, BudgetAlertEntity.id > after_id)
+            .order_by(BudgetAlertEntity.id)
+        )
+        return self.sa.session.execute(stmt).scalars().all()
+
+
+class SchedulerLeaseRepository(CrudRepositoryORM[SchedulerLeaseEntity]):
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db, SchedulerLeaseEntity)
+
+    def try_acquire(
+            self,
+            name: str,
+            holder: str,
+            tick: datetime.datetime,
+            now: datetime.datetime,
+            expires_at: datetime.datetime) -> bool:
+        """Takes the lease for tick unless it was taken for this tick already or is held by a running worker.
+
+        The conditional UPDATE is atomic on the primary, of the workers firing for the same tick only one
+        changes the row. The lease row of a job is created by whichever worker gets there first.
+        """
+        table = SchedulerLeaseEntity.__table__
+        connection = self.sa.session.connection()
+        acquired = connection.execute(
+            update(table)
+            .where(table.c.name == name, table.c.tick < tick, table.c.expires_at <= now)
+            .values(holder=holder, tick=tick, expires_at=expires_at)
+        ).rowcount == 1
+
+        if not acquired and connection.execute(select(table.c.name).where(table.c.name == name)).first() is None:
+            try:
+                with self.sa.session.begin_nested():
+                    connection.execute(insert(table).values(name=name, holder=holder, tick=tick, expires_at=expires_at))
+                acquired = True
+            except IntegrityError:
+                pass
+        self._commit()
+        return acquired
+
+    def release(self, name: str, holder: str, now: datetime.datetime) -> None:
+        """Ends the lease early, the tick it was taken for stays taken."""
+        table = SchedulerLeaseEntity.__table__
+        self.sa.session.connection().execute(
+            update(table).where(table.c.name == name, table.c.holder == holder).values(expires_at=now)
+        )
+        self._commit()
+
+
+class RecurringRunRepository(CrudRepositoryORM[RecurringRunEntity]):
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db, RecurringRunEntity)
+
+
 user_repository = UserRepository(sa)
 transaction_repository = TransactionRepository(sa)
 income_repository = IncomeRepository(sa)
@@ -171,3 +842,7 @@ activation_token_repository = ActivationTokenRepository(sa)
 recurring_transaction_repository = RecurringTransactionRepository(sa)
 income_recurring_transaction_repository = IncomeRecurringTransactionRepository(sa)
 expense_recurring_transaction_repository = ExpenseRecurringTransactionRepository(sa)
+ledger_total_repository = LedgerTotalRepository(sa)
+budget_alert_repository = BudgetAlertRepository(sa)
+scheduler_lease_repository = SchedulerLeaseRepository(sa)
+recurring_run_repository = RecurringRunRepository(sa)
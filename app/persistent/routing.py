@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from typing import Any, Iterator
+import itertools
+import logging
+import time
+from flask import Flask, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, create_engine, Engine, Select, CompoundSelect
+from sqlalchemy.exc import OperationalError
+
+from app.config import DB_REPLICA_RETRY_SECONDS
+
+logging.basicConfig(level=logging.INFO)
+
+PRIMARY_HEADER = 'X-Read-From-Primary'
+
+_PRIMARY_KEY = 'use_primary'
+_WROTE_KEY = 'wrote_to_primary'
+
+_replica_counter = itertools.count()
+_replica_down_until: dict[Engine, float] = {}
+
+
+def configure_replicas(app: Flask, replica_urls: list[str]) -> None:
+    # Replicas are not Flask-SQLAlchemy binds, those would get their own metadata and create_all / migrations
+    app.extensions['db_replicas'] = [create_engine(url, pool_pre_ping=True) for url in replica_urls]
+
+
+def choose_replica(replicas: list[Engine]) -> Engine | None:
+    """Next healthy replica in round-robin order, or None when there is none to read from."""
+    if not replicas:
+        return None
+
+    now = time.monotonic()
+    start = next(_replica_counter)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if _replica_down_until.setdefault(replica, 0) <= now:
+            return replica
+    return None
+
+
+@event.listens_for(Engine, 'handle_error')
+def _mark_replica_down(context: Any) -> None:
+    # A replica that cannot be reached is skipped until DB_REPLICA_RETRY_SECONDS have passed
+    engine = context.engine
+    if engine in _replica_down_until and isinstance(context.sqlalchemy_exception, OperationalError):
+        logging.warning('Replica %s failed, skipping it for %ss', engine.url, DB_REPLICA_RETRY_SECONDS)
+        _replica_down_until[engine] = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to a replica bind and everything else to the primary.
+
+    Once the session has written, or when it is pinned with use_primary, it reads from the primary too, so a
+    request always sees its own writes.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, bind: Any = None, **kwargs: Any) -> Any:
+        primary = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or primary is not self._db.engines.get(None):
+            return primary
+
+        is_plain_read = isinstance(clause, (Select, CompoundSelect)) and getattr(clause, '_for_update_arg', None) is None
+        if self._flushing or not is_plain_read:
+            self.info[_WROTE_KEY] = True
+            return primary
+        if self.info.get(_PRIMARY_KEY) or self.info.get(_WROTE_KEY):
+            return primary
+
+        return choose_replica(current_app.extensions.get('db_replicas', [])) or primary
+
+
+def pin_primary(session: Session) -> None:
+    session.info[_PRIMARY_KEY] = True
+
+
+@contextmanager
+def use_primary(session: Session) -> Iterator[None]:
+    pinned = session.info.get(_PRIMARY_KEY, False)
+    session.info[_PRIMARY_KEY] = True
+    try:
+        yield
+    finally:
+        session.info[_PRIMARY_KEY] = pinned
@@ -0,0 +1,153 @@
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import (
+    inspect,
+    text,
+    Column,
+    Connection,
+    Engine,
+    ForeignKeyConstraint,
+    Integer,
+    PrimaryKeyConstraint
+)
+
+TRANSACTION_STORAGES = ('joined', 'single')
+
+# (child table, transaction type, category table) of the joined storage
+CHILD_TABLES = [
+    ('incomes', 'income', 'income_categories'),
+    ('expenses', 'expense', 'expense_categories'),
+]
+
+CATEGORY_FK_NAME = 'fk_transactions_category_id_categories'
+CATEGORY_INDEX_NAME = 'ix_transactions_category_id'
+
+
+def current_storage(connection: Connection) -> str | None:
+    """The storage the transactions of the database use, None while a conversion is unfinished."""
+    schema = inspect(connection)
+    has_child_tables = any(schema.has_table(child_table) for child_table, _, _ in CHILD_TABLES)
+    has_category_id = any(column['name'] == 'category_id' for column in schema.get_columns('transactions'))
+    if has_child_tables != has_category_id:
+        return 'joined' if has_child_tables else 'single'
+    return None
+
+
+def convert_storage(engine: Engine, storage: str, chunk_size: int) -> int:
+    """Converts the transactions of the database to storage and returns the number of rows copied.
+
+    The migrations describe the joined storage, a database that runs with TRANSACTION_STORAGE=single is
+    converted after flask db upgrade, and converted back before downgrading. Rows are copied in id chunks
+    that commit one by one, and every step checks what an interrupted conversion already did, so a failed
+    conversion can simply be run again.
+    """
+    with engine.connect() as connection:
+        if current_storage(connection) == storage:
+            raise ValueError(f'transactions already use {storage} storage')
+
+        sqlite = connection.dialect.name == 'sqlite'
+        if sqlite:
+            # SQLite rebuilds transactions to alter it, dropping the old table would cascade into the child tables
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        try:
+            operations = Operations(MigrationContext.configure(connection))
+            if storage == 'single':
+                return _convert_to_single(connection, operations, chunk_size)
+            return _convert_to_joined(connection, operations, chunk_size)
+        finally:
+            if sqlite:
+                connection.rollback()
+                connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+
+
+def _convert_to_single(connection: Connection, operations: Operations, chunk_size: int) -> int:
+    schema = inspect(connection)
+    if not any(column['name'] == 'category_id' for column in schema.get_columns('transactions')):
+        with operations.batch_alter_table('transactions') as batch_op:
+            batch_op.add_column(Column('category_id', Integer(), nullable=True))
+        connection.commit()
+
+    copied = _copy_in_chunks(
+        connection,
+        'UPDATE transactions SET category_id = '
+        '(SELECT c.category_id FROM {child_table} c WHERE c.id = transactions.id) '
+        'WHERE id BETWEEN :first_id AND :last_id AND type_ = :type_',
+        chunk_size
+    )
+
+    schema = inspect(connection)
+    with operations.batch_alter_table('transactions') as batch_op:
+        batch_op.alter_column('category_id', existing_type=Integer(), nullable=False)
+        if not any(index['name'] == CATEGORY_INDEX_NAME for index in schema.get_indexes('transactions')):
+            batch_op.create_index(CATEGORY_INDEX_NAME, ['category_id'], unique=False)
+        if not any(fk['name'] == CATEGORY_FK_NAME for fk in schema.get_foreign_keys('transactions')):
+            batch_op.create_foreign_key(CATEGORY_FK_NAME, 'categories', ['category_id'], ['id'], ondelete='CASCADE')
+    for child_table, _, _ in CHILD_TABLES:
+        if schema.has_table(child_table):
+            operations.drop_table(child_table)
+    connection.commit()
+    return copied
+
+
+def _convert_to_joined(connection: Connection, operations: Operations, chunk_size: int) -> int:
+    schema = inspect(connection)
+    # SQLite rebuilds the table for these, which must happen before incomes / expenses reference it again
+    has_fk = any(fk['name'] == CATEGORY_FK_NAME for fk in schema.get_foreign_keys('transactions'))
+    has_index = any(index['name'] == CATEGORY_INDEX_NAME for index in schema.get_indexes('transactions'))
+    if has_fk or has_index:
+        with operations.batch_alter_table('transactions') as batch_op:
+            if has_fk:
+                batch_op.drop_constraint(CATEGORY_FK_NAME, type_='foreignkey')
+            if has_index:
+                batch_op.drop_index(CATEGORY_INDEX_NAME)
+
+    for child_table, _, category_table in CHILD_TABLES:
+        if schema.has_table(child_table):
+            continue
+        operations.create_table(
+            child_table,
+            Column('id', Integer(), nullable=False),
+            Column('category_id', Integer(), nullable=False),
+            ForeignKeyConstraint(['category_id'], [f'{category_table}.id'], ondelete='CASCADE'),
+            ForeignKeyConstraint(['id'], ['transactions.id'], ondelete='CASCADE'),
+            PrimaryKeyConstraint('id')
+        )
+        operations.create_index(f'ix_{child_table}_category_id', child_table, ['category_id'], unique=False)
+    connection.commit()
+
+    # Rows an interrupted conversion already copied are skipped
+    copied = _copy_in_chunks(
+        connection,
+        'INSERT INTO {child_table} (id, category_id) '
+        'SELECT t.id, t.category_id FROM transactions t '
+        'WHERE t.id BETWEEN :first_id AND :last_id AND t.type_ = :type_ '
+        'AND NOT EXISTS (SELECT 1 FROM {child_table} c WHERE c.id = t.id)',
+        chunk_size
+    )
+
+    with operations.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_column('category_id')
+    connection.commit()
+    return copied
+
+
+def _copy_in_chunks(connection: Connection, statement: str, chunk_size: int) -> int:
+    # Every chunk commits on its own, so no transaction holds the locks of the whole table. Child tables an
+    # interrupted conversion to single storage already dropped had been copied before.
+    schema = inspect(connection)
+    child_tables = [(child_table, type_) for child_table, type_, _ in CHILD_TABLES if schema.has_table(child_table)]
+    first_id, last_id = connection.execute(text('SELECT MIN(id), MAX(id) FROM transactions')).one()
+    connection.commit()
+    if first_id is None:
+        return 0
+
+    copied = 0
+    for chunk_start in range(first_id, last_id + 1, chunk_size):
+        for child_table, type_ in child_tables:
+            copied += connection.execute(
+                text(statement.format(child_table=child_table)),
+                {'first_id': chunk_start, 'last_id': chunk_start + chunk_size - 1, 'type_': type_}
+            ).rowcount
+        connection.commit()
+    return copied
+
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from typing import Iterator
+from sqlalchemy.orm import Session
+
+from app.persistent.configuration import sa
+
+_DEPTH_KEY = 'unit_of_work_depth'
+
+
+def in_unit_of_work() -> bool:
+    return sa.session.info.get(_DEPTH_KEY, 0) > 0
+
+
+@contextmanager
+def unit_of_work() -> Iterator[Session]:
+    """Runs the block, or the decorated function, in one transaction that commits once at the end.
+
+    Repositories only flush while a unit of work is active. A nested unit of work is a savepoint, so its
+    failure rolls back its own changes and leaves the outer transaction usable once the error is handled.
+    """
+    session = sa.session
+    depth = session.info.get(_DEPTH_KEY, 0)
+    session.info[_DEPTH_KEY] = depth + 1
+    try:
+        if depth:
+            with session.begin_nested():
+                yield session
+            return
+
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+    finally:
+        session.info[_DEPTH_KEY] = depth
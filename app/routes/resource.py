@@ -1,8 +1,11 @@
 import flask_praetorian
 from flask_restful import Resource
-from flask import request, Response
+from flask import request, Response, stream_with_context
 from jsonschema import validate
+import json
+import datetime
 import logging
+from typing import Iterator
 
 from app.service.dto import (
     RegisterUserDto,
@@ -10,8 +13,11 @@ from app.service.dto import (
     CreateCategoryDto,
     CreateTransactionDto,
     CreateRecurringTransactionDto,
-
+    BookingPeriodDto,
+    PageRequestDto
 )
+from app.persistent.unit_of_work import unit_of_work
+from app.config import FORECAST_MAX_MONTHS
 from app.routes.schemas import (
     validate_name,
     user_creation_schema,
@@ -20,7 +26,8 @@ from app.routes.schemas import (
     amount_schema,
     percentage_schema,
     recurring_transction_update_schema,
-    recurring_transaction_creation_schema
+    recurring_transaction_creation_schema,
+    budget_what_if_schema
 )
 from app.service.configuration import (
     user_service,
@@ -28,13 +35,22 @@ from app.service.configuration import (
     category_service,
     transaction_service,
     budget_planning_service,
-    recurring_transaction_service
+    budget_analytics_service,
+    recurring_transaction_service,
+    recurring_scheduler_service,
+    cash_flow_forecast_service,
+    budget_alert_service
 )
 
 logging.basicConfig(level=logging.INFO)
 
 
-class RegisterUserResource(Resource):
+class TransactionalResource(Resource):
+    # Every request runs in one unit of work, committed once after the handler returns
+    method_decorators = [unit_of_work()]
+
+
+class RegisterUserResource(TransactionalResource):
 
     def post(self) -> Response:
         json_body = request.json
@@ -43,14 +59,21 @@ class RegisterUserResource(Resource):
         return user_security_service.register_user(register_user_dto)
 
 
-class ActivationUserResource(Resource):
+class ActivationUserResource(TransactionalResource):
 
     def post(self) -> Response:
         token = request.json['token']
         return user_security_service.activate_user(token)
 
 
-class CreateUserResource(Resource):
+class CreateUserResource(TransactionalResource):
+    # @flask_praetorian.roles_required('admin')
+    def get(self) -> Response:
+        try:
+            page_request = PageRequestDto.from_args(request.args)
+        except ValueError as err:
+            return {'message': str(err)}, 400
+        return user_service.get_users_page(page_request)
 
     def post(self) -> Response:
         json_body = request.json
@@ -60,26 +83,52 @@ class CreateUserResource(Resource):
         return user_service.add_user(user_dto)
 
 
-class UserIdResource(Resource):
+class UserIdResource(TransactionalResource):
     # @flask_praetorian.auth_required
     def get(self, user_id: int) -> Response:
         return user_service.get_by_id(user_id)
 
 
-class UserIdTotalIncomeResource(Resource):
+class UserIdForecastResource(TransactionalResource):
+    # @flask_praetorian.auth_required
+    def get(self, user_id: int) -> Response:
+        try:
+            until = datetime.datetime.strptime(request.args.get('until', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return {'message': 'Invalid forecast end date'}, 400
+        today = datetime.date.today()
+        if until < today:
+            return {'message': 'Forecast end cannot be in the past'}, 400
+        if (until.year - today.year) * 12 + until.month - today.month > FORECAST_MAX_MONTHS:
+            return {'message': f'Forecast cannot reach more than {FORECAST_MAX_MONTHS} months ahead'}, 400
+        return cash_flow_forecast_service.generate_forecast_for_user(user_id, until)
+
+
+class UserIdAlertsResource(TransactionalResource):
     # @flask_praetorian.auth_required
     def get(self, user_id: int) -> Response:
-        return user_service.get_total_income(user_id)
+        after_id = request.args.get('after', 0, type=int)
+        return budget_alert_service.get_alerts_for_user(user_id, after_id)
 
 
-class CategoryIdResource(Resource):
+class UserIdTotalIncomeResource(TransactionalResource):
+    # @flask_praetorian.auth_required
+    def get(self, user_id: int) -> Response:
+        try:
+            booking_period = BookingPeriodDto.from_args(request.args)
+        except ValueError:
+            return {'message': 'Invalid booking period'}, 400
+        return user_service.get_total_income(user_id, booking_period.date_from, booking_period.date_to)
+
+
+class CategoryIdResource(TransactionalResource):
 
     # @flask_praetorian.auth_required
     def get(self, category_id: int) -> Response:
         return category_service.get_by_id(category_id)
 
 
-class CategoryNameResource(Resource):
+class CategoryNameResource(TransactionalResource):
     # @flask_praetorian.auth_required
     def get(self, category_name: str) -> Response:
         return category_service.get_by_name(category_name)
@@ -106,11 +155,11 @@ class CategoryNameResource(Resource):
 
     # @flask_praetorian.roles_required('admin')
     def delete(self, category_name: str) -> Response:
-        category_service.delete_by_name(category_name)
-        return {'message': 'Category deleted'}, 200
+        deleted_counts = category_service.delete_by_name(category_name)
+        return {'message': 'Category deleted', 'deleted': deleted_counts}, 200
 
 
-class ChangeExpenseCategoryPercentageResource(Resource):
+class ChangeExpenseCategoryPercentageResource(TransactionalResource):
     # @flask_praetorian.roles_required('admin')
     def patch(self, category_id: int):
         json_body = request.json
@@ -120,7 +169,15 @@ class ChangeExpenseCategoryPercentageResource(Resource):
         return category_service.update_expense_percentage(category_id, new_percentage)
 
 
-class CreateTransactionResource(Resource):
+class CreateTransactionResource(TransactionalResource):
+    # @flask_praetorian.roles_required('admin')
+    def get(self) -> Response:
+        try:
+            page_request = PageRequestDto.from_args(request.args)
+        except ValueError as err:
+            return {'message': str(err)}, 400
+        return transaction_service.get_transactions_page(page_request)
+
     # @flask_praetorian.auth_required
     def post(self) -> Response:
         json_body = request.json
@@ -130,7 +187,7 @@ class CreateTransactionResource(Resource):
         return transaction_service.add_transaction(transaction_dto)
 
 
-class TransactionIdResource(Resource):
+class TransactionIdResource(TransactionalResource):
     # @flask_praetorian.auth_required
     def get(self, transaction_id: int) -> Response:
         return transaction_service.get_by_id(transaction_id)
@@ -144,13 +201,21 @@ class TransactionIdResource(Resource):
         return transaction_service.update_transaction_amount(transaction_id, new_amount)
 
 
-class TransactionListByCategoryResource(Resource):
+class TransactionListByCategoryResource(TransactionalResource):
     # @flask_praetorian.roles_required('admin')
     def get(self, category_name: str) -> Response:
-        return transaction_service.get_all_transactions_for_category(category_name)
+        # Without paging arguments the whole category is returned as a plain list, as before
+        if 'limit' not in request.args and 'cursor' not in request.args:
+            return transaction_service.get_all_transactions_for_category(category_name)
+
+        try:
+            page_request = PageRequestDto.from_args(request.args)
+        except ValueError as err:
+            return {'message': str(err)}, 400
+        return transaction_service.get_transactions_for_category_page(category_name, page_request)
 
 
-class TransactionsFilterResource(Resource):
+class TransactionsFilterResource(TransactionalResource):
     # @flask_praetorian.roles_required('admin')
     def get(self) -> Response:
         amount = int(request.args.get('amount'))
@@ -163,19 +228,65 @@ class TransactionsFilterResource(Resource):
         return transaction_service.get_transactions_higher_than(amount, transaction_type)
 
 
-class BudgetSummaryResource(Resource):
+class BudgetSummaryResource(TransactionalResource):
     # @flask_praetorian.auth_required
     def get(self, user_id: int) -> Response:
-        return budget_planning_service.generate_budget_entries_for_user(user_id)
+        try:
+            booking_period = BookingPeriodDto.from_args(request.args)
+        except ValueError:
+            return {'message': 'Invalid booking period'}, 400
+        return budget_planning_service.generate_budget_entries_for_user(
+            user_id,
+            booking_period.date_from,
+            booking_period.date_to
+        )
+
+
+class BudgetSummaryCacheResource(TransactionalResource):
+    # @flask_praetorian.roles_required('admin')
+    def get(self) -> Response:
+        return budget_planning_service.budget_cache.stats()
+
+    # @flask_praetorian.roles_required('admin')
+    def delete(self) -> Response:
+        budget_planning_service.budget_cache.clear()
+        return {'message': 'Budget summary cache cleared'}, 200
 
 
-class BudgetListSummaryResource(Resource):
+class BudgetListSummaryResource(TransactionalResource):
+    NDJSON_MIMETYPE = 'application/x-ndjson'
+
     # @flask_praetorian.roles_required('admin')
     def get(self) -> Response:
+        if request.accept_mimetypes.best_match(['application/json', self.NDJSON_MIMETYPE]) == self.NDJSON_MIMETYPE:
+            budget_entries = budget_planning_service.stream_budget_entries_for_all_users()
+            return Response(stream_with_context(self._ndjson_lines(budget_entries)), mimetype=self.NDJSON_MIMETYPE)
+
+        if request.args.get('engine') == 'columnar':
+            return budget_analytics_service.generate_budget_entries_for_all_users()
+
         return budget_planning_service.generate_budget_entries_for_all_users()
 
+    @staticmethod
+    def _ndjson_lines(budget_entries: Iterator[tuple[str, list]]) -> Iterator[str]:
+        # The unit of work around get has committed before the response streams, the batches after the first
+        # one are read in a unit of work of their own
+        with unit_of_work():
+            for entry in budget_entries:
+                yield json.dumps(entry) + '\n'
 
-class CreateRecurringTransactionResource(Resource):
+
+class BudgetWhatIfResource(TransactionalResource):
+    # @flask_praetorian.roles_required('admin')
+    def post(self) -> Response:
+        json_body = request.json
+        validate(json_body, schema=budget_what_if_schema)
+        percentages = {int(category_id): p for category_id, p in json_body['percentages'].items()}
+
+        return budget_analytics_service.generate_budget_entries_for_all_users(percentages)
+
+
+class CreateRecurringTransactionResource(TransactionalResource):
     # @flask_praetorian.auth_required
     def post(self) -> Response:
         json_body = request.json
@@ -184,7 +295,7 @@ class CreateRecurringTransactionResource(Resource):
         return recurring_transaction_service.add_recurring_transaction(recurring_transaction_dto)
 
 
-class RecurringTransactionIdResource(Resource):
+class RecurringTransactionIdResource(TransactionalResource):
 
     # @flask_praetorian.auth_required
     def get(self, transaction_id: int) -> Response:
@@ -199,13 +310,53 @@ class RecurringTransactionIdResource(Resource):
         validate(json_body, schema=recurring_transction_update_schema)
         return recurring_transaction_service.update_recurring_transaction(transaction_id, **json_body)
 
+    # @flask_praetorian.auth_required
+    def delete(self, transaction_id: int) -> Response:
+        recurring_transaction_service.delete_recurring_transaction(transaction_id)
+        return {'message': 'Recurring transaction deleted'}, 200
+
 
 class ProcessRecurringTransactionsResource(Resource):
+    # Not a single unit of work, the service commits one transaction per chunk of schedules
+
+    # @flask_praetorian.roles_required('admin')
+    def get(self) -> Response:
+        try:
+            page_request = PageRequestDto.from_args(request.args)
+        except ValueError as err:
+            return {'message': str(err)}, 400
+        return recurring_transaction_service.get_page(page_request)
 
     # @flask_praetorian.roles_required('admin')
     def post(self) -> Response:
-        recurring_transactions = recurring_transaction_service.process_recurring_transactions()
-        if not recurring_transactions:
-            return {'message': 'No recurring transactions to process'}, 200
+        result = recurring_transaction_service.process_recurring_transactions(with_schedules=True)
+        # The body stays the list of processed schedules, the booked transactions are counted in headers
+        headers = {'X-Transactions-Posted': result['posted'], 'X-Transactions-Caught-Up': result['caught_up']}
+        if not result['schedules']:
+            return {'message': 'No recurring transactions to process'}, 200, headers
 
-        return recurring_transactions
+        return result['schedules'], 200, headers
+
+
+class RecurringRunsResource(TransactionalResource):
+    # @flask_praetorian.roles_required('admin')
+    def get(self) -> Response:
+        try:
+            page_request = PageRequestDto.from_args(request.args)
+        except ValueError as err:
+            return {'message': str(err)}, 400
+        return recurring_scheduler_service.get_runs_page(page_request)
+
+
+class RecurringDueIndexResource(TransactionalResource):
+    # Like the budget summary cache the index is per worker, these reach the worker serving the request
+
+    # @flask_praetorian.roles_required('admin')
+    def get(self) -> Response:
+        return recurring_transaction_service.due_index.stats()
+
+    # @flask_praetorian.roles_required('admin')
+    def post(self) -> Response:
+        if not recurring_transaction_service.due_index.enabled:
+            return {'message': 'Recurring due index is disabled'}, 400
+        return recurring_transaction_service.resync_due_index()
@@ -90,3 +90,17 @@ recurring_transction_update_schema = {
         "next_due_date": {"type": "string", "format": "date", "pattern": r'^\d{4}-\d{2}-\d{2}$'},
     }
 }
+
+budget_what_if_schema = {
+    "type": "object",
+    "properties": {
+        "percentages": {
+            "type": "object",
+            "patternProperties": {
+                r'^\d+$': {"type": "integer", "minimum": 0, "maximum": 100}
+            },
+            "additionalProperties": False
+        }
+    },
+    "required": ["percentages"]
+}
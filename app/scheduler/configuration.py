@@ -0,0 +1,70 @@
+import datetime
+import logging
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from flask import Flask
+from flask_apscheduler import APScheduler
+
+from app.config import (
+    RECURRING_SCHEDULER_ENABLED,
+    RECURRING_SCHEDULER_CRON,
+    RECURRING_DUE_INDEX_ENABLED,
+    RECURRING_DUE_INDEX_TICK_SECONDS
+)
+from app.persistent.configuration import sa
+from app.persistent.routing import pin_primary
+from app.service.configuration import recurring_scheduler_service, recurring_transaction_service
+
+logging.basicConfig(level=logging.INFO)
+
+
+def process_recurring_transactions(app: Flask) -> None:
+    # Jobs run on a scheduler thread, with a session of their own that never reads from a replica
+    with app.app_context():
+        pin_primary(sa.session)
+        try:
+            recurring_scheduler_service.run_tick()
+        finally:
+            sa.session.remove()
+
+
+def process_indexed_due_transactions(app: Flask) -> None:
+    # No lease, every worker books what its own due index holds and claims keep overlapping ones apart
+    with app.app_context():
+        pin_primary(sa.session)
+        try:
+            recurring_transaction_service.process_indexed_due_transactions()
+        finally:
+            sa.session.remove()
+
+
+def configure_scheduler(app: Flask) -> APScheduler | None:
+    if not (RECURRING_SCHEDULER_ENABLED or RECURRING_DUE_INDEX_ENABLED):
+        return None
+
+    scheduler = APScheduler()
+    scheduler.init_app(app)
+    if RECURRING_SCHEDULER_ENABLED:
+        scheduler.add_job(
+            id='process_recurring_transactions',
+            func=process_recurring_transactions,
+            args=[app],
+            trigger=CronTrigger.from_crontab(RECURRING_SCHEDULER_CRON),
+            max_instances=1,
+            coalesce=True
+        )
+        logging.info('Recurring transactions are processed on %s', RECURRING_SCHEDULER_CRON)
+    if RECURRING_DUE_INDEX_ENABLED:
+        # The first tick loads the index, right after startup
+        scheduler.add_job(
+            id='process_indexed_due_transactions',
+            func=process_indexed_due_transactions,
+            args=[app],
+            trigger=IntervalTrigger(seconds=RECURRING_DUE_INDEX_TICK_SECONDS),
+            next_run_time=datetime.datetime.now(),
+            max_instances=1,
+            coalesce=True
+        )
+        logging.info('Due recurring transactions are booked every %ss', RECURRING_DUE_INDEX_TICK_SECONDS)
+    scheduler.start()
+    return scheduler
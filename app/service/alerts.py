@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Any
+from werkzeug.exceptions import NotFound
+from app.persistent.repository import UserRepository, BudgetAlertRepository
+
+
+@dataclass
+class BudgetAlertService:
+    user_repository: UserRepository
+    budget_alert_repository: BudgetAlertRepository
+
+    def get_alerts_for_user(self, user_id: int, after_id: int = 0) -> list[dict[str, Any]]:
+        if not self.user_repository.find_by_id(user_id):
+            raise NotFound('User not found')
+
+        return [alert.to_dict() for alert in self.budget_alert_repository.find_by_user_id(user_id, after_id)]
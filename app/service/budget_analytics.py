@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any
+import numpy as np
+from flask import g, has_app_context
+from werkzeug.exceptions import NotFound
+
+from app.persistent.repository import (
+    UserRepository,
+    TransactionRepository,
+    ExpenseCategoryRepository
+)
+from app.service.dto import CreateCategorizedBudgetEntryDto
+from app.config import BUDGET_ANALYTICS_BATCH_SIZE
+
+
+@dataclass
+class LedgerSnapshot:
+    user_labels: list[str]
+    category_ids: np.ndarray
+    category_names: list[str]
+    percentages: np.ndarray
+    incomes: np.ndarray
+    expenses: np.ndarray
+    expense_counts: np.ndarray
+
+
+def _positions(ids: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Positions of values in the sorted ids, and whether each value is one of the ids at all."""
+    positions = np.searchsorted(ids, values)
+    if not len(ids):
+        return positions, np.zeros(len(values), dtype=bool)
+    return positions, ids[np.minimum(positions, len(ids) - 1)] == values
+
+
+@dataclass
+class BudgetAnalyticsService:
+    """Columnar budget engine: whole-ledger aggregates in NumPy arrays, for admin-wide and what-if reports"""
+    user_repository: UserRepository
+    transaction_repository: TransactionRepository
+    expense_category_repository: ExpenseCategoryRepository
+
+    def load_snapshot(self, batch_size: int = BUDGET_ANALYTICS_BATCH_SIZE) -> LedgerSnapshot:
+        users = self.user_repository.find_all_names()
+        categories = self.expense_category_repository.find_names_and_percentages()
+        user_ids = np.array([user_id for user_id, _ in users], dtype=np.int64)
+        category_ids = np.array([category_id for category_id, _, _ in categories], dtype=np.int64)
+
+        users_count, categories_count = len(user_ids), len(category_ids)
+        incomes = np.zeros(users_count, dtype=np.int64)
+        expenses = np.zeros(users_count * categories_count, dtype=np.int64)
+        expense_counts = np.zeros(users_count * categories_count, dtype=np.int64)
+
+        # Partitions are folded into the totals as they arrive, so memory does not grow with the ledger
+        for partition in self.transaction_repository.stream_ledger_columns(batch_size):
+            columns = np.fromiter(chain.from_iterable(partition), dtype=np.int64, count=4 * len(partition)).reshape(-1, 4)
+            # Rows of users or categories created after their ids were read are left out, searchsorted alone
+            # would count them for the neighbouring id
+            user_positions, is_known_user = _positions(user_ids, columns[:, 0])
+            category_positions, is_known_category = _positions(category_ids, columns[:, 1])
+            is_income = (columns[:, 2] == 1) & is_known_user
+
+            incomes += np.rint(np.bincount(
+                user_positions[is_income],
+                weights=columns[is_income, 3],
+                minlength=users_count
+            )).astype(np.int64)
+
+            is_expense = (columns[:, 2] == 0) & is_known_user & is_known_category
+            cells = user_positions[is_expense] * categories_count + category_positions[is_expense]
+            expenses += np.rint(np.bincount(
+                cells,
+                weights=columns[is_expense, 3],
+                minlength=users_count * categories_count
+            )).astype(np.int64)
+            expense_counts += np.bincount(cells, minlength=users_count * categories_count)
+
+        return LedgerSnapshot(
+            user_labels=[f'{user_id}.{name}' for user_id, name in users],
+            category_ids=category_ids,
+            category_names=[name for _, name, _ in categories],
+            percentages=np.array([percentage for _, _, percentage in categories], dtype=np.int64),
+            incomes=incomes,
+            expenses=expenses.reshape(users_count, categories_count),
+            expense_counts=expense_counts.reshape(users_count, categories_count),
+        )
+
+    def get_snapshot(self) -> LedgerSnapshot:
+        # One snapshot per app context, so several reports in a request share a single ledger scan
+        if not has_app_context():
+            return self.load_snapshot()
+
+        if 'ledger_snapshot' not in g:
+            g.ledger_snapshot = self.load_snapshot()
+        return g.ledger_snapshot
+
+    def generate_budget_entries_for_all_users(self, percentages: dict[int, int] | None = None) -> \
+            list[tuple[str, list[dict[str, Any]]]]:
+        snapshot = self.get_snapshot()
+        if not snapshot.user_labels:
+            raise NotFound('No users found')
+
+        category_percentages = snapshot.percentages.copy()
+        for category_id, percentage in (percentages or {}).items():
+            position = np.searchsorted(snapshot.category_ids, category_id)
+            if position == len(snapshot.category_ids) or snapshot.category_ids[position] != category_id:
+                raise NotFound('Category not found')
+            category_percentages[position] = percentage
+
+        user_positions, category_positions = np.nonzero(snapshot.expense_counts)
+        planned = snapshot.incomes[user_positions] * category_percentages[category_positions] / 100
+        actual = snapshot.expenses[user_positions, category_positions]
+
+        budget_entries = [[] for _ in snapshot.user_labels]
+        for user_position, category_position, planned_amount, actual_amount in zip(
+                user_positions.tolist(), category_positions.tolist(), planned.tolist(), actual.tolist()):
+            budget_entries[user_position].append(CreateCategorizedBudgetEntryDto(
+                snapshot.category_names[category_position],
+                planned_amount,
+                actual_amount
+            ).to_dict())
+
+        return list(zip(snapshot.user_labels, budget_entries))
@@ -1,44 +1,117 @@
-from dataclasses import dataclass
+from collections import defaultdict
+import datetime
+from dataclasses import dataclass, field
 from werkzeug.exceptions import NotFound
-from typing import Any
+from typing import Any, Iterator
 from app.persistent.repository import (
     TransactionRepository,
     UserRepository,
     CategoryRepository,
 )
 from app.service.dto import CreateCategorizedBudgetEntryDto
+from app.service.cache import VersionedCache
+from app.service.parallel import map_shards, split_id_range
+from app.config import (
+    BUDGET_REPORT_BATCH_SIZE,
+    BUDGET_REPORT_WORKERS,
+    BUDGET_REPORT_EXECUTOR,
+    BUDGET_REPORT_SHARD_SIZE
+)
 
 
 @dataclass
 class BudgetPlanningService:
     user_repository: UserRepository
     category_repository: CategoryRepository
+    budget_cache: VersionedCache = field(default_factory=lambda: VersionedCache(enabled=False))
 
-    def _calculate_actual_spending_for_category(self, user_id: int, category_id: int) -> int:
-        category = self.category_repository.find_by_id(category_id)
-        return self.user_repository.calculate_total_expenses(user_id, category.id)
-
-    def _calculate_planned_spending_for_user_by_category(self, user_id: int, category_id: int) -> float:
-        category = self.category_repository.find_by_id(category_id)
-        user_income = self.user_repository.calculate_total_income(user_id)
-        return user_income * category.percentage / 100
+    @staticmethod
+    def _build_single_budget_entry(user_income: int, category_name: str, percentage: int, actual: int) -> dict[str, Any]:
+        planned = user_income * percentage / 100
+        return CreateCategorizedBudgetEntryDto(category_name, planned, actual).to_dict()
 
-    def _build_single_budget_entry(self, user_id: int, category_id: int) -> dict[str, Any]:
-        planned = self._calculate_planned_spending_for_user_by_category(user_id, category_id)
-        actual = self._calculate_actual_spending_for_category(user_id, category_id)
-        category = self.category_repository.find_by_id(category_id)
-        return CreateCategorizedBudgetEntryDto(category.name, planned, actual).to_dict()
+    def _calculate_budget_entries_for_user(
+            self,
+            user_id: int,
+            date_from: datetime.date | None = None,
+            date_to: datetime.date | None = None) -> list[dict[str, Any]]:
+        user_income = self.user_repository.calculate_total_income(user_id, date_from, date_to)
+        expenses_by_category = self.user_repository.calculate_expenses_by_category(user_id, date_from, date_to)
+        return [
+            self._build_single_budget_entry(user_income, name, percentage, actual)
+            for name, percentage, actual in expenses_by_category
+        ]
 
-    def generate_budget_entries_for_user(self, user_id: int):
-        user = self.user_repository.find_by_id(user_id)
-        if not user:
+    def generate_budget_entries_for_user(
+            self,
+            user_id: int,
+            date_from: datetime.date | None = None,
+            date_to: datetime.date | None = None):
+        ledger_version = self.user_repository.find_ledger_version(user_id)
+        if ledger_version is None:
             raise NotFound('User not found')
 
-        expense_categories_idx = self.user_repository.get_expense_categories_idx(user_id)
-        return [self._build_single_budget_entry(user_id, e) for e in expense_categories_idx]
+        cache_key = (user_id, date_from, date_to)
+        budget_entries = self.budget_cache.get(cache_key, ledger_version)
+        if budget_entries is None:
+            budget_entries = self._calculate_budget_entries_for_user(user_id, date_from, date_to)
+            self.budget_cache.put(cache_key, ledger_version, budget_entries)
+        return budget_entries
+
+    def _generate_budget_entries_for_users(self, users: list[tuple[int, str]]) -> Iterator[tuple[str, list]]:
+        user_ids = [user_id for user_id, _ in users]
+        incomes = self.user_repository.calculate_total_incomes_for_users(user_ids)
+
+        entries = defaultdict(list)
+        for user_id, name, percentage, actual in self.user_repository.calculate_expenses_by_category_for_users(user_ids):
+            entries[user_id].append(self._build_single_budget_entry(incomes.get(user_id, 0), name, percentage, actual))
+
+        for user_id, user_name in users:
+            yield f'{user_id}.{user_name}', entries[user_id]
+
+    def _stream_budget_entries(
+            self,
+            users: list[tuple[int, str]],
+            batch_size: int,
+            until_id: int | None = None) -> Iterator[tuple[str, list]]:
+        while users:
+            yield from self._generate_budget_entries_for_users(users)
+            users = self.user_repository.find_names_page(users[-1][0], batch_size, until_id)
 
-    def generate_budget_entries_for_all_users(self):
-        all_users = [u for u in self.user_repository.find_all()]
-        if not all_users:
+    def stream_budget_entries_for_all_users(self, batch_size: int = BUDGET_REPORT_BATCH_SIZE) -> \
+            Iterator[tuple[str, list]]:
+        first_users = self.user_repository.find_names_page(0, batch_size)
+        if not first_users:
             raise NotFound('No users found')
-        return [(f'{u.id}.{u.name}', self.generate_budget_entries_for_user(u.id)) for u in all_users]
+        return self._stream_budget_entries(first_users, batch_size)
+
+    def _generate_budget_entries_for_shard(
+            self,
+            first_user_id: int,
+            last_user_id: int,
+            batch_size: int) -> list[tuple[str, list]]:
+        first_users = self.user_repository.find_names_page(first_user_id - 1, batch_size, last_user_id)
+        return list(self._stream_budget_entries(first_users, batch_size, last_user_id))
+
+    def generate_budget_entries_for_all_users_in_parallel(
+            self,
+            workers: int,
+            executor: str = BUDGET_REPORT_EXECUTOR,
+            shard_size: int = BUDGET_REPORT_SHARD_SIZE,
+            batch_size: int = BUDGET_REPORT_BATCH_SIZE) -> list[tuple[str, list]]:
+        shards = [(first_id, last_id, batch_size) for first_id, last_id in
+                  split_id_range(self.user_repository.find_id_range(), shard_size)]
+        if not shards:
+            raise NotFound('No users found')
+
+        # Shards come back in submission order, so the merged report is ordered by user id
+        shard_entries = map_shards(self._generate_budget_entries_for_shard, shards, workers, executor)
+        return [entry for entries in shard_entries for entry in entries]
+
+    def generate_budget_entries_for_all_users(
+            self,
+            batch_size: int = BUDGET_REPORT_BATCH_SIZE,
+            workers: int = BUDGET_REPORT_WORKERS):
+        if workers > 1:
+            return self.generate_budget_entries_for_all_users_in_parallel(workers, batch_size=batch_size)
+        return list(self.stream_budget_entries_for_all_users(batch_size))
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class VersionedCache:
+    """LRU cache with TTL whose entries are only valid for the version they were stored with"""
+    enabled: bool = True
+    max_size: int = 1024
+    ttl_seconds: float = 300
+    clock: Callable[[], float] = time.monotonic
+    hits: int = 0
+    misses: int = 0
+    _entries: OrderedDict = field(default_factory=OrderedDict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Worker processes get an empty cache with the same settings
+        return {'enabled': self.enabled, 'max_size': self.max_size, 'ttl_seconds': self.ttl_seconds}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def get(self, key: Any, version: int) -> Any | None:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or entry[1] < self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Any, version: int, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (version, self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
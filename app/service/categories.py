@@ -63,11 +63,11 @@ class CategoryService:
 
         return CategoryDto.from_category_entity(category).to_dict()
 
-    def delete_by_name(self, name: str) -> None:
+    def delete_by_name(self, name: str) -> dict[str, int]:
         if not self.category_repository.find_by_name(name):
             raise NotFound('Category not found')
 
-        self.category_repository.delete_by_name(name)
+        return self.category_repository.delete_by_name(name)
 
     def update_expense_percentage(self, category_id: int, new_percentage: int) -> dict[str, Any]:
         category = self.expense_category_repository.find_by_id(category_id)
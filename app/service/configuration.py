@@ -2,7 +2,20 @@ from app.service.users import UserService, UserSecurityService
 from app.service.categories import CategoryService
 from app.service.transactions import TransactionService
 from app.service.budget_planning import BudgetPlanningService
+from app.service.budget_analytics import BudgetAnalyticsService
 from app.service.recurring_transactions import RecurringTransactionsService
+from app.service.recurring_scheduler import RecurringSchedulerService
+from app.service.ledger import LedgerService
+from app.service.forecast import CashFlowForecastService
+from app.service.alerts import BudgetAlertService
+from app.service.cache import VersionedCache
+from app.service.due_index import DueDateIndex
+from app.config import (
+    BUDGET_CACHE_ENABLED,
+    BUDGET_CACHE_MAX_SIZE,
+    BUDGET_CACHE_TTL_SECONDS,
+    RECURRING_DUE_INDEX_ENABLED
+)
 from app.persistent.repository import (
     user_repository,
     activation_token_repository,
@@ -15,6 +28,10 @@ from app.persistent.repository import (
     income_recurring_transaction_repository,
     expense_recurring_transaction_repository,
     recurring_transaction_repository,
+    ledger_total_repository,
+    budget_alert_repository,
+    scheduler_lease_repository,
+    recurring_run_repository,
 )
 
 user_service = UserService(user_repository)
@@ -29,7 +46,13 @@ transaction_service = TransactionService(
 )
 budget_planning_service = BudgetPlanningService(
     user_repository,
-    category_repository
+    category_repository,
+    VersionedCache(BUDGET_CACHE_ENABLED, BUDGET_CACHE_MAX_SIZE, BUDGET_CACHE_TTL_SECONDS)
+)
+budget_analytics_service = BudgetAnalyticsService(
+    user_repository,
+    transaction_repository,
+    expense_category_repository
 )
 
 recurring_transaction_service = RecurringTransactionsService(
@@ -39,5 +62,16 @@ recurring_transaction_service = RecurringTransactionsService(
     category_repository,
     income_repository,
     expense_repository,
-    recurring_transaction_repository
+    recurring_transaction_repository,
+    DueDateIndex(RECURRING_DUE_INDEX_ENABLED)
+)
+recurring_scheduler_service = RecurringSchedulerService(
+    recurring_transaction_service,
+    scheduler_lease_repository,
+    recurring_run_repository
 )
+
+cash_flow_forecast_service = CashFlowForecastService(user_repository, recurring_transaction_repository)
+budget_alert_service = BudgetAlertService(user_repository, budget_alert_repository)
+
+ledger_service = LedgerService(user_repository, ledger_total_repository)
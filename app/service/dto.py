@@ -1,10 +1,15 @@
 import logging
-from dataclasses import dataclass
-from typing import Self, Any
+from dataclasses import dataclass, field
+from typing import Self, Any, Callable
 from app.persistent.entity import UserEntity, TransactionEntity, CategoryEntity, ExpenseCategoryEntity, \
     RecurringTransactionEntity
 from app.persistent.entity import Frequency
+from app.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+import base64
+import binascii
+import calendar
 import datetime
+import json
 
 # tutaj rejestrue uzytkownika ktory chce byc admine. Ale nigdy nie bedziemy podawac
 # roli jawnie. ale dla nas bedzie latwo tworzyc uzytkownikow z roznymi rolami.
@@ -123,6 +128,7 @@ class TransactionDto:
     user_id: int
     category_id: int
     type_: str
+    booked_at: datetime.date = None
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -131,6 +137,7 @@ class TransactionDto:
             'user_id': self.user_id,
             'category_id': self.category_id,
             'type': self.type_,
+            'booked_at': self.booked_at.strftime('%Y-%m-%d') if self.booked_at else None,
         }
 
     @classmethod
@@ -140,10 +147,94 @@ class TransactionDto:
             amount=int(transaction_entity.amount),
             user_id=transaction_entity.user_id,
             category_id=transaction_entity.category_id,
-            type_=transaction_entity.type_
+            type_=transaction_entity.type_,
+            booked_at=transaction_entity.booked_at
         )
 
 
+@dataclass
+class BookingPeriodDto:
+    date_from: datetime.date = None
+    date_to: datetime.date = None
+
+    @staticmethod
+    def _parse_date(value: str | None) -> datetime.date | None:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+    @classmethod
+    def from_args(cls, args: dict[str, str]) -> Self:
+        period = args.get('period')
+        if period:
+            first_day = datetime.datetime.strptime(period, '%Y-%m').date()
+            last_day = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1])
+            return cls(date_from=first_day, date_to=last_day)
+
+        booking_period = cls(date_from=cls._parse_date(args.get('from')), date_to=cls._parse_date(args.get('to')))
+        if booking_period.date_from and booking_period.date_to and booking_period.date_from > booking_period.date_to:
+            raise ValueError('Start of period cannot be after its end')
+        return booking_period
+
+
+@dataclass
+class PageRequestDto:
+    limit: int = PAGE_SIZE_DEFAULT
+    after_id: int = None
+    order: str = 'asc'
+
+    @staticmethod
+    def encode_cursor(after_id: int, order: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps({'after_id': after_id, 'order': order}).encode()).decode()
+
+    @classmethod
+    def from_args(cls, args: dict[str, str]) -> Self:
+        limit = args.get('limit', str(PAGE_SIZE_DEFAULT))
+        if not limit.isdigit() or not 0 < int(limit) <= PAGE_SIZE_MAX:
+            raise ValueError(f'Limit must be between 1 and {PAGE_SIZE_MAX}')
+        limit = int(limit)
+
+        cursor = args.get('cursor')
+        if not cursor:
+            order = args.get('order', 'asc')
+            if order not in ('asc', 'desc'):
+                raise ValueError('Order must be asc or desc')
+            return cls(limit=limit, order=order)
+
+        # The cursor carries the order of the first page, so following pages cannot change it
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            after_id, order = int(position['after_id']), position['order']
+        except (binascii.Error, ValueError, KeyError, TypeError) as err:
+            raise ValueError('Invalid cursor') from err
+        if order not in ('asc', 'desc'):
+            raise ValueError('Invalid cursor')
+        return cls(limit=limit, after_id=after_id, order=order)
+
+
+@dataclass
+class PageDto:
+    items: list[dict[str, Any]] = field(default_factory=list)
+    next_cursor: str = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'items': self.items,
+            'next_cursor': self.next_cursor,
+        }
+
+    @classmethod
+    def from_entities(
+            cls,
+            entities: list[Any],
+            page_request: PageRequestDto,
+            to_dict: Callable[[Any], dict[str, Any]]) -> Self:
+        """Builds a page from up to limit + 1 entities, the extra one only tells that a next page exists."""
+        page = entities[:page_request.limit]
+        next_cursor = None
+        if len(entities) > page_request.limit:
+            next_cursor = PageRequestDto.encode_cursor(page[-1].id, page_request.order)
+        return cls([to_dict(e) for e in page], next_cursor)
+
+
 @dataclass
 class RecurringTransactionDto:
     id: int
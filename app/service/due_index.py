@@ -0,0 +1,126 @@
+import datetime
+import heapq
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+
+@dataclass
+class DueDateIndex:
+    """Timing wheel of recurring schedule ids with one slot per next_due_date, kept per worker.
+
+    A heap holds the dates of the slots, so popping the due schedules costs O(due + due dates * log dates)
+    however many schedules wait for later dates, and putting or discarding one is O(1) apart from a new date.
+    Dates whose slot emptied are left in the heap and dropped when they reach the top.
+    """
+    enabled: bool = True
+    clock: Callable[[], datetime.datetime] = datetime.datetime.now
+    loaded_at: datetime.datetime | None = None
+    last_tick_at: datetime.datetime | None = None
+    ticks: int = 0
+    popped: int = 0
+    _slots: dict[datetime.date, set[int]] = field(default_factory=dict)
+    _dates: list[datetime.date] = field(default_factory=list)
+    _due_dates: dict[int, datetime.date] = field(default_factory=dict)
+    # Changes made while a load reads the database, replayed on top of what it read
+    _pending: list[tuple[int, datetime.date | None]] | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Worker processes get an empty index with the same settings
+        return {'enabled': self.enabled}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def needs_load(self, resync_seconds: float) -> bool:
+        return self.enabled and (
+            self.loaded_at is None or self.clock() - self.loaded_at >= datetime.timedelta(seconds=resync_seconds)
+        )
+
+    def load(self, keys: Callable[[], Iterable[tuple[datetime.date, int]]]) -> int:
+        """Replaces the index with the (next_due_date, id) pairs keys returns, returns the number of schedules."""
+        with self._lock:
+            self._pending = []
+        try:
+            slots, due_dates = {}, {}
+            for next_due_date, schedule_id in keys():
+                slots.setdefault(next_due_date, set()).add(schedule_id)
+                due_dates[schedule_id] = next_due_date
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._slots, self._due_dates, self._dates = slots, due_dates, list(slots)
+            heapq.heapify(self._dates)
+            for schedule_id, next_due_date in pending:
+                self._put(schedule_id, next_due_date)
+            self.loaded_at = self.clock()
+            return len(self._due_dates)
+
+    def put(self, schedule_id: int, next_due_date: datetime.date | None) -> None:
+        """Files the schedule under next_due_date, or removes it when that is None."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((schedule_id, next_due_date))
+            self._put(schedule_id, next_due_date)
+
+    def discard(self, schedule_id: int) -> None:
+        self.put(schedule_id, None)
+
+    def _put(self, schedule_id: int, next_due_date: datetime.date | None) -> None:
+        old_due_date = self._due_dates.pop(schedule_id, None)
+        if old_due_date is not None:
+            slot = self._slots[old_due_date]
+            slot.discard(schedule_id)
+            if not slot:
+                del self._slots[old_due_date]
+
+        if next_due_date is not None:
+            self._due_dates[schedule_id] = next_due_date
+            if next_due_date not in self._slots:
+                self._slots[next_due_date] = set()
+                heapq.heappush(self._dates, next_due_date)
+            self._slots[next_due_date].add(schedule_id)
+
+    def pop_due(self, due_date: datetime.date, limit: int) -> list[int]:
+        """Removes and returns up to limit ids of the schedules due on or before due_date, the earliest first."""
+        schedule_ids = []
+        with self._lock:
+            while self._dates and self._dates[0] <= due_date and len(schedule_ids) < limit:
+                slot = self._slots.get(self._dates[0])
+                while slot and len(schedule_ids) < limit:
+                    schedule_id = slot.pop()
+                    del self._due_dates[schedule_id]
+                    schedule_ids.append(schedule_id)
+                if not slot:
+                    self._slots.pop(heapq.heappop(self._dates), None)
+            self.popped += len(schedule_ids)
+        return schedule_ids
+
+    def record_tick(self) -> None:
+        self.last_tick_at = self.clock()
+        self.ticks += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            oldest_due_date = min(self._slots, default=None)
+            today = self.clock().date()
+            return {
+                'enabled': self.enabled,
+                'size': len(self._due_dates),
+                'slots': len(self._slots),
+                'oldest_due_date': oldest_due_date.isoformat() if oldest_due_date else None,
+                # Days the oldest schedule waits past its due date, more than 0 only when ticks fall behind
+                'lag_days': max((today - oldest_due_date).days, 0) if oldest_due_date else 0,
+                'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+                'last_tick_at': self.last_tick_at.isoformat() if self.last_tick_at else None,
+                'ticks': self.ticks,
+                'popped': self.popped,
+            }
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Any, Iterator
+import datetime
+from werkzeug.exceptions import NotFound
+from app.persistent.repository import UserRepository, RecurringTransactionRepository
+from app.service.recurring_transactions import FREQUENCY_INTERVALS, count_occurrences
+
+
+def _month_periods(start: datetime.date, end: datetime.date) -> Iterator[tuple[datetime.date, datetime.date]]:
+    period_start = start
+    while period_start <= end:
+        next_month = (period_start.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        yield period_start, min(next_month - datetime.timedelta(days=1), end)
+        period_start = next_month
+
+
+@dataclass
+class CashFlowForecastService:
+    user_repository: UserRepository
+    recurring_transaction_repository: RecurringTransactionRepository
+
+    def generate_forecast_for_user(
+            self,
+            user_id: int,
+            until: datetime.date,
+            since: datetime.date | None = None) -> list[dict[str, Any]]:
+        since = since or datetime.date.today()
+        if until < since:
+            raise ValueError('Forecast end cannot be in the past')
+
+        if not self.user_repository.find_by_id(user_id):
+            raise NotFound('User not found')
+
+        schedules = self.recurring_transaction_repository.find_schedules_by_user_id(user_id)
+        return [
+            self._forecast_period(schedules, period_start, period_end)
+            for period_start, period_end in _month_periods(since, until)
+        ]
+
+    @staticmethod
+    def _forecast_period(schedules: list, period_start: datetime.date, period_end: datetime.date) -> dict[str, Any]:
+        categories = {}
+        for type_, category_id, category_name, amount, frequency, next_due_date in schedules:
+            occurrences = count_occurrences(
+                next_due_date,
+                FREQUENCY_INTERVALS[frequency],
+                period_start,
+                period_end
+            )
+            category = categories.setdefault(category_id, {'category': category_name, 'income': 0, 'expense': 0})
+            category[type_] += amount * occurrences
+
+        for category in categories.values():
+            category['net'] = category['income'] - category['expense']
+
+        income = sum(c['income'] for c in categories.values())
+        expense = sum(c['expense'] for c in categories.values())
+        return {
+            'period': period_start.strftime('%Y-%m'),
+            'income': income,
+            'expense': expense,
+            'net': income - expense,
+            'categories': list(categories.values()),
+        }
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Any
+from app.persistent.repository import UserRepository, LedgerTotalRepository
+from app.service.parallel import map_shards, split_id_range
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+
+@dataclass
+class LedgerService:
+    user_repository: UserRepository
+    ledger_total_repository: LedgerTotalRepository
+
+    def _user_id_chunks(self, chunk_size: int) -> list[tuple[int, int]]:
+        return split_id_range(self.user_repository.find_id_range(), chunk_size)
+
+    def _diff_chunk(self, first_user_id: int, last_user_id: int) -> list[dict[str, Any]]:
+        expected = {row[:3]: row[3:] for row in self.ledger_total_repository.calculate_raw_totals(
+            first_user_id, last_user_id)}
+        actual = {row[:3]: row[3:] for row in self.ledger_total_repository.find_totals(first_user_id, last_user_id)}
+
+        diffs = []
+        for key in sorted(expected.keys() | actual.keys()):
+            expected_total, expected_count = expected.get(key, (0, 0))
+            actual_total, actual_count = actual.get(key, (0, 0))
+            if (expected_total, expected_count) != (actual_total, actual_count):
+                diffs.append({
+                    'user_id': key[0],
+                    'category_id': key[1],
+                    'type': key[2],
+                    'expected_total': expected_total,
+                    'actual_total': actual_total,
+                    'expected_count': expected_count,
+                    'actual_count': actual_count,
+                })
+        return diffs
+
+    def rebuild_totals(self, workers: int, chunk_size: int) -> int:
+        rebuilt = map_shards(self.ledger_total_repository.rebuild_totals, self._user_id_chunks(chunk_size), workers)
+        logging.info(f'Rebuilt {sum(rebuilt)} ledger totals in {len(rebuilt)} chunks')
+        return sum(rebuilt)
+
+    def verify_totals(self, workers: int, chunk_size: int) -> list[dict[str, Any]]:
+        diffs = map_shards(self._diff_chunk, self._user_id_chunks(chunk_size), workers)
+        return [diff for chunk_diffs in diffs for diff in chunk_diffs]
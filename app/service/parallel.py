@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable
+from flask import Flask, current_app
+from app.persistent.configuration import sa
+from app.persistent.routing import configure_replicas
+
+_process_worker_app: Flask | None = None
+
+# App config the persistence layer reads, copied into the app of every worker process
+_PROCESS_WORKER_CONFIG = ('SQLALCHEMY_DATABASE_URI', 'BUDGET_ALERT_THRESHOLDS')
+
+
+def _init_process_worker(config: dict[str, Any], replica_urls: list[str]) -> None:
+    global _process_worker_app
+    _process_worker_app = Flask(__name__)
+    _process_worker_app.config.update(config)
+    sa.init_app(_process_worker_app)
+    configure_replicas(_process_worker_app, replica_urls)
+
+
+def _run_in_app_context(app: Flask | None, fn: Callable, shard: tuple) -> Any:
+    # Every shard pushes its own app context, so it works on its own scoped session and connection
+    with (app or _process_worker_app).app_context():
+        return fn(*shard)
+
+
+def split_id_range(id_range: tuple[int, int] | None, shard_size: int) -> list[tuple[int, int]]:
+    if not id_range:
+        return []
+
+    first_id, last_id = id_range
+    return [(start, min(start + shard_size - 1, last_id)) for start in range(first_id, last_id + 1, shard_size)]
+
+
+def map_shards(fn: Callable, shards: list[tuple], workers: int, executor: str = 'thread') -> list[Any]:
+    app = current_app._get_current_object()
+
+    if executor == 'process':
+        config = {key: app.config[key] for key in _PROCESS_WORKER_CONFIG if key in app.config}
+        replica_urls = [e.url.render_as_string(hide_password=False) for e in app.extensions.get('db_replicas', [])]
+        initargs = (config, replica_urls)
+        with ProcessPoolExecutor(workers, initializer=_init_process_worker, initargs=initargs) as pool:
+            return list(pool.map(partial(_run_in_app_context, None, fn), shards))
+
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(partial(_run_in_app_context, app, fn), shards))
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Any, Callable
+import datetime
+import logging
+import os
+import socket
+
+from app.persistent.entity import RecurringRunEntity
+from app.persistent.repository import SchedulerLeaseRepository, RecurringRunRepository
+from app.service.recurring_transactions import RecurringTransactionsService
+from app.service.dto import PageRequestDto, PageDto
+from app.config import RECURRING_SCHEDULER_LEASE_SECONDS
+
+logging.basicConfig(level=logging.INFO)
+
+LEASE_NAME = 'process_recurring_transactions'
+
+
+@dataclass
+class RecurringSchedulerService:
+    recurring_transactions_service: RecurringTransactionsService
+    scheduler_lease_repository: SchedulerLeaseRepository
+    recurring_run_repository: RecurringRunRepository
+    lease_seconds: int = RECURRING_SCHEDULER_LEASE_SECONDS
+    clock: Callable[[], datetime.datetime] = datetime.datetime.now
+
+    @staticmethod
+    def holder() -> str:
+        # Read per run, gunicorn workers forked from one preloaded app differ in their pid only
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def run_tick(self) -> dict[str, Any] | None:
+        """Processes recurring transactions when this worker gets the lease of the current tick.
+
+        Every worker fires on the same crontab, ticks are compared by their minute. Returns the recorded run,
+        or None when another worker took the tick or is still running an earlier one.
+        """
+        holder = self.holder()
+        started_at = self.clock()
+        tick = started_at.replace(second=0, microsecond=0)
+        expires_at = started_at + datetime.timedelta(seconds=self.lease_seconds)
+        if not self.scheduler_lease_repository.try_acquire(LEASE_NAME, holder, tick, started_at, expires_at):
+            logging.info('Recurring processing of %s is run by another worker', tick)
+            return None
+
+        run = RecurringRunEntity(holder=holder, started_at=started_at, status='running')
+        self.recurring_run_repository.save_or_update(run)
+        try:
+            counts = self.recurring_transactions_service.process_recurring_transactions(
+                current_date=started_at.date()
+            )
+            run.finish(self.clock(), 'succeeded', counts)
+        except Exception as err:
+            run.finish(self.clock(), 'failed', error=str(err))
+            raise
+        finally:
+            self.recurring_run_repository.save_or_update(run)
+            self.scheduler_lease_repository.release(LEASE_NAME, holder, self.clock())
+        return run.to_dict()
+
+    def get_runs_page(self, page_request: PageRequestDto) -> dict[str, Any]:
+        runs = self.recurring_run_repository.find_page(
+            page_request.after_id,
+            page_request.limit + 1,
+            page_request.order
+        )
+        return PageDto.from_entities(runs, page_request, lambda r: r.to_dict()).to_dict()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 import datetime
 from datetime import timedelta
@@ -12,25 +12,50 @@ from app.persistent.repository import (
     IncomeRecurringTransactionRepository,
     ExpenseRecurringTransactionRepository, ExpenseRepository
 )
+from app.persistent.entity import Frequency
 from app.persistent.entity import (
-    IncomeEntity,
-    ExpenseEntity,
-    Frequency
-)
-from app.persistent.entity import (
-    RecurringTransactionEntity,
     IncomeCategoryEntity,
     IncomeRecurringTransactionEntity,
     ExpenseRecurringTransactionEntity
 )
 from app.service.dto import (
     CreateRecurringTransactionDto,
-    RecurringTransactionDto
+    RecurringTransactionDto,
+    PageRequestDto,
+    PageDto
+)
+from app.persistent.unit_of_work import unit_of_work
+from app.service.parallel import map_shards
+from app.service.due_index import DueDateIndex
+from app.config import (
+    RECURRING_PROCESSING_CHUNK_SIZE,
+    RECURRING_PROCESSING_WORKERS,
+    RECURRING_PROCESSING_EXECUTOR,
+    RECURRING_DUE_INDEX_RESYNC_SECONDS
 )
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
+FREQUENCY_INTERVALS = {
+    Frequency.DAILY: timedelta(days=1),
+    Frequency.WEEKLY: timedelta(weeks=1),
+    Frequency.MONTHLY: timedelta(weeks=4),
+}
+
+
+def count_occurrences(
+        first_due_date: datetime.date,
+        interval: timedelta,
+        period_start: datetime.date,
+        period_end: datetime.date) -> int:
+    """Number of occurrences of a schedule due every interval from first_due_date inside the period, ends included."""
+    # Occurrences are first_due_date + k * interval for k >= 0, so the ones inside the period
+    # form a contiguous range of k that can be computed without walking the dates
+    first_k = max(0, -((first_due_date - period_start) // interval))
+    last_k = (period_end - first_due_date) // interval
+    return max(0, last_k - first_k + 1)
+
 
 @dataclass
 class RecurringTransactionsService:
@@ -41,6 +66,7 @@ class RecurringTransactionsService:
     income_repository: IncomeRepository
     expense_repository: ExpenseRepository
     recurring_transaction_repository: RecurringTransactionRepository
+    due_index: DueDateIndex = field(default_factory=lambda: DueDateIndex(enabled=False))
 
     def add_recurring_transaction(
             self,
@@ -80,6 +106,7 @@ class RecurringTransactionsService:
 
             self.expense_recurring_transaction_repository.save_or_update(recurring_transaction)
 
+        self.due_index.put(recurring_transaction.id, recurring_transaction.next_due_date)
         return RecurringTransactionDto.from_transaction_entity(recurring_transaction).to_dict()
 
     def get_by_id(self, transaction_id: int) -> dict[str, Any]:
@@ -89,68 +116,174 @@ class RecurringTransactionsService:
 
         return RecurringTransactionDto.from_transaction_entity(transaction).to_dict()
 
-    def _process_recurring_transaction(self, transaction: RecurringTransactionEntity) -> dict[str, Any] | None:
+    def get_page(self, page_request: PageRequestDto) -> dict[str, Any]:
+        transactions = self.recurring_transaction_repository.find_page(
+            page_request.after_id,
+            page_request.limit + 1,
+            page_request.order
+        )
+        return PageDto.from_entities(
+            transactions,
+            page_request,
+            lambda t: RecurringTransactionDto.from_transaction_entity(t).to_dict()
+        ).to_dict()
 
-        if isinstance(transaction, IncomeRecurringTransactionEntity):
-            self.create_income_transaction(transaction)
-        elif isinstance(transaction, ExpenseRecurringTransactionEntity):
-            self.create_expense_transaction(transaction)
+    def process_recurring_transactions(
+            self,
+            chunk_size: int = RECURRING_PROCESSING_CHUNK_SIZE,
+            current_date: datetime.date | None = None,
+            workers: int = RECURRING_PROCESSING_WORKERS,
+            executor: str = RECURRING_PROCESSING_EXECUTOR,
+            shard_count: int | None = None,
+            shards: list[int] | None = None,
+            with_schedules: bool = False) -> dict[str, Any]:
+        """Books the transactions due up to today and moves their schedules past today.
 
-        return RecurringTransactionDto.from_transaction_entity(transaction).to_dict()
+        Schedules are split by user_id in shard_count shards, as many as workers by default. The given shards,
+        all of them by default, are processed by workers threads or processes, so several hosts can each run
+        their own shards of the same shard_count. Claimed schedules are never booked twice, even by overlapping
+        shards. Returns the posted and caught_up counts, with_schedules also the processed schedules as dicts.
+        """
+        current_date = current_date or datetime.datetime.now().date()
+        shard_count = shard_count or workers
+        shards = [(current_date, chunk_size, (shard, shard_count), with_schedules)
+                  for shard in (range(shard_count) if shards is None else shards)]
 
-    def _validate_date_of_transaction(self, transaction: RecurringTransactionEntity, current_date: datetime.date):
-        if transaction.is_invalid(current_date):
-            self.recurring_transaction_repository.delete_by_id(transaction.id)
-            return None
+        if workers > 1:
+            shard_counts = map_shards(self._process_shard, shards, workers, executor)
+        else:
+            shard_counts = [self._process_shard(*shard) for shard in shards]
+        result = {key: sum(counts[key] for counts in shard_counts) for key in ('posted', 'caught_up')}
+        if with_schedules:
+            result['schedules'] = [schedule for counts in shard_counts for schedule in counts['schedules']]
+        return result
 
-        if transaction.is_next_due_date_after_current(current_date):
-            return None
+    def _process_shard(
+            self,
+            current_date: datetime.date,
+            chunk_size: int,
+            shard: tuple[int, int],
+            with_schedules: bool = False) -> dict[str, Any]:
+        """Processes the due schedules of one shard.
 
-        if transaction.are_dates_equal(current_date):
-            return transaction
+        Only the due schedules are read, chunk_size at a time from the due date index. Each chunk is claimed,
+        booked and advanced in one transaction. Schedules due today are handled with set-based statements, ones
+        whose due dates passed while processing did not run get every missed occurrence booked first.
+        """
+        counts = {'posted': 0, 'caught_up': 0, 'schedules': []}
+        after = None
 
-    def process_recurring_transactions(self):
-        current_date = (datetime.datetime.now()).date()
-        entities = self.recurring_transaction_repository.find_all()
+        while True:
+            with unit_of_work():
+                keys = self.recurring_transaction_repository.find_due_keys(current_date, after, chunk_size, shard)
+                if not keys:
+                    return counts
+                # Schedules of this chunk are due after today once it is processed, the keyset stays valid.
+                # Ones held by another worker are skipped here and booked by that worker
+                after = keys[-1]
+                schedule_ids = self.recurring_transaction_repository.claim_due(
+                    current_date,
+                    [schedule_id for _, schedule_id in keys]
+                )
+                self._process_claimed(current_date, schedule_ids, counts)
+                if with_schedules and schedule_ids:
+                    counts['schedules'] += [
+                        RecurringTransactionDto.from_transaction_entity(schedule).to_dict()
+                        for schedule in self.recurring_transaction_repository.find_by_ids(schedule_ids)
+                    ]
 
-        transactions_to_process = [t for t in entities if
-                                   self._validate_date_of_transaction(t, current_date) is not None]
-        if not transactions_to_process:
-            return []
+    def process_indexed_due_transactions(
+            self,
+            chunk_size: int = RECURRING_PROCESSING_CHUNK_SIZE,
+            current_date: datetime.date | None = None) -> dict[str, int]:
+        """Books the schedules the due index holds as due, without reading any of the others.
 
-        return [self._process_recurring_transaction(e) for e in transactions_to_process]
+        Popped schedules are claimed like in process_recurring_transactions, so workers whose indexes overlap
+        book each occurrence once. Their next_due_date is read back afterwards, which also corrects entries of
+        schedules changed or deleted through another worker.
+        """
+        current_date = current_date or datetime.datetime.now().date()
+        counts = {'posted': 0, 'caught_up': 0}
+        if self.due_index.needs_load(RECURRING_DUE_INDEX_RESYNC_SECONDS):
+            self.resync_due_index(chunk_size)
 
-    @staticmethod
-    def _update_next_due_date(transaction: RecurringTransactionEntity):
-        frequency = transaction.frequency
-        if frequency == Frequency.DAILY:
-            transaction.next_due_date += timedelta(days=1)
+        while schedule_ids := self.due_index.pop_due(current_date, chunk_size):
+            try:
+                with unit_of_work():
+                    claimed_ids = self.recurring_transaction_repository.claim_due(current_date, schedule_ids)
+                    self._process_claimed(current_date, claimed_ids, counts)
+            except Exception:
+                for schedule_id in schedule_ids:
+                    self.due_index.put(schedule_id, current_date)
+                raise
+            next_due_dates = dict.fromkeys(schedule_ids)
+            next_due_dates.update(self.recurring_transaction_repository.find_next_due_dates(schedule_ids))
+            for schedule_id, next_due_date in next_due_dates.items():
+                self.due_index.put(schedule_id, next_due_date)
 
-        elif frequency == Frequency.WEEKLY:
-            transaction.next_due_date += timedelta(weeks=1)
-        else:
+        self.due_index.record_tick()
+        return counts
+
+    def resync_due_index(self, batch_size: int = RECURRING_PROCESSING_CHUNK_SIZE) -> dict[str, Any]:
+        """Reloads the due index of this worker from the due date index of recurring_transactions."""
+        def keys():
+            after = None
+            while page := self.recurring_transaction_repository.find_due_keys(datetime.date.max, after, batch_size):
+                yield from page
+                after = page[-1]
 
-            transaction.next_due_date += timedelta(weeks=4)
+        loaded = self.due_index.load(keys)
+        logging.info(f'Loaded {loaded} recurring schedules into the due index')
+        return self.due_index.stats()
 
-    def create_income_transaction(self, transaction: IncomeRecurringTransactionEntity) -> None:
-        income_entity = IncomeEntity(
-            amount=transaction.amount,
-            user_id=transaction.user_id,
-            category_id=transaction.category_id,
+    def _process_claimed(self, current_date: datetime.date, schedule_ids: list[int], counts: dict[str, int]) -> None:
+        if not schedule_ids:
+            return
+
+        counts['caught_up'] += self._catch_up(current_date, schedule_ids)
+        counts['posted'] += self.recurring_transaction_repository.post_due_transactions(
+            current_date,
+            schedule_ids
         )
-        RecurringTransactionsService._update_next_due_date(transaction)
-        self.income_repository.save_or_update(income_entity)
-        self.income_recurring_transaction_repository.save_or_update(transaction)
-
-    def create_expense_transaction(self, transaction: ExpenseRecurringTransactionEntity):
-        expense_entity = ExpenseEntity(
-            amount=transaction.amount,
-            user_id=transaction.user_id,
-            category_id=transaction.category_id,
+        self.recurring_transaction_repository.advance_next_due_dates(
+            current_date,
+            schedule_ids,
+            FREQUENCY_INTERVALS
         )
-        RecurringTransactionsService._update_next_due_date(transaction)
-        self.expense_repository.save_or_update(expense_entity)
-        self.expense_recurring_transaction_repository.save_or_update(transaction)
+
+    def _catch_up(self, current_date: datetime.date, schedule_ids: list[int]) -> int:
+        missed = self.recurring_transaction_repository.find_missed(current_date, schedule_ids)
+        if not missed:
+            return 0
+
+        # Occurrences booked before, e.g. when a schedule was moved back in time, are not booked again
+        booked = self.recurring_transaction_repository.find_booked_dates(
+            [schedule.id for schedule in missed],
+            min(schedule.next_due_date for schedule in missed),
+            current_date
+        )
+        rows = {IncomeRecurringTransactionEntity: [], ExpenseRecurringTransactionEntity: []}
+        next_due_dates = {}
+        for schedule in missed:
+            interval = FREQUENCY_INTERVALS[schedule.frequency]
+            occurrences = count_occurrences(schedule.next_due_date, interval, schedule.next_due_date, current_date)
+            booking_dates = [schedule.next_due_date + interval * i for i in range(occurrences)]
+            rows[type(schedule)] += [
+                {
+                    'amount': schedule.amount,
+                    'user_id': schedule.user_id,
+                    'category_id': schedule.category_id,
+                    'booked_at': booked_at,
+                    'recurring_transaction_id': schedule.id
+                }
+                for booked_at in booking_dates if (schedule.id, booked_at) not in booked
+            ]
+            next_due_dates[schedule.id] = schedule.next_due_date + interval * occurrences
+
+        caught_up = self.income_repository.bulk_insert(rows[IncomeRecurringTransactionEntity])
+        caught_up += self.expense_repository.bulk_insert(rows[ExpenseRecurringTransactionEntity])
+        self.recurring_transaction_repository.update_next_due_dates(next_due_dates)
+        return caught_up
 
     def update_recurring_transaction(self, transaction_id: int, **kwargs) -> dict[str, Any]:
         transaction = self.recurring_transaction_repository.find_by_id(transaction_id)
@@ -159,4 +292,11 @@ class RecurringTransactionsService:
 
         transaction.update_transaction_info(**kwargs)
         self.recurring_transaction_repository.save_or_update(transaction)
+        self.due_index.put(transaction.id, transaction.next_due_date)
         return RecurringTransactionDto.from_transaction_entity(transaction).to_dict()
+
+    def delete_recurring_transaction(self, transaction_id: int) -> None:
+        if not self.recurring_transaction_repository.delete_by_id(transaction_id):
+            raise NotFound('Recurring transaction not found')
+
+        self.due_index.discard(transaction_id)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import Any
+import datetime
 from werkzeug.exceptions import NotFound
 from app.persistent.repository import (
     IncomeRepository,
@@ -12,7 +13,7 @@ from app.persistent.entity import (
     ExpenseEntity,
     TransactionEntity
 )
-from app.service.dto import CreateTransactionDto, TransactionDto, CategoryDto
+from app.service.dto import CreateTransactionDto, TransactionDto, CategoryDto, PageRequestDto, PageDto
 
 import logging
 
@@ -46,12 +47,14 @@ class TransactionService:
                 amount=transaction_dto.amount,
                 user_id=transaction_dto.user_id,
                 category_id=transaction_dto.category_id,
+                booked_at=datetime.date.today()
             )
         else:
             transaction = ExpenseEntity(
                 amount=transaction_dto.amount,
                 user_id=transaction_dto.user_id,
-                category_id=transaction_dto.category_id
+                category_id=transaction_dto.category_id,
+                booked_at=datetime.date.today()
             )
         return transaction
 
@@ -88,6 +91,33 @@ class TransactionService:
         transactions = category.income_transactions if category.type_ == 'income' else category.expense_transactions
         return [TransactionDto.from_transaction_entity(t).to_dict() for t in transactions]
 
+    def get_transactions_for_category_page(self, category_name: str, page_request: PageRequestDto) -> dict[str, Any]:
+        category = self.category_repository.find_by_name(category_name)
+
+        if not category:
+            raise NotFound('Category not found')
+
+        repository = self.income_repository if category.type_ == 'income' else self.expense_repository
+        transactions = repository.find_page(
+            page_request.after_id,
+            page_request.limit + 1,
+            page_request.order,
+            category_id=category.id
+        )
+        return PageDto.from_entities(transactions, page_request, TransactionService._to_dict).to_dict()
+
+    def get_transactions_page(self, page_request: PageRequestDto) -> dict[str, Any]:
+        transactions = self.transaction_repository.find_page(
+            page_request.after_id,
+            page_request.limit + 1,
+            page_request.order
+        )
+        return PageDto.from_entities(transactions, page_request, TransactionService._to_dict).to_dict()
+
+    @staticmethod
+    def _to_dict(transaction: TransactionEntity) -> dict[str, Any]:
+        return TransactionDto.from_transaction_entity(transaction).to_dict()
+
     def get_transactions_higher_than(self, expected_amount: float, transaction_type: str) -> list[dict[str, Any]]:
 
         if transaction_type == 'INCOME':
@@ -3,7 +3,7 @@ from typing import Any
 import datetime
 from app.persistent.repository import UserRepository, ActivationTokenRepository
 from app.persistent.entity import ActivationTokenEntity
-from app.service.dto import RegisterUserDto, UserDto, CreateUserDto
+from app.service.dto import RegisterUserDto, UserDto, CreateUserDto, PageRequestDto, PageDto
 from app.persistent.entity import UserEntity
 import random
 import string
@@ -64,12 +64,20 @@ class UserService:
 
         return UserDto.from_user_entity(user).to_dict()
 
-    def get_total_income(self, user_id: int) -> int:
+    def get_users_page(self, page_request: PageRequestDto) -> dict[str, Any]:
+        users = self.user_repository.find_page(page_request.after_id, page_request.limit + 1, page_request.order)
+        return PageDto.from_entities(users, page_request, lambda u: UserDto.from_user_entity(u).to_dict()).to_dict()
+
+    def get_total_income(
+            self,
+            user_id: int,
+            date_from: datetime.date | None = None,
+            date_to: datetime.date | None = None) -> int:
         user = self.user_repository.find_by_id(user_id)
         if not user:
             raise NotFound('User not found')
 
-        return self.user_repository.calculate_total_income(user_id)
+        return self.user_repository.calculate_total_income(user_id, date_from, date_to)
 
 
 @dataclass
@@ -0,0 +1,42 @@
+"""Columnar (NumPy) all-users report versus the SQL rollup report.
+
+    python -m benchmarks.budget_analytics --transactions 1000000 10000000
+"""
+import argparse
+
+from benchmarks.common import benchmark_app, populate, timed
+from app.persistent.repository import ledger_total_repository, user_repository
+from app.service.configuration import budget_planning_service, budget_analytics_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--transactions', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    for transactions in args.transactions:
+        with benchmark_app(args.database_uri):
+            populate(args.users, transactions)
+            ledger_total_repository.rebuild_totals(*user_repository.find_id_range())
+
+            results = {}
+            with timed('sql rollups', results):
+                expected = budget_planning_service.generate_budget_entries_for_all_users(workers=1)
+            with timed('columnar load', results):
+                snapshot = budget_analytics_service.load_snapshot()
+            budget_analytics_service.get_snapshot = lambda: snapshot
+            with timed('columnar report', results):
+                report = budget_analytics_service.generate_budget_entries_for_all_users()
+            with timed('columnar what-if', results):
+                budget_analytics_service.generate_budget_entries_for_all_users({2: 50})
+            assert report == expected
+
+            print(f'{args.users} users, {transactions} transactions')
+            for label, seconds in results.items():
+                print(f'{label:>17}: {seconds:8.3f}s')
+
+
+if __name__ == '__main__':
+    main()
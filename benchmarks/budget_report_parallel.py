@@ -0,0 +1,43 @@
+"""Speed-up of the all-users budget report versus worker count.
+
+    python -m benchmarks.budget_report_parallel --users 10000 --transactions 200000
+"""
+import argparse
+
+from benchmarks.common import benchmark_app, populate, timed
+from app.persistent.repository import ledger_total_repository, user_repository
+from app.service.configuration import budget_planning_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--transactions', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--shard-size', type=int, default=1000)
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    with benchmark_app(args.database_uri):
+        populate(args.users, args.transactions)
+        ledger_total_repository.rebuild_totals(*user_repository.find_id_range())
+
+        results = {}
+        with timed('serial', results):
+            expected = budget_planning_service.generate_budget_entries_for_all_users(workers=1)
+
+        for executor in ('thread', 'process'):
+            for workers in args.workers:
+                label = f'{executor} x{workers}'
+                with timed(label, results):
+                    report = budget_planning_service.generate_budget_entries_for_all_users_in_parallel(
+                        workers, executor=executor, shard_size=args.shard_size)
+                assert report == expected
+
+        print(f'{args.users} users, {args.transactions} transactions')
+        for label, seconds in results.items():
+            print(f'{label:>12}: {seconds:8.3f}s  speed-up {results["serial"] / seconds:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
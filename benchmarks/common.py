@@ -0,0 +1,83 @@
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from flask import Flask
+
+# app.config reads these at import time, benchmarks do not need a real .env
+os.environ.setdefault('JWT_ACCESS_LIFESPAN', '1')
+os.environ.setdefault('JWT_REFRESH_LIFESPAN', '1')
+
+from app.config import BUDGET_ALERT_THRESHOLDS  # noqa: E402
+from app.persistent.configuration import sa  # noqa: E402
+from app.persistent.entity import (  # noqa: E402
+    UserEntity,
+    CategoryEntity,
+    ExpenseCategoryEntity,
+    IncomeCategoryEntity,
+    TransactionEntity,
+    IncomeEntity,
+    ExpenseEntity,
+)
+
+
+@contextmanager
+def benchmark_app(database_uri: str | None = None) -> Iterator[Flask]:
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_uri or f'sqlite:///{directory}/benchmark.db'
+        app.config['BUDGET_ALERT_THRESHOLDS'] = BUDGET_ALERT_THRESHOLDS
+        sa.init_app(app)
+        with app.app_context():
+            sa.drop_all()
+            sa.create_all()
+            yield app
+            sa.session.remove()
+            sa.drop_all()
+
+
+def populate(users: int, transactions: int, expense_categories: int = 8, seed: int = 7) -> None:
+    """Inserts a synthetic ledger with Core executemany, bypassing the ORM unit of work"""
+    rnd = random.Random(seed)
+    connection = sa.session.connection()
+
+    connection.execute(sa.insert(UserEntity.__table__), [
+        {'id': i, 'name': f'User{i}', 'hashed_password': 'x', 'email': f'u{i}@gmail.com', 'roles': 'user'}
+        for i in range(1, users + 1)
+    ])
+    categories = [{'id': 1, 'name': 'Salary', 'type_': 'income'}] + [
+        {'id': i, 'name': f'Expense{i}', 'type_': 'expense'} for i in range(2, expense_categories + 2)
+    ]
+    connection.execute(sa.insert(CategoryEntity.__table__), categories)
+    connection.execute(sa.insert(IncomeCategoryEntity.__table__), [{'id': 1}])
+    connection.execute(sa.insert(ExpenseCategoryEntity.__table__), [
+        {'id': c['id'], 'percentage': 100 // expense_categories} for c in categories[1:]
+    ])
+
+    chunk = 50_000
+    for start in range(1, transactions + 1, chunk):
+        rows = []
+        for transaction_id in range(start, min(start + chunk, transactions + 1)):
+            category_id = rnd.randint(1, expense_categories + 1)
+            rows.append({
+                'id': transaction_id,
+                'amount': rnd.randint(10, 5000),
+                'user_id': rnd.randint(1, users),
+                'type_': 'income' if category_id == 1 else 'expense',
+                'category_id': category_id,
+            })
+        connection.execute(sa.insert(TransactionEntity.__table__), rows)
+        for entity, type_ in ((IncomeEntity, 'income'), (ExpenseEntity, 'expense')):
+            child_rows = [{'id': r['id'], 'category_id': r['category_id']} for r in rows if r['type_'] == type_]
+            if child_rows and entity.__table__ is not TransactionEntity.__table__:
+                connection.execute(sa.insert(entity.__table__), child_rows)
+    sa.session.commit()
+
+
+@contextmanager
+def timed(label: str, results: dict[str, float]) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
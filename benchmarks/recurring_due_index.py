@@ -0,0 +1,44 @@
+"""Loading the due index and ticking it versus the due date scan, when few schedules are due.
+
+    python -m benchmarks.recurring_due_index --schedules 1000000 --due-share 0.001
+"""
+import argparse
+
+from benchmarks.common import benchmark_app, populate, timed
+from benchmarks.recurring_processing import populate_schedules
+from app.service.configuration import recurring_transaction_service
+from app.service.due_index import DueDateIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--schedules', type=int, default=1_000_000)
+    parser.add_argument('--due-share', type=float, default=0.001)
+    parser.add_argument('--chunk-size', type=int, default=1_000)
+    parser.add_argument('--database-uri')
+    args = parser.parse_args()
+
+    results = {}
+    with benchmark_app(args.database_uri):
+        populate(args.users, 0)
+        due = populate_schedules(args.schedules, args.users, args.due_share)
+        recurring_transaction_service.due_index = DueDateIndex()
+
+        with timed('load', results):
+            stats = recurring_transaction_service.resync_due_index(batch_size=10_000)
+        with timed('indexed tick', results):
+            indexed = recurring_transaction_service.process_indexed_due_transactions(args.chunk_size)
+        with timed('idle indexed tick', results):
+            recurring_transaction_service.process_indexed_due_transactions(args.chunk_size)
+        with timed('idle scan', results):
+            scanned = recurring_transaction_service.process_recurring_transactions(args.chunk_size)
+
+    print(f'{args.schedules} schedules, {due} due, {stats["slots"]} due dates in the index')
+    print(f'indexed tick posted {indexed["posted"]}, the scan after it {scanned["posted"]}')
+    for label, seconds in results.items():
+        print(f'{label:>18}: {seconds:8.3f}s')
+
+
+if __name__ == '__main__':
+    main()
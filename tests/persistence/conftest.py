@@ -1,5 +1,6 @@
 import pytest
 from flask import Flask
+from sqlalchemy import event
 from app.persistent.configuration import sa
 
 
@@ -18,6 +19,18 @@ def app_context():
         sa.drop_all()
 
 
+@pytest.fixture
+def executed_statements(app_context):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sa.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(sa.engine, 'before_cursor_execute', before_cursor_execute)
+
+
 @pytest.fixture
 def user_data():
     return {
@@ -0,0 +1,87 @@
+import pytest
+from flask import current_app
+
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    ExpenseCategoryEntity,
+    IncomeEntity,
+    ExpenseEntity
+)
+from app.persistent.repository import (
+    user_repository,
+    income_repository,
+    expense_repository,
+    category_repository,
+    budget_alert_repository
+)
+
+
+@pytest.fixture(autouse=True)
+def alert_thresholds(app_context):
+    current_app.config['BUDGET_ALERT_THRESHOLDS'] = [80, 100]
+
+
+@pytest.fixture
+def example_user(app_context):
+    user = UserEntity(name='S', hashed_password='pass1', email='u@gmail.com', roles='admin')
+    user_repository.save_or_update(user)
+    return user
+
+
+@pytest.fixture
+def categories(app_context):
+    salary = IncomeCategoryEntity(name='Salary')
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    category_repository.save_or_update_many([salary, rent])
+    return salary, rent
+
+
+def alerts_for(user_id: int) -> list[tuple[int, int, int]]:
+    return [(a.category_id, a.threshold, a.actual_amount) for a in budget_alert_repository.find_by_user_id(user_id)]
+
+
+def test_alerts_record_threshold_crossings(example_user, categories):
+    salary, rent = categories
+    income_repository.save_or_update(IncomeEntity(amount=1000, user_id=example_user.id, category_id=salary.id))
+
+    expense_repository.save_or_update(ExpenseEntity(amount=200, user_id=example_user.id, category_id=rent.id))
+    assert alerts_for(example_user.id) == []
+
+    expense_repository.save_or_update(ExpenseEntity(amount=40, user_id=example_user.id, category_id=rent.id))
+    assert alerts_for(example_user.id) == [(rent.id, 80, 240)]
+
+    expense_repository.save_or_update(ExpenseEntity(amount=10, user_id=example_user.id, category_id=rent.id))
+    assert alerts_for(example_user.id) == [(rent.id, 80, 240)]
+
+    expense = ExpenseEntity(amount=100, user_id=example_user.id, category_id=rent.id)
+    expense_repository.save_or_update(expense)
+    assert alerts_for(example_user.id) == [(rent.id, 80, 240), (rent.id, 100, 350)]
+    assert budget_alert_repository.find_by_user_id(example_user.id)[-1].planned_amount == 300
+
+
+def test_alerts_use_thresholds_of_app_config(example_user, categories):
+    salary, rent = categories
+    current_app.config['BUDGET_ALERT_THRESHOLDS'] = [50]
+    income_repository.save_or_update(IncomeEntity(amount=1000, user_id=example_user.id, category_id=salary.id))
+
+    expense_repository.save_or_update(ExpenseEntity(amount=350, user_id=example_user.id, category_id=rent.id))
+    assert alerts_for(example_user.id) == [(rent.id, 50, 350)]
+
+
+def test_alerts_follow_income_and_amount_changes(example_user, categories):
+    salary, rent = categories
+    income = IncomeEntity(amount=1000, user_id=example_user.id, category_id=salary.id)
+    expense = ExpenseEntity(amount=250, user_id=example_user.id, category_id=rent.id)
+    user_repository.save_or_update_many([income, expense])
+    assert alerts_for(example_user.id) == [(rent.id, 80, 250)]
+
+    income.amount = 800
+    income_repository.save_or_update(income)
+    assert alerts_for(example_user.id) == [(rent.id, 80, 250), (rent.id, 100, 250)]
+
+    expense.change_amount(100)
+    expense_repository.save_or_update(expense)
+    expense.change_amount(300)
+    expense_repository.save_or_update(expense)
+    assert [threshold for _, threshold, _ in alerts_for(example_user.id)] == [80, 100, 80, 100]
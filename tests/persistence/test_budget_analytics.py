@@ -0,0 +1,86 @@
+import random
+import pytest
+from unittest.mock import MagicMock
+
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    ExpenseCategoryEntity,
+    IncomeEntity,
+    ExpenseEntity
+)
+from app.persistent.repository import (
+    user_repository,
+    category_repository,
+    transaction_repository,
+    expense_category_repository
+)
+from app.service.budget_analytics import BudgetAnalyticsService
+from app.service.budget_planning import BudgetPlanningService
+
+
+@pytest.fixture
+def budget_analytics_service():
+    return BudgetAnalyticsService(user_repository, transaction_repository, expense_category_repository)
+
+
+@pytest.fixture
+def random_ledger(app_context):
+    rnd = random.Random(3)
+    users = [UserEntity(name=f'U{i}', hashed_password='P', email=f'u{i}@gmail.com', roles='user') for i in range(6)]
+    incomes = [IncomeCategoryEntity(name=f'Income{i}') for i in range(2)]
+    expenses = [ExpenseCategoryEntity(name=f'Expense{i}', percentage=p) for i, p in enumerate((15, 25, 33))]
+    for _ in range(200):
+        category = rnd.choice(incomes + expenses)
+        transaction_type = IncomeEntity if isinstance(category, IncomeCategoryEntity) else ExpenseEntity
+        transaction = transaction_type(amount=rnd.randint(10, 999), user=rnd.choice(users[:-1]))
+        getattr(category, f'{transaction.type_}_transactions').append(transaction)
+
+    category_repository.save_or_update_many(users + incomes + expenses)
+    return expenses
+
+
+def test_columnar_report_matches_budget_planning(budget_analytics_service, random_ledger):
+    expected = BudgetPlanningService(user_repository, category_repository).generate_budget_entries_for_all_users()
+
+    assert budget_analytics_service.generate_budget_entries_for_all_users() == expected
+
+
+def test_columnar_report_from_small_partitions(budget_analytics_service, random_ledger):
+    expected = BudgetPlanningService(user_repository, category_repository).generate_budget_entries_for_all_users()
+    budget_analytics_service.get_snapshot = lambda: budget_analytics_service.load_snapshot(batch_size=7)
+
+    assert budget_analytics_service.generate_budget_entries_for_all_users() == expected
+
+
+def test_what_if_report_reuses_snapshot(budget_analytics_service, random_ledger, executed_statements):
+    rent = random_ledger[0]
+    rent_id = rent.id
+    budget_analytics_service.generate_budget_entries_for_all_users()
+    executed_statements.clear()
+
+    what_if = budget_analytics_service.generate_budget_entries_for_all_users({rent_id: 50})
+
+    assert executed_statements == []
+    rent.change_precentage(50)
+    category_repository.save_or_update(rent)
+    expected = BudgetPlanningService(user_repository, category_repository).generate_budget_entries_for_all_users()
+    assert what_if == expected
+
+
+def test_columnar_report_skips_transactions_of_deleted_users(budget_analytics_service, random_ledger):
+    deleted_user = user_repository.find_all_names()[0]
+    user_repository.delete_by_id(deleted_user[0])
+    expected = BudgetPlanningService(user_repository, category_repository).generate_budget_entries_for_all_users()
+
+    assert budget_analytics_service.generate_budget_entries_for_all_users() == expected
+
+
+def test_columnar_report_skips_users_read_after_the_user_list(budget_analytics_service, random_ledger):
+    expected = BudgetPlanningService(user_repository, category_repository).generate_budget_entries_for_all_users()
+    # The first user is missing from the list, as if it was created after the list was read
+    users = MagicMock(wraps=user_repository)
+    users.find_all_names.return_value = user_repository.find_all_names()[1:]
+    budget_analytics_service.user_repository = users
+
+    assert budget_analytics_service.generate_budget_entries_for_all_users() == expected[1:]
@@ -0,0 +1,129 @@
+import datetime
+import functools
+import json
+import pytest
+from flask import current_app
+from flask_restful import Api
+
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    ExpenseCategoryEntity,
+    IncomeEntity,
+    ExpenseEntity
+)
+from app.persistent.repository import user_repository, category_repository
+from app.service.budget_planning import BudgetPlanningService
+from app.service.dto import CreateCategorizedBudgetEntryDto
+from app.service.configuration import budget_planning_service as configured_budget_planning_service
+from app.routes.resource import BudgetListSummaryResource
+
+
+@pytest.fixture
+def budget_planning_service():
+    return BudgetPlanningService(user_repository, category_repository)
+
+
+@pytest.fixture
+def user_with_transactions(app_context):
+    user = UserEntity(name='S', hashed_password='pass1', email='u@gmail.com', roles='admin')
+    salary = IncomeCategoryEntity(name='Salary')
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    food = ExpenseCategoryEntity(name='Food', percentage=20)
+    unused = ExpenseCategoryEntity(name='Travel', percentage=10)
+
+    salary.income_transactions = [IncomeEntity(amount=a, user=user) for a in (5000, 3000)]
+    rent.expense_transactions = [ExpenseEntity(amount=a, user=user) for a in (1500, 1000)]
+    food.expense_transactions = [ExpenseEntity(amount=a, user=user) for a in (200, 300, 400)]
+
+    user_repository.save_or_update_many([user, salary, rent, food, unused])
+    return user
+
+
+def test_generate_budget_entries_for_user(budget_planning_service, user_with_transactions):
+    budget = budget_planning_service.generate_budget_entries_for_user(user_with_transactions.id)
+
+    assert budget == [
+        CreateCategorizedBudgetEntryDto('Rent', 8000 * 30 / 100, 2500).to_dict(),
+        CreateCategorizedBudgetEntryDto('Food', 8000 * 20 / 100, 900).to_dict(),
+    ]
+
+
+def test_generate_budget_entries_for_user_query_budget(
+        budget_planning_service,
+        user_with_transactions,
+        executed_statements):
+    user_id = user_with_transactions.id
+    user_repository.sa.session.expire_all()
+    executed_statements.clear()
+
+    budget_planning_service.generate_budget_entries_for_user(user_id)
+
+    assert len(executed_statements) <= 3
+
+
+def test_generate_budget_entries_for_user_in_period(budget_planning_service, user_with_transactions):
+    for transaction in user_repository.sa.session.scalars(user_with_transactions.transactions.select()):
+        transaction.booked_at = datetime.date(2026, 9, 30) if transaction.amount in (3000, 1000, 400) \
+            else datetime.date(2026, 10, 1)
+    user_repository.save_or_update(user_with_transactions)
+
+    october = (datetime.date(2026, 10, 1), datetime.date(2026, 10, 31))
+    budget = budget_planning_service.generate_budget_entries_for_user(user_with_transactions.id, *october)
+
+    assert user_repository.calculate_total_income(user_with_transactions.id, *october) == 5000
+    assert budget == [
+        CreateCategorizedBudgetEntryDto('Rent', 5000 * 30 / 100, 1500).to_dict(),
+        CreateCategorizedBudgetEntryDto('Food', 5000 * 20 / 100, 500).to_dict(),
+    ]
+
+
+def test_generate_budget_entries_for_all_users(budget_planning_service, user_with_transactions):
+    user_repository.save_or_update(UserEntity(name='A', hashed_password='P1', email='A@gmail.com', roles='user'))
+
+    budget = budget_planning_service.generate_budget_entries_for_all_users(batch_size=1)
+
+    assert budget == [
+        (f'{user_with_transactions.id}.S', budget_planning_service.generate_budget_entries_for_user(
+            user_with_transactions.id)),
+        (f'{user_with_transactions.id + 1}.A', []),
+    ]
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_generate_budget_entries_for_all_users_in_parallel(budget_planning_service, user_with_transactions, executor):
+    user_repository.save_or_update_many([
+        UserEntity(name=name, hashed_password='P1', email=f'{name}@gmail.com', roles='user') for name in 'ABCD'
+    ])
+    expected = budget_planning_service.generate_budget_entries_for_all_users(batch_size=2)
+
+    budget = budget_planning_service.generate_budget_entries_for_all_users_in_parallel(
+        workers=2,
+        executor=executor,
+        shard_size=2,
+        batch_size=1
+    )
+
+    assert budget == expected
+    assert [label for label, _ in budget] == ['1.S', '2.A', '3.B', '4.C', '5.D']
+
+
+def test_stream_budget_entries_for_all_users_over_http(user_with_transactions, monkeypatch):
+    users = [UserEntity(name=f'U{i}', hashed_password='pass1', email=f'u{i}@gmail.com', roles='user') for i in range(3)]
+    user_repository.save_or_update_many(users)
+    # One user per batch, so every batch after the first is read while the response streams
+    monkeypatch.setattr(
+        configured_budget_planning_service,
+        'stream_budget_entries_for_all_users',
+        functools.partial(configured_budget_planning_service.stream_budget_entries_for_all_users, batch_size=1)
+    )
+    Api(current_app).add_resource(BudgetListSummaryResource, '/users/budget-summary/')
+
+    response = current_app.test_client().get('/users/budget-summary/', headers={'Accept': 'application/x-ndjson'})
+
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [name for name, _ in lines] == [f'{u.id}.{u.name}' for u in [user_with_transactions, *users]]
+    assert lines[0][1] == [
+        CreateCategorizedBudgetEntryDto('Rent', 8000 * 30 / 100, 2500).to_dict(),
+        CreateCategorizedBudgetEntryDto('Food', 8000 * 20 / 100, 900).to_dict(),
+    ]
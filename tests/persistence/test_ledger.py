@@ -0,0 +1,253 @@
+import datetime
+import pytest
+
+from app.config import TRANSACTION_STORAGE
+from app.persistent.configuration import sa
+
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    ExpenseCategoryEntity,
+    IncomeEntity,
+    ExpenseEntity,
+    ExpenseRecurringTransactionEntity,
+    Frequency
+)
+from app.persistent.repository import (
+    user_repository,
+    income_repository,
+    expense_repository,
+    transaction_repository,
+    category_repository,
+    ledger_total_repository,
+    recurring_transaction_repository,
+    expense_recurring_transaction_repository
+)
+from app.service.ledger import LedgerService
+from app.service.transactions import TransactionService
+
+
+@pytest.fixture
+def ledger_service():
+    return LedgerService(user_repository, ledger_total_repository)
+
+
+@pytest.fixture
+def example_user(app_context):
+    user = UserEntity(name='S', hashed_password='pass1', email='u@gmail.com', roles='admin')
+    user_repository.save_or_update(user)
+    return user
+
+
+@pytest.fixture
+def categories(app_context):
+    salary = IncomeCategoryEntity(name='Salary')
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    category_repository.save_or_update_many([salary, rent])
+    return salary, rent
+
+
+def totals_for(user_id: int) -> dict[tuple[int, str], tuple[int, int]]:
+    return {(t.category_id, t.type_): (t.total, t.transactions_count)
+            for t in ledger_total_repository.find_by_user_id(user_id)}
+
+
+def test_totals_follow_added_transactions(example_user, categories):
+    salary, rent = categories
+    income_repository.save_or_update(IncomeEntity(amount=500, user_id=example_user.id, category_id=salary.id))
+    income_repository.save_or_update(IncomeEntity(amount=700, user_id=example_user.id, category_id=salary.id))
+    expense_repository.save_or_update(ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id))
+
+    assert totals_for(example_user.id) == {
+        (salary.id, 'income'): (1200, 2),
+        (rent.id, 'expense'): (300, 1),
+    }
+    assert user_repository.calculate_total_income(example_user.id) == 1200
+    assert user_repository.calculate_total_expenses(example_user.id, rent.id) == 300
+
+
+def test_totals_follow_changed_amount(example_user, categories):
+    _, rent = categories
+    expense = ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id)
+    expense_repository.save_or_update(expense)
+
+    transaction = transaction_repository.find_by_id(expense.id)
+    transaction.change_amount(450)
+    transaction_repository.save_or_update(transaction)
+
+    assert totals_for(example_user.id) == {(rent.id, 'expense'): (450, 1)}
+
+
+def test_totals_removed_with_deleted_category(example_user, categories):
+    salary, rent = categories
+    income_repository.save_or_update(IncomeEntity(amount=500, user_id=example_user.id, category_id=salary.id))
+    expense_repository.save_or_update(ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id))
+
+    category_repository.delete_by_name(rent.name)
+
+    assert totals_for(example_user.id) == {(salary.id, 'income'): (500, 1)}
+
+
+def test_change_amount_of_transaction_of_deleted_user(example_user, categories):
+    _, rent = categories
+    other_user = UserEntity(name='T', hashed_password='pass2', email='t@gmail.com', roles='user')
+    user_repository.save_or_update(other_user)
+    expense = ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id)
+    expense_repository.save_or_update(ExpenseEntity(amount=200, user_id=other_user.id, category_id=rent.id))
+    expense_repository.save_or_update(expense)
+    user_repository.delete_by_id(example_user.id)
+    transaction_service = TransactionService(
+        income_repository, expense_repository, transaction_repository, user_repository, category_repository
+    )
+
+    assert transaction_service.update_transaction_amount(expense.id, 450)['amount'] == 450
+
+    assert transaction_repository.find_by_id(expense.id).amount == 450
+    assert totals_for(other_user.id) == {(rent.id, 'expense'): (200, 1)}
+
+
+def test_delete_category_detaches_its_entities(example_user, categories):
+    _, rent = categories
+    expense = ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id)
+    expense_repository.save_or_update(expense)
+    assert (rent.name, expense.amount) == ('Rent', 300)
+
+    category_repository.delete_by_name(rent.name)
+
+    assert expense not in sa.session and rent not in sa.session
+    assert (rent.name, expense.amount) == ('Rent', 300)
+
+
+def test_delete_category_is_set_based(example_user, categories, executed_statements):
+    salary, rent = categories
+    user_id, salary_id, rent_id = example_user.id, salary.id, rent.id
+    expense_repository.bulk_insert([{'amount': a, 'user_id': user_id, 'category_id': rent_id} for a in range(1, 501)])
+    income_repository.save_or_update(IncomeEntity(amount=500, user_id=user_id, category_id=salary_id))
+    expense_recurring_transaction_repository.save_or_update(ExpenseRecurringTransactionEntity(
+        amount=10, frequency=Frequency.DAILY, user_id=user_id, next_due_date=datetime.date(2026, 11, 1),
+        category_id=rent_id
+    ))
+    version = user_repository.find_ledger_version(user_id)
+    executed_statements.clear()
+
+    deleted_counts = category_repository.delete_by_name('Rent')
+
+    assert deleted_counts == {'transactions': 500, 'recurring_transactions': 1, 'categories': 1}
+    assert len(executed_statements) <= 9
+    assert [t.amount for t in transaction_repository.find_all()] == [500]
+    assert expense_repository.find_all() == []
+    assert recurring_transaction_repository.find_all() == []
+    assert totals_for(user_id) == {(salary_id, 'income'): (500, 1)}
+    assert user_repository.find_ledger_version(user_id) == version + 1
+
+
+def test_delete_transactions_updates_totals(example_user, categories):
+    salary, rent = categories
+    income = IncomeEntity(amount=500, user_id=example_user.id, category_id=salary.id)
+    expense = ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id)
+    user_repository.save_or_update_many([income, expense, ExpenseEntity(amount=200, user=example_user, category=rent)])
+    income_id, expense_id, user_id, rent_id = income.id, expense.id, example_user.id, rent.id
+
+    assert transaction_repository.delete_by_id(income_id) == 1
+    assert expense_repository.delete_by_id(expense_id) == 1
+    assert income_repository.delete_by_id(expense_id) == 0
+
+    assert totals_for(user_id) == {(salary.id, 'income'): (0, 0), (rent_id, 'expense'): (200, 1)}
+    assert expense_repository.delete_all() == 1
+    assert transaction_repository.find_all() == []
+
+
+def test_rebuild_and_verify_totals(ledger_service, example_user, categories):
+    salary, rent = categories
+    income_repository.save_or_update(IncomeEntity(amount=500, user_id=example_user.id, category_id=salary.id))
+    expense_repository.save_or_update(ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id))
+    assert ledger_service.verify_totals(workers=2, chunk_size=1) == []
+
+    rent_total = next(t for t in ledger_total_repository.find_by_user_id(example_user.id) if t.type_ == 'expense')
+    rent_total.total = 1
+    ledger_total_repository.sa.session.commit()
+    diffs = ledger_service.verify_totals(workers=2, chunk_size=1)
+    assert diffs == [{
+        'user_id': example_user.id,
+        'category_id': rent.id,
+        'type': 'expense',
+        'expected_total': 300,
+        'actual_total': 1,
+        'expected_count': 1,
+        'actual_count': 1,
+    }]
+
+    assert ledger_service.rebuild_totals(workers=2, chunk_size=1) == 2
+    assert ledger_service.verify_totals(workers=2, chunk_size=1) == []
+
+
+def test_ledger_version_bumped_on_changes(example_user, categories):
+    salary, rent = categories
+    other_user = UserEntity(name='A', hashed_password='P1', email='A@gmail.com', roles='user')
+    user_repository.save_or_update(other_user)
+    assert user_repository.find_ledger_version(example_user.id) == 0
+
+    income_repository.save_or_update(IncomeEntity(amount=500, user_id=example_user.id, category_id=salary.id))
+    assert user_repository.find_ledger_version(example_user.id) == 1
+    assert user_repository.find_ledger_version(other_user.id) == 0
+
+    rent.change_precentage(40)
+    category_repository.save_or_update(rent)
+    assert user_repository.find_ledger_version(example_user.id) == 2
+    assert user_repository.find_ledger_version(other_user.id) == 1
+
+    category_repository.delete_by_name(salary.name)
+    assert user_repository.find_ledger_version(example_user.id) == 3
+    assert user_repository.find_ledger_version(other_user.id) == 1
+
+
+def test_bulk_insert_writes_parent_and_child_rows_per_batch(example_user, categories, executed_statements):
+    salary, rent = categories
+    bonus = IncomeCategoryEntity(name='Bonus')
+    category_repository.save_or_update(bonus)
+    user_id, salary_id, bonus_id = example_user.id, salary.id, bonus.id
+    rows = [{'amount': a, 'user_id': user_id, 'category_id': salary_id if a % 3 else bonus_id} for a in range(1, 11)]
+    executed_statements.clear()
+
+    assert income_repository.bulk_insert(rows, batch_size=4) == 10
+
+    root_inserts = [s for s in executed_statements if s.startswith('INSERT INTO transactions')]
+    child_inserts = [s for s in executed_statements if s.startswith('INSERT INTO incomes')]
+    if TRANSACTION_STORAGE == 'joined':
+        assert (len(root_inserts), len(child_inserts)) == (3, 3)
+    else:
+        assert (len(root_inserts), len(child_inserts)) == (3, 0)
+    incomes = income_repository.find_all()
+    assert sorted((i.amount, i.category_id) for i in incomes) == [(r['amount'], r['category_id']) for r in rows]
+    assert {i.type_ for i in incomes} == {'income'}
+    assert totals_for(user_id) == {(salary_id, 'income'): (37, 7), (bonus_id, 'income'): (18, 3)}
+
+
+def test_bulk_insert_attaches_child_rows_to_their_parents(example_user, categories):
+    salary, rent = categories
+    # The income takes the first id, the expenses must not be attached to it
+    income_repository.save_or_update(IncomeEntity(amount=1000, user_id=example_user.id, category_id=salary.id))
+    rows = [{'amount': a, 'user_id': example_user.id, 'category_id': rent.id} for a in range(1, 6)]
+
+    assert expense_repository.bulk_insert(rows, batch_size=2) == 5
+
+    expenses = expense_repository.find_all()
+    assert sorted(e.amount for e in expenses) == [1, 2, 3, 4, 5]
+    assert {e.booked_at for e in expenses} == {datetime.date.today()}
+    assert totals_for(example_user.id) == {(salary.id, 'income'): (1000, 1), (rent.id, 'expense'): (15, 5)}
+
+
+def test_bulk_save_or_update_updates_rows_by_id(example_user, categories):
+    salary, rent = categories
+    expense = ExpenseEntity(amount=300, user_id=example_user.id, category_id=rent.id)
+    expense_repository.save_or_update(expense)
+    version = user_repository.find_ledger_version(example_user.id)
+
+    written = expense_repository.bulk_save_or_update([
+        {'id': expense.id, 'amount': 100},
+        {'amount': 50, 'user_id': example_user.id, 'category_id': rent.id},
+    ])
+
+    assert written == 2
+    assert totals_for(example_user.id) == {(rent.id, 'expense'): (150, 2)}
+    assert user_repository.find_ledger_version(example_user.id) > version
@@ -0,0 +1,47 @@
+import json
+import logging
+import pytest
+from sqlalchemy import select
+
+from app.persistent import query_log
+from app.persistent.configuration import sa
+from app.persistent.entity import UserEntity
+from app.persistent.query_log import fingerprint, parameter_shape
+from app.persistent.repository import user_repository
+
+
+@pytest.fixture
+def slow_queries(app_context, caplog, monkeypatch):
+    monkeypatch.setattr(query_log, 'SLOW_QUERY_THRESHOLD_MS', 0)
+    monkeypatch.setattr(query_log, '_explained_fingerprints', set())
+    caplog.set_level(logging.WARNING, logger='app.slow_queries')
+
+    def records() -> list[dict]:
+        return [json.loads(r.getMessage()) for r in caplog.records if r.name == 'app.slow_queries']
+    return records
+
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    assert fingerprint('SELECT * FROM users WHERE id IN (?, ?, ?)') == fingerprint('SELECT *  FROM users WHERE id IN (?)')
+    assert fingerprint("SELECT 1 FROM users WHERE name = 'a'") == fingerprint("SELECT 2 FROM users WHERE name = 'b'")
+    assert fingerprint('SELECT id FROM users') != fingerprint('SELECT name FROM users')
+
+
+def test_parameter_shape_has_types_only():
+    assert parameter_shape((1, 'secret'), False) == {'rows': 1, 'row': ['int', 'str']}
+    assert parameter_shape([{'id': 1}, {'id': 2}], True) == {'rows': 2, 'row': {'id': 'int'}}
+
+
+def test_slow_queries_logged_with_plan_once_per_fingerprint(slow_queries):
+    user_repository.find_by_id(1)
+    user_repository.find_by_id(2)
+    sa.session.execute(select(UserEntity.name)).all()
+
+    records = [r for r in slow_queries() if r['statement'].startswith('SELECT')]
+    assert len(records) == 3
+    assert records[0]['event'] == 'slow_query'
+    assert records[0]['parameters']['row'] == ['int']
+    assert records[0]['route'] is None
+    assert records[0]['fingerprint'] == records[1]['fingerprint'] != records[2]['fingerprint']
+    assert 'explain' in records[0] and 'explain' not in records[1] and 'explain' in records[2]
+    assert any('users' in str(step) for step in records[0]['explain'])
@@ -0,0 +1,138 @@
+import datetime
+import pytest
+
+from app.persistent.entity import UserEntity, IncomeCategoryEntity, IncomeRecurringTransactionEntity, Frequency
+from app.persistent.repository import (
+    user_repository,
+    category_repository,
+    income_repository,
+    expense_repository,
+    transaction_repository,
+    recurring_transaction_repository,
+    income_recurring_transaction_repository,
+    expense_recurring_transaction_repository,
+    scheduler_lease_repository,
+    recurring_run_repository
+)
+from app.service.dto import PageRequestDto
+from app.service.recurring_transactions import RecurringTransactionsService
+from app.service.recurring_scheduler import RecurringSchedulerService
+from app.main import create_app
+
+
+class FakeClock:
+    def __init__(self, now: datetime.datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+    def advance(self, **kwargs) -> None:
+        self.now += datetime.timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(datetime.datetime(2024, 5, 1, 0, 5, 0, 120))
+
+
+@pytest.fixture
+def recurring_service():
+    return RecurringTransactionsService(
+        income_recurring_transaction_repository,
+        expense_recurring_transaction_repository,
+        user_repository,
+        category_repository,
+        income_repository,
+        expense_repository,
+        recurring_transaction_repository
+    )
+
+
+@pytest.fixture
+def workers(app_context, recurring_service, clock, monkeypatch):
+    """Two scheduler services sharing the database and clock, like two gunicorn workers."""
+    services = []
+    for holder in ('worker-1', 'worker-2'):
+        service = RecurringSchedulerService(
+            recurring_service,
+            scheduler_lease_repository,
+            recurring_run_repository,
+            lease_seconds=600,
+            clock=clock
+        )
+        monkeypatch.setattr(service, 'holder', lambda holder=holder: holder)
+        services.append(service)
+    return services
+
+
+@pytest.fixture
+def daily_schedule(app_context, clock):
+    user = UserEntity(name='S', hashed_password='pass1', email='u@gmail.com', roles='admin')
+    salary = IncomeCategoryEntity(name='Salary')
+    user_repository.save_or_update_many([user, salary])
+    recurring_transaction_repository.save_or_update(IncomeRecurringTransactionEntity(
+        amount=100, frequency=Frequency.DAILY, user_id=user.id, category_id=salary.id, next_due_date=clock().date()
+    ))
+
+
+def test_one_worker_runs_each_tick(workers, daily_schedule, clock):
+    first, second = workers
+
+    run = first.run_tick()
+    clock.advance(seconds=2)
+    assert second.run_tick() is None
+    assert first.run_tick() is None
+
+    assert run['holder'] == 'worker-1' and run['status'] == 'succeeded' and run['posted'] == 1
+    assert len(transaction_repository.find_all()) == 1
+
+    clock.advance(days=1)
+    assert second.run_tick()['posted'] == 1
+    assert len(transaction_repository.find_all()) == 2
+    assert [r['holder'] for r in first.get_runs_page(PageRequestDto(limit=10))['items']] == ['worker-1', 'worker-2']
+
+
+def test_lease_of_a_dead_worker_expires(workers, daily_schedule, clock):
+    first, second = workers
+    # worker-1 took the tick and died without releasing its lease
+    assert scheduler_lease_repository.try_acquire(
+        'process_recurring_transactions', 'worker-1', clock().replace(second=0, microsecond=0),
+        clock(), clock() + datetime.timedelta(seconds=600)
+    )
+
+    clock.advance(minutes=1)
+    assert second.run_tick() is None
+
+    clock.advance(minutes=10)
+    assert second.run_tick()['holder'] == 'worker-2'
+
+
+def test_failed_run_is_recorded_and_releases_the_lease(workers, daily_schedule, clock, monkeypatch):
+    first, second = workers
+
+    def fail(**kwargs):
+        raise RuntimeError('Database went away')
+
+    monkeypatch.setattr(first.recurring_transactions_service, 'process_recurring_transactions', fail)
+    with pytest.raises(RuntimeError):
+        first.run_tick()
+    monkeypatch.undo()
+
+    [run] = recurring_run_repository.find_all()
+    assert (run.status, run.error, run.posted) == ('failed', 'Database went away', 0)
+
+    clock.advance(minutes=1)
+    assert second.run_tick()['status'] == 'succeeded'
+
+
+@pytest.mark.parametrize('start_scheduler', [False, True])
+def test_only_the_serving_app_starts_the_scheduler(monkeypatch, start_scheduler):
+    monkeypatch.setattr('app.scheduler.configuration.RECURRING_SCHEDULER_ENABLED', True)
+
+    app = create_app(start_scheduler=start_scheduler)
+
+    scheduler = getattr(app, 'apscheduler', None)
+    assert (scheduler is not None and scheduler.running) == start_scheduler
+    if scheduler:
+        scheduler.shutdown(wait=False)
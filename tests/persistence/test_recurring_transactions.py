@@ -0,0 +1,154 @@
+import datetime
+import pytest
+
+from app.persistent.configuration import sa
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    ExpenseCategoryEntity,
+    IncomeRecurringTransactionEntity,
+    ExpenseRecurringTransactionEntity,
+    Frequency
+)
+from app.persistent.repository import (
+    user_repository,
+    category_repository,
+    income_repository,
+    expense_repository,
+    transaction_repository,
+    recurring_transaction_repository,
+    income_recurring_transaction_repository,
+    expense_recurring_transaction_repository,
+    ledger_total_repository
+)
+from app.service.recurring_transactions import RecurringTransactionsService
+from app.service.due_index import DueDateIndex
+
+TODAY = datetime.date.today()
+
+
+@pytest.fixture
+def service():
+    return RecurringTransactionsService(
+        income_recurring_transaction_repository,
+        expense_recurring_transaction_repository,
+        user_repository,
+        category_repository,
+        income_repository,
+        expense_repository,
+        recurring_transaction_repository
+    )
+
+
+@pytest.fixture
+def schedules(app_context):
+    user = UserEntity(name='S', hashed_password='pass1', email='u@gmail.com', roles='admin')
+    salary, rent = IncomeCategoryEntity(name='Salary'), ExpenseCategoryEntity(name='Rent', percentage=30)
+    user_repository.save_or_update_many([user, salary, rent])
+    recurring_transaction_repository.save_or_update_many([
+        IncomeRecurringTransactionEntity(amount=100, frequency=Frequency.MONTHLY, user_id=user.id,
+                                         category_id=salary.id, next_due_date=TODAY),
+        ExpenseRecurringTransactionEntity(amount=30, frequency=Frequency.WEEKLY, user_id=user.id,
+                                          category_id=rent.id, next_due_date=TODAY),
+        ExpenseRecurringTransactionEntity(amount=20, frequency=Frequency.DAILY, user_id=user.id,
+                                          category_id=rent.id, next_due_date=TODAY),
+        ExpenseRecurringTransactionEntity(amount=50, frequency=Frequency.DAILY, user_id=user.id,
+                                          category_id=rent.id, next_due_date=TODAY + datetime.timedelta(days=3)),
+        ExpenseRecurringTransactionEntity(amount=70, frequency=Frequency.DAILY, user_id=user.id,
+                                          category_id=rent.id, next_due_date=TODAY - datetime.timedelta(days=3)),
+    ])
+    return user.id, salary.id, rent.id
+
+
+def test_process_recurring_transactions_posts_due_schedules(service, schedules):
+    user_id, salary_id, rent_id = schedules
+
+    assert service.process_recurring_transactions(chunk_size=2) == {'posted': 3, 'caught_up': 4}
+
+    transactions = sorted(transaction_repository.find_all(), key=lambda t: (t.amount, t.booked_at))
+    assert [(t.amount, t.type_, t.category_id, t.booked_at) for t in transactions] == [
+        (20, 'expense', rent_id, TODAY),
+        (30, 'expense', rent_id, TODAY),
+        *[(70, 'expense', rent_id, TODAY - datetime.timedelta(days=days)) for days in (3, 2, 1, 0)],
+        (100, 'income', salary_id, TODAY),
+    ]
+    assert all(t.recurring_transaction_id is not None for t in transactions)
+    assert sorted((t.amount, t.next_due_date) for t in recurring_transaction_repository.find_all()) == [
+        (20, TODAY + datetime.timedelta(days=1)),
+        (30, TODAY + datetime.timedelta(weeks=1)),
+        (50, TODAY + datetime.timedelta(days=3)),
+        (70, TODAY + datetime.timedelta(days=1)),
+        (100, TODAY + datetime.timedelta(weeks=4)),
+    ]
+    assert sorted((t.category_id, t.total, t.transactions_count)
+                  for t in ledger_total_repository.find_by_user_id(user_id)) == [(salary_id, 100, 1), (rent_id, 330, 6)]
+
+    assert service.process_recurring_transactions() == {'posted': 0, 'caught_up': 0}
+
+
+def test_process_recurring_transactions_with_schedules(service, schedules):
+    result = service.process_recurring_transactions(chunk_size=2, workers=2, with_schedules=True)
+
+    assert (result['posted'], result['caught_up']) == (3, 4)
+    assert sorted((s['amount'], s['next_due_date']) for s in result['schedules']) == [
+        (20, str(TODAY + datetime.timedelta(days=1))),
+        (30, str(TODAY + datetime.timedelta(weeks=1))),
+        (70, str(TODAY + datetime.timedelta(days=1))),
+        (100, str(TODAY + datetime.timedelta(weeks=4))),
+    ]
+
+
+def test_post_due_transactions_books_each_occurrence_once(schedules):
+    schedule_ids = [schedule_id for _, schedule_id in recurring_transaction_repository.find_due_keys(TODAY, None, 10)]
+
+    assert recurring_transaction_repository.post_due_transactions(TODAY, schedule_ids) == 3
+    assert recurring_transaction_repository.post_due_transactions(TODAY, schedule_ids) == 0
+    assert len(transaction_repository.find_all()) == 3
+
+
+def test_catch_up_skips_occurrences_booked_before(service, schedules):
+    missed = recurring_transaction_repository.find_missed(TODAY, [5])[0]
+    missed_id, missed_date = missed.id, missed.next_due_date
+    expense_repository.bulk_insert([{'amount': 70, 'user_id': missed.user_id, 'category_id': missed.category_id,
+                                     'booked_at': missed_date, 'recurring_transaction_id': missed_id}])
+
+    assert service.process_recurring_transactions()['caught_up'] == 3
+    assert sorted(t.booked_at for t in transaction_repository.find_all() if t.recurring_transaction_id == missed_id) == [
+        TODAY - datetime.timedelta(days=days) for days in (3, 2, 1, 0)
+    ]
+
+
+def test_claim_due_skips_schedules_claimed_or_booked_elsewhere(schedules):
+    other_worker = recurring_transaction_repository.find_by_id(2)
+    other_worker.claimed_by = 'other'
+    recurring_transaction_repository.save_or_update(other_worker)
+
+    assert recurring_transaction_repository.claim_due(TODAY, [1, 2, 3, 4, 5]) == [1, 3, 5]
+    assert recurring_transaction_repository.claim_due(TODAY, [1, 3]) == []
+    # Claims last as long as the transaction of the chunk
+    sa.session.rollback()
+    assert [s.claimed_by for s in recurring_transaction_repository.find_all()] == [None, 'other', None, None, None]
+
+
+def test_parallel_workers_with_overlapping_shards_book_each_occurrence_once(service, schedules):
+    counts = service.process_recurring_transactions(chunk_size=1, workers=4, shard_count=2, shards=[0, 1, 0, 1])
+
+    assert counts == {'posted': 3, 'caught_up': 4}
+    assert len(transaction_repository.find_all()) == 7
+    assert all(schedule.claimed_by is None for schedule in recurring_transaction_repository.find_all())
+
+
+def test_indexed_processing_books_only_what_the_index_holds(service, schedules):
+    service.due_index = DueDateIndex()
+    service.resync_due_index()
+    # Changed and deleted through another worker, this index still holds their old due dates
+    moved = recurring_transaction_repository.find_by_id(2)
+    moved.next_due_date = TODAY + datetime.timedelta(days=1)
+    recurring_transaction_repository.save_or_update(moved)
+    recurring_transaction_repository.delete_by_id(3)
+
+    assert service.process_indexed_due_transactions(current_date=TODAY) == {'posted': 1, 'caught_up': 4}
+
+    stats = service.due_index.stats()
+    assert (stats['size'], stats['lag_days'], stats['ticks']) == (4, 0, 1)
+    assert sorted(service.due_index.pop_due(TODAY + datetime.timedelta(days=1), 10)) == [2, 5]
@@ -1,11 +1,25 @@
+import datetime
 import pytest
 
 from app.persistent.entity import (
     UserEntity,
     IncomeCategoryEntity,
-    IncomeEntity
+    IncomeEntity,
+    ExpenseEntity,
+    ExpenseCategoryEntity,
+    IncomeRecurringTransactionEntity,
+    ExpenseRecurringTransactionEntity,
+    Frequency
 )
-from app.persistent.repository import user_repository
+from app.persistent.repository import (
+    CrudRepositoryORM,
+    user_repository,
+    income_repository,
+    recurring_transaction_repository,
+    transaction_repository,
+    category_repository
+)
+from app.service.dto import RecurringTransactionDto, TransactionDto, CategoryDto
 
 
 @pytest.fixture
@@ -74,17 +88,31 @@ def test_find_user_that_does_not_exist(app_context):
 
 def test_delete_user_by_id(app_context, example_user):
     user_repository.save_or_update(example_user)
-    user_repository.delete_by_id(1)
+    assert user_repository.delete_by_id(1) == 1
     user_from_db = user_repository.find_by_id(1)
 
     assert user_from_db is None
 
 
+def test_delete_user_detaches_transactions(app_context, example_user, example_users):
+    salary = IncomeCategoryEntity(name='Salary')
+    salary.income_transactions = [
+        IncomeEntity(amount=500, user=example_user),
+        IncomeEntity(amount=700, user=example_users[0])
+    ]
+    user_repository.save_or_update_many([example_user, *example_users, salary])
+
+    assert user_repository.delete_by_id(example_user.id) == 1
+
+    incomes = sorted((i.amount, i.user_id) for i in income_repository.find_all())
+    assert incomes == [(500, None), (700, example_users[0].id)]
+
+
 def test_delete_all(app_context, example_user, example_users):
     users = [example_user] + example_users
     user_repository.save_or_update_many(users)
 
-    user_repository.delete_all()
+    assert user_repository.delete_all() == 3
     users_from_db = user_repository.find_all()
 
     assert len(users_from_db) == 0
@@ -126,3 +154,114 @@ def test_calculate_user_total_income(app_context, example_user):
 
     assert example_user.id == 1
     assert user_income == income1.amount + income2.amount
+
+
+def test_find_recurring_schedules_by_user_id(app_context, example_user, example_users):
+    salary = IncomeCategoryEntity(name='Salary')
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    due_date = datetime.date(2026, 11, 1)
+    user_repository.save_or_update_many([example_user, *example_users, salary, rent])
+    user_repository.save_or_update_many([
+        IncomeRecurringTransactionEntity(amount=5000, frequency=Frequency.MONTHLY, user_id=example_user.id,
+                                         next_due_date=due_date, category_id=salary.id),
+        ExpenseRecurringTransactionEntity(amount=1500, frequency=Frequency.WEEKLY, user_id=example_user.id,
+                                          next_due_date=due_date, category_id=rent.id),
+        ExpenseRecurringTransactionEntity(amount=700, frequency=Frequency.DAILY, user_id=example_users[0].id,
+                                          next_due_date=due_date, category_id=rent.id),
+    ])
+
+    schedules = recurring_transaction_repository.find_schedules_by_user_id(example_user.id)
+
+    assert [tuple(s) for s in schedules] == [
+        ('income', salary.id, 'Salary', 5000, Frequency.MONTHLY, due_date),
+        ('expense', rent.id, 'Rent', 1500, Frequency.WEEKLY, due_date),
+    ]
+
+
+def test_user_totals_run_in_the_database(app_context, example_user, executed_statements):
+    salary = IncomeCategoryEntity(name='Salary')
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    food = ExpenseCategoryEntity(name='Food', percentage=20)
+    salary.income_transactions = [IncomeEntity(amount=a, user=example_user) for a in (500, 700)]
+    rent.expense_transactions = [ExpenseEntity(amount=a, user=example_user) for a in range(1, 51)]
+    food.expense_transactions = [ExpenseEntity(amount=a, user=example_user) for a in range(1, 51)]
+    user_repository.save_or_update_many([example_user, salary, rent, food])
+    user_id, salary_id, rent_id, food_id = example_user.id, salary.id, rent.id, food.id
+    user_repository.sa.session.expire_all()
+    executed_statements.clear()
+
+    assert user_repository.calculate_total_income(user_id) == 1200
+    assert user_repository.calculate_total_expenses(user_id, rent_id) == sum(range(1, 51))
+    assert user_repository.get_expense_categories_idx(user_id) == [rent_id, food_id]
+    assert len(executed_statements) == 3
+
+    user = user_repository.find_by_id(user_id)
+    executed_statements.clear()
+    user.transactions.add(IncomeEntity(amount=100, category_id=salary_id))
+    assert executed_statements == []
+
+
+def test_iter_all_streams_users_in_id_order(app_context, example_user, example_users):
+    user_repository.save_or_update_many([example_user] + example_users)
+
+    assert [u.name for u in user_repository.iter_all(batch_size=2)] == ['S', 'A', 'B']
+
+
+def test_find_page_uses_keyset_after_id(app_context, example_user, example_users):
+    user_repository.save_or_update_many([example_user] + example_users)
+
+    assert [u.id for u in user_repository.find_page(None, 2)] == [1, 2]
+    assert [u.id for u in user_repository.find_page(2, 2)] == [3]
+    assert [u.id for u in user_repository.find_page(None, 2, 'desc')] == [3, 2]
+    assert [u.id for u in user_repository.find_page(2, 2, 'desc')] == [1]
+    assert [u.id for u in user_repository.find_page(None, 5, roles='user')] == [3]
+
+
+@pytest.mark.parametrize('polymorphic_loading, expected_statements', [('select', 101), ('joined', 1), ('selectin', 3)])
+def test_recurring_transactions_load_subclasses_eagerly(
+        app_context, example_user, executed_statements, polymorphic_loading, expected_statements):
+    salary, rent = IncomeCategoryEntity(name='Salary'), ExpenseCategoryEntity(name='Rent', percentage=30)
+    user_repository.save_or_update_many([example_user, salary, rent])
+    recurring_transaction_repository.save_or_update_many([
+        entity(amount=a, frequency=Frequency.WEEKLY, user_id=example_user.id, category_id=category.id,
+               next_due_date=datetime.date(2026, 11, 1))
+        for a in range(10, 60)
+        for entity, category in ((IncomeRecurringTransactionEntity, salary), (ExpenseRecurringTransactionEntity, rent))
+    ])
+    category_ids = {salary.id, rent.id}
+    recurring_transaction_repository.sa.session.expunge_all()
+    executed_statements.clear()
+
+    dtos = [RecurringTransactionDto.from_transaction_entity(t).to_dict()
+            for t in recurring_transaction_repository.find_all(polymorphic_loading)]
+
+    assert len(dtos) == 100
+    assert {d['category_id'] for d in dtos} == category_ids
+    assert len(executed_statements) == expected_statements
+
+
+def test_find_by_id_loads_subclass_columns_in_one_query(app_context, example_user, executed_statements):
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    user_repository.save_or_update_many([example_user, rent])
+    expense = ExpenseEntity(amount=100, user_id=example_user.id, category_id=rent.id)
+    user_repository.save_or_update(expense)
+    expense_id, rent_id = expense.id, rent.id
+    transaction_repository.sa.session.expunge_all()
+    executed_statements.clear()
+
+    assert TransactionDto.from_transaction_entity(transaction_repository.find_by_id(expense_id)).category_id == rent_id
+    assert CategoryDto.from_category_entity(category_repository.find_by_name('Rent')).percentage == 30
+    assert len(executed_statements) == 2
+
+
+def test_lookups_build_their_statement_once(app_context, example_user, monkeypatch):
+    monkeypatch.setattr(CrudRepositoryORM, '_statements', {})
+    built = []
+    select_entity = CrudRepositoryORM._select
+    monkeypatch.setattr(CrudRepositoryORM, '_select', lambda self, *args: built.append(args) or select_entity(self, *args))
+    user_repository.save_or_update(example_user)
+
+    assert [user_repository.find_by_email(email).name for email in ('u@gmail.com', 'u@gmail.com')] == ['S', 'S']
+    assert user_repository.find_by_email('missing@gmail.com') is None
+    assert user_repository.find_by_id(example_user.id).email == 'u@gmail.com'
+    assert len(built) == 2
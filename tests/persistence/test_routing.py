@@ -0,0 +1,54 @@
+import pytest
+from flask import Flask
+
+from app.persistent.configuration import sa, Base
+from app.persistent.entity import UserEntity
+from app.persistent.repository import user_repository
+from app.persistent.routing import configure_replicas, use_primary
+from app.persistent.unit_of_work import unit_of_work
+
+
+@pytest.fixture
+def replicated_app_context(tmp_path):
+    app = Flask(__name__)
+    with app.app_context():
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path}/primary.db'
+        sa.init_app(app)
+        configure_replicas(app, [f'sqlite:///{tmp_path}/replica.db', f'sqlite:///{tmp_path}/missing/replica.db'])
+        sa.create_all()
+        Base.metadata.create_all(app.extensions['db_replicas'][0])
+
+        yield app.extensions['db_replicas']
+
+        sa.session.remove()
+        sa.drop_all()
+
+
+def user(name: str) -> UserEntity:
+    return UserEntity(name=name, hashed_password='pass1', email=f'{name}@gmail.com', roles='user')
+
+
+def test_reads_go_to_healthy_replica(replicated_app_context):
+    with replicated_app_context[0].begin() as connection:
+        connection.execute(sa.insert(UserEntity.__table__).values(name='R', hashed_password='p', email='r', roles='user'))
+
+    # The second replica cannot be opened, it is skipped once it failed
+    names = set()
+    for _ in range(4):
+        try:
+            names |= {u.name for u in user_repository.find_all()}
+        except sa.exc.OperationalError:
+            pass
+        sa.session.remove()
+    assert names == {'R'}
+
+
+def test_writes_and_reads_after_write_go_to_primary(replicated_app_context):
+    with unit_of_work():
+        user_repository.save_or_update(user('P'))
+        assert [u.name for u in user_repository.find_all()] == ['P']
+    sa.session.remove()
+
+    with use_primary(sa.session):
+        assert [u.name for u in user_repository.find_all()] == ['P']
+    assert all(u.name != 'P' for u in user_repository.iter_all())
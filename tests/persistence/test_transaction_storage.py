@@ -0,0 +1,53 @@
+import pytest
+
+from app.config import TRANSACTION_STORAGE
+from app.persistent.configuration import sa
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    IncomeEntity,
+    ExpenseCategoryEntity,
+    ExpenseEntity
+)
+from app.persistent.repository import user_repository, transaction_repository
+from app.persistent.storage import convert_storage, current_storage
+
+OTHER_STORAGE = 'single' if TRANSACTION_STORAGE == 'joined' else 'joined'
+
+
+@pytest.fixture
+def transactions(app_context):
+    user = UserEntity(name='Suzy', hashed_password='pass1', email='suzy@gmail.com', roles='user')
+    salary = IncomeCategoryEntity(name='Salary')
+    rent = ExpenseCategoryEntity(name='Rent', percentage=30)
+    salary.income_transactions = [IncomeEntity(amount=a, user=user) for a in (500, 700, 900)]
+    rent.expense_transactions = [ExpenseEntity(amount=a, user=user) for a in (100, 200)]
+    user_repository.save_or_update_many([user, salary, rent])
+    expected = _read_transactions()
+    sa.session.close()
+    return expected
+
+
+def _read_transactions():
+    return sorted((t.id, t.type_, t.amount, t.category_id) for t in transaction_repository.find_all())
+
+
+def _current_storage():
+    with sa.engine.connect() as connection:
+        return current_storage(connection)
+
+
+def test_convert_storage_and_back_keeps_transactions(transactions):
+    assert _current_storage() == TRANSACTION_STORAGE
+
+    assert convert_storage(sa.engine, OTHER_STORAGE, chunk_size=2) == 5
+    assert _current_storage() == OTHER_STORAGE
+
+    assert convert_storage(sa.engine, TRANSACTION_STORAGE, chunk_size=2) == 5
+    assert _current_storage() == TRANSACTION_STORAGE
+    assert _read_transactions() == transactions
+
+
+def test_convert_storage_to_the_current_storage(transactions):
+    with pytest.raises(ValueError, match=f'already use {TRANSACTION_STORAGE} storage'):
+        convert_storage(sa.engine, TRANSACTION_STORAGE, chunk_size=2)
@@ -0,0 +1,107 @@
+import datetime
+import pytest
+from sqlalchemy import event
+
+from app.persistent.configuration import sa
+from app.persistent.entity import (
+    UserEntity,
+    IncomeCategoryEntity,
+    IncomeEntity,
+    IncomeRecurringTransactionEntity,
+    Frequency
+)
+from app.persistent.repository import (
+    user_repository,
+    income_repository,
+    category_repository,
+    transaction_repository,
+    recurring_transaction_repository,
+    income_recurring_transaction_repository,
+    expense_recurring_transaction_repository,
+    expense_repository
+)
+from app.persistent.unit_of_work import unit_of_work, in_unit_of_work
+from app.service.recurring_transactions import RecurringTransactionsService
+
+
+@pytest.fixture
+def commits(app_context):
+    committed = []
+
+    def after_commit(session):
+        committed.append(session)
+
+    event.listen(sa.session, 'after_commit', after_commit)
+    yield committed
+    event.remove(sa.session, 'after_commit', after_commit)
+
+
+@pytest.fixture
+def example_user(app_context):
+    return UserEntity(name='S', hashed_password='pass1', email='u@gmail.com', roles='admin')
+
+
+def test_unit_of_work_commits_once(example_user, commits):
+    with unit_of_work():
+        assert in_unit_of_work()
+        user_repository.save_or_update(example_user)
+        salary = IncomeCategoryEntity(name='Salary')
+        category_repository.save_or_update(salary)
+        income_repository.save_or_update(IncomeEntity(amount=100, user_id=example_user.id, category_id=salary.id))
+        assert commits == []
+
+    assert not in_unit_of_work()
+    assert len(commits) == 1
+    assert [t.amount for t in transaction_repository.find_all()] == [100]
+
+
+def test_unit_of_work_rolls_back_on_error(example_user, commits):
+    with pytest.raises(ValueError):
+        with unit_of_work():
+            user_repository.save_or_update(example_user)
+            raise ValueError('Failed')
+
+    assert commits == []
+    assert user_repository.find_all() == []
+
+
+def test_nested_unit_of_work_rolls_back_to_savepoint(example_user):
+    @unit_of_work()
+    def add_category_and_fail():
+        category_repository.save_or_update(IncomeCategoryEntity(name='Salary'))
+        raise ValueError('Failed')
+
+    with unit_of_work():
+        user_repository.save_or_update(example_user)
+        with pytest.raises(ValueError):
+            add_category_and_fail()
+
+    assert [u.name for u in user_repository.find_all()] == ['S']
+    assert category_repository.find_all() == []
+
+
+def test_recurring_transactions_commit_once_per_chunk(example_user, commits):
+    salary = IncomeCategoryEntity(name='Salary')
+    user_repository.save_or_update_many([example_user, salary])
+    today = datetime.date.today()
+    recurring_transaction_repository.save_or_update_many([
+        IncomeRecurringTransactionEntity(amount=a, frequency=Frequency.DAILY, user_id=example_user.id,
+                                         category_id=salary.id, next_due_date=today)
+        for a in range(10, 15)
+    ])
+    service = RecurringTransactionsService(
+        income_recurring_transaction_repository,
+        expense_recurring_transaction_repository,
+        user_repository,
+        category_repository,
+        income_repository,
+        expense_repository,
+        recurring_transaction_repository
+    )
+    commits.clear()
+
+    counts = service.process_recurring_transactions(chunk_size=2)
+
+    assert counts == {'posted': 5, 'caught_up': 0}
+    assert len(commits) == 4
+    assert sorted(t.amount for t in transaction_repository.find_all()) == list(range(10, 15))
@@ -0,0 +1,36 @@
+import datetime
+import pytest
+
+from app.persistent.entity import UserEntity, ActivationTokenEntity
+from app.persistent.repository import user_repository, activation_token_repository
+from app.service.users import UserSecurityService
+
+
+@pytest.fixture
+def service():
+    return UserSecurityService(user_repository, activation_token_repository)
+
+
+def add_token(expires_in: datetime.timedelta) -> None:
+    user = UserEntity(name='Suzy', hashed_password='pass1', email='suzy@gmail.com', roles='user', is_active=False)
+    user_repository.save_or_update(user)
+    activation_token_repository.save_or_update(ActivationTokenEntity(
+        token='abc',
+        timestamp=(datetime.datetime.now(datetime.UTC) + expires_in).timestamp(),
+        user_id=user.id
+    ))
+
+
+def test_activate_user_outside_unit_of_work(app_context, service):
+    add_token(datetime.timedelta(minutes=5))
+
+    assert service.activate_user('abc')['email'] == 'suzy@gmail.com'
+    assert activation_token_repository.find_by_token('abc') is None
+    assert user_repository.find_by_email('suzy@gmail.com').is_active
+
+
+def test_activate_user_with_expired_token(app_context, service):
+    add_token(-datetime.timedelta(minutes=5))
+
+    with pytest.raises(ValueError, match='expired'):
+        service.activate_user('abc')
@@ -0,0 +1,83 @@
+import datetime
+import json
+from unittest.mock import patch
+
+from app.persistent.unit_of_work import in_unit_of_work
+
+
+class TestBudgetSummaryResource:
+
+    @patch('app.service.configuration.budget_planning_service.generate_budget_entries_for_user')
+    def test_get_budget_summary_for_date_range(self, mock_generate, client):
+        mock_generate.return_value = []
+        response = client.get('/users/budget-summary/1?from=2026-10-01&to=2026-10-15')
+
+        assert response.status_code == 200
+        mock_generate.assert_called_once_with(1, datetime.date(2026, 10, 1), datetime.date(2026, 10, 15))
+
+    @patch('app.service.configuration.budget_planning_service.generate_budget_entries_for_user')
+    def test_get_budget_summary_invalid_period(self, mock_generate, client):
+        response = client.get('/users/budget-summary/1?period=2026-13')
+
+        assert response.status_code == 400
+        mock_generate.assert_not_called()
+
+
+class TestBudgetListSummaryResource:
+
+    @patch('app.service.configuration.budget_planning_service.generate_budget_entries_for_all_users')
+    def test_get_budget_summary_for_all_users(self, mock_generate, client):
+        mock_generate.return_value = [('1.Ula', [])]
+        response = client.get('/users/budget-summary/')
+
+        assert response.status_code == 200
+        assert response.json == [['1.Ula', []]]
+        mock_generate.assert_called_once()
+
+    @patch('app.service.configuration.budget_planning_service.stream_budget_entries_for_all_users')
+    def test_stream_budget_summary_for_all_users(self, mock_stream, client):
+        entry = {'category': 'Rent', 'planned_amount': 300.0, 'actual_amount': 100, 'difference': 200.0}
+        mock_stream.return_value = iter([('1.Ula', [entry]), ('2.Ola', [])])
+        response = client.get('/users/budget-summary/', headers={'Accept': 'application/x-ndjson'})
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert [json.loads(line) for line in response.data.decode().splitlines()] == [
+            ['1.Ula', [entry]],
+            ['2.Ola', []],
+        ]
+
+    @patch('app.service.configuration.budget_planning_service.stream_budget_entries_for_all_users')
+    def test_stream_budget_summary_reads_in_a_unit_of_work(self, mock_stream, client):
+        read_in_unit_of_work = []
+
+        def budget_entries():
+            for user in ('1.Ula', '2.Ola'):
+                read_in_unit_of_work.append(in_unit_of_work())
+                yield user, []
+
+        mock_stream.return_value = budget_entries()
+        response = client.get('/users/budget-summary/', headers={'Accept': 'application/x-ndjson'})
+
+        assert len(response.data.decode().splitlines()) == 2
+        assert read_in_unit_of_work == [True, True]
+
+
+class TestColumnarBudgetResources:
+
+    @patch('app.service.configuration.budget_analytics_service.generate_budget_entries_for_all_users')
+    def test_get_columnar_budget_summary_for_all_users(self, mock_generate, client):
+        mock_generate.return_value = [('1.Ula', [])]
+        response = client.get('/users/budget-summary/?engine=columnar')
+
+        assert response.status_code == 200
+        assert response.json == [['1.Ula', []]]
+        mock_generate.assert_called_once_with()
+
+    @patch('app.service.configuration.budget_analytics_service.generate_budget_entries_for_all_users')
+    def test_what_if_budget_summary(self, mock_generate, client):
+        mock_generate.return_value = [('1.Ula', [])]
+        response = client.post('/users/budget-summary/what-if', json={'percentages': {'3': 40}})
+
+        assert response.status_code == 200
+        mock_generate.assert_called_once_with({3: 40})
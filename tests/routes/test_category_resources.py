@@ -62,11 +62,14 @@ class TestCategoryNameResource:
 
     @patch('app.service.configuration.category_service.delete_by_name')
     def test_delete_category_by_name(self, mock_delete_by_name, client):
-        mock_delete_by_name.return_value = None
+        mock_delete_by_name.return_value = {'transactions': 2, 'recurring_transactions': 0, 'categories': 1}
         response = client.delete('/categories/Salary')
 
         assert response.status_code == 200
-        assert response.json == {'message': 'Category deleted'}
+        assert response.json == {
+            'message': 'Category deleted',
+            'deleted': {'transactions': 2, 'recurring_transactions': 0, 'categories': 1}
+        }
         mock_delete_by_name.assert_called_once_with('Salary')
 
     @patch('app.service.configuration.category_service.delete_by_name')
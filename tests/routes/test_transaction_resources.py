@@ -2,7 +2,7 @@ from unittest.mock import patch
 import pytest
 from werkzeug.exceptions import NotFound
 from jsonschema.exceptions import ValidationError
-from app.service.dto import CreateTransactionDto
+from app.service.dto import CreateTransactionDto, PageRequestDto
 
 
 class TestCreateTransactionResource:
@@ -128,6 +128,23 @@ class TestTransactionListByCategoryResource:
         mock_all_transactions_for_category.assert_called_once_with(category_name)
 
 
+    @patch('app.service.configuration.transaction_service.get_transactions_for_category_page')
+    def test_get_transactions_for_category_page(self, mock_category_page, client):
+        mock_category_page.return_value = {'items': [{'id': 2}], 'next_cursor': 'eyJ9'}
+        response = client.get('/transactions/Salary?limit=1')
+
+        assert response.status_code == 200
+        assert response.json == {'items': [{'id': 2}], 'next_cursor': 'eyJ9'}
+        mock_category_page.assert_called_once_with('Salary', PageRequestDto(limit=1))
+
+    @patch('app.service.configuration.transaction_service.get_transactions_for_category_page')
+    def test_get_transactions_for_category_page_invalid_limit(self, mock_category_page, client):
+        response = client.get('/transactions/Salary?limit=0')
+
+        assert response.status_code == 400
+        mock_category_page.assert_not_called()
+
+
 class TestTransactionsFilterResource:
 
     @patch('app.service.configuration.transaction_service.get_transactions_higher_than')
@@ -166,3 +183,64 @@ class TestTransactionsFilterResource:
 
         assert response.status_code == 400
         assert response.json['message'] == 'Invalid transaction type'
+
+
+class TestRecurringRunsResource:
+
+    @patch('app.service.configuration.recurring_scheduler_service.get_runs_page')
+    def test_get_recurring_runs_page(self, mock_runs_page, client):
+        mock_runs_page.return_value = {'items': [{'id': 2, 'status': 'succeeded', 'posted': 40}], 'next_cursor': None}
+        response = client.get('/recurring-transactions/runs?limit=1')
+
+        assert response.status_code == 200
+        assert response.json['items'][0]['posted'] == 40
+        mock_runs_page.assert_called_once_with(PageRequestDto(limit=1))
+
+
+class TestProcessRecurringTransactionsResource:
+
+    @patch('app.service.configuration.recurring_transaction_service.process_recurring_transactions')
+    def test_process_recurring_transactions(self, mock_process, client):
+        schedule = {'id': 3, 'amount': 100, 'user_id': 1, 'category_id': 2, 'type': 'income',
+                    'frequency': 'MONTHLY', 'next_due_date': '2026-11-15'}
+        mock_process.return_value = {'posted': 1, 'caught_up': 2, 'schedules': [schedule]}
+        response = client.post('/recurring-transactions')
+
+        assert response.status_code == 200
+        assert response.json == [schedule]
+        assert response.headers['X-Transactions-Posted'] == '1'
+        assert response.headers['X-Transactions-Caught-Up'] == '2'
+        mock_process.assert_called_once_with(with_schedules=True)
+
+    @patch('app.service.configuration.recurring_transaction_service.process_recurring_transactions')
+    def test_process_without_due_recurring_transactions(self, mock_process, client):
+        mock_process.return_value = {'posted': 0, 'caught_up': 0, 'schedules': []}
+        response = client.post('/recurring-transactions')
+
+        assert response.status_code == 200
+        assert response.json['message'] == 'No recurring transactions to process'
+        assert response.headers['X-Transactions-Posted'] == '0'
+
+
+class TestRecurringTransactionIdResource:
+
+    @patch('app.service.configuration.recurring_transaction_service.delete_recurring_transaction')
+    def test_delete_recurring_transaction(self, mock_delete, client):
+        response = client.delete('/recurring-transactions/3')
+
+        assert response.status_code == 200
+        mock_delete.assert_called_once_with(3)
+
+
+class TestRecurringDueIndexResource:
+
+    def test_get_due_index_stats(self, client):
+        response = client.get('/recurring-transactions/due-index')
+
+        assert response.status_code == 200
+        assert response.json['enabled'] is False
+
+    def test_resync_disabled_due_index(self, client):
+        response = client.post('/recurring-transactions/due-index')
+
+        assert response.status_code == 400
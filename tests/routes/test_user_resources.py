@@ -1,6 +1,10 @@
+import datetime
 import logging
+import pytest
 from unittest.mock import patch, MagicMock
 from werkzeug.exceptions import NotFound
+from app.service.dto import PageRequestDto
+from app.config import FORECAST_MAX_MONTHS
 
 logging.basicConfig(level=logging.INFO)
 
@@ -20,6 +24,23 @@ class TestCreateUserResource:
         assert response.json == mock_response
         assert response.status_code == 200
 
+    @patch('app.service.configuration.user_service.get_users_page')
+    def test_get_users_page(self, mock_get_users_page, client):
+        mock_get_users_page.return_value = {'items': [{'id': 1}], 'next_cursor': None}
+        response = client.get('/users?limit=1&order=desc')
+
+        assert response.status_code == 200
+        assert response.json == {'items': [{'id': 1}], 'next_cursor': None}
+        mock_get_users_page.assert_called_once_with(PageRequestDto(limit=1, order='desc'))
+
+    @patch('app.service.configuration.user_service.get_users_page')
+    def test_get_users_page_invalid_cursor(self, mock_get_users_page, client):
+        response = client.get('/users?cursor=abc')
+
+        assert response.status_code == 400
+        assert response.json['message'] == 'Invalid cursor'
+        mock_get_users_page.assert_not_called()
+
 
 class TestUserIdResource:
 
@@ -56,3 +77,76 @@ class TestUserIdTotalIncomeResource:
 
         assert response.status_code == 200
         assert response.json == 1000
+        mock_get_total_income.assert_called_once_with(1, None, None)
+
+    @patch('app.service.configuration.user_service.get_total_income')
+    def test_get_user_total_income_for_period(self, mock_get_total_income, client):
+        mock_get_total_income.return_value = 300
+        response = client.get('/users/1/total-income?period=2026-02')
+
+        assert response.status_code == 200
+        assert response.json == 300
+        mock_get_total_income.assert_called_once_with(1, datetime.date(2026, 2, 1), datetime.date(2026, 2, 28))
+
+    @patch('app.service.configuration.user_service.get_total_income')
+    def test_get_user_total_income_invalid_period(self, mock_get_total_income, client):
+        response = client.get('/users/1/total-income?from=2026-10-31&to=2026-10-01')
+
+        assert response.status_code == 400
+        assert response.json == {'message': 'Invalid booking period'}
+        mock_get_total_income.assert_not_called()
+
+
+class TestUserIdForecastResource:
+    @patch('app.service.configuration.cash_flow_forecast_service.generate_forecast_for_user')
+    def test_get_user_forecast(self, mock_generate_forecast, client):
+        mock_generate_forecast.return_value = [
+            {'period': '2026-10', 'income': 5000, 'expense': 1000, 'net': 4000, 'categories': []}
+        ]
+        until = datetime.date.today() + datetime.timedelta(days=90)
+        response = client.get(f'/users/1/forecast?until={until}')
+
+        assert response.status_code == 200
+        assert response.json[0]['net'] == 4000
+        mock_generate_forecast.assert_called_once_with(1, until)
+
+    @patch('app.service.configuration.cash_flow_forecast_service.generate_forecast_for_user')
+    def test_get_user_forecast_without_end_date(self, mock_generate_forecast, client):
+        response = client.get('/users/1/forecast')
+
+        assert response.status_code == 400
+        mock_generate_forecast.assert_not_called()
+
+    @patch('app.service.configuration.cash_flow_forecast_service.generate_forecast_for_user')
+    def test_get_user_forecast_ending_in_the_past(self, mock_generate_forecast, client):
+        response = client.get('/users/1/forecast?until=2020-01-31')
+
+        assert response.status_code == 400
+        assert response.json == {'message': 'Forecast end cannot be in the past'}
+        mock_generate_forecast.assert_not_called()
+
+    @patch('app.service.configuration.cash_flow_forecast_service.generate_forecast_for_user')
+    def test_get_user_forecast_does_not_hide_service_errors(self, mock_generate_forecast, client):
+        mock_generate_forecast.side_effect = ValueError('invalid literal for int()')
+
+        with pytest.raises(ValueError):
+            client.get(f'/users/1/forecast?until={datetime.date.today()}')
+
+    @patch('app.service.configuration.cash_flow_forecast_service.generate_forecast_for_user')
+    def test_get_user_forecast_beyond_the_horizon(self, mock_generate_forecast, client):
+        response = client.get('/users/1/forecast?until=2099-12-31')
+
+        assert response.status_code == 400
+        assert response.json == {'message': f'Forecast cannot reach more than {FORECAST_MAX_MONTHS} months ahead'}
+        mock_generate_forecast.assert_not_called()
+
+
+class TestUserIdAlertsResource:
+    @patch('app.service.configuration.budget_alert_service.get_alerts_for_user')
+    def test_get_user_alerts(self, mock_get_alerts, client):
+        mock_get_alerts.return_value = [{'id': 3, 'category_id': 2, 'threshold': 100}]
+        response = client.get('/users/1/alerts?after=2')
+
+        assert response.status_code == 200
+        assert response.json == [{'id': 3, 'category_id': 2, 'threshold': 100}]
+        mock_get_alerts.assert_called_once_with(1, 2)
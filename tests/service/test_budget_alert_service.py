@@ -0,0 +1,51 @@
+import datetime
+import pytest
+from unittest.mock import MagicMock
+from werkzeug.exceptions import NotFound
+
+from app.persistent.entity import BudgetAlertEntity
+from app.service.alerts import BudgetAlertService
+
+
+@pytest.fixture
+def mock_user_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_budget_alert_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(mock_user_repo, mock_budget_alert_repo):
+    return BudgetAlertService(mock_user_repo, mock_budget_alert_repo)
+
+
+def test_get_alerts_for_user(service, mock_budget_alert_repo):
+    mock_budget_alert_repo.find_by_user_id.return_value = [
+        BudgetAlertEntity(id=4, user_id=1, category_id=2, threshold=80, actual_amount=250, planned_amount=300.0,
+                          created_at=datetime.datetime(2026, 10, 18, 12, 30))
+    ]
+
+    alerts = service.get_alerts_for_user(1, after_id=3)
+
+    assert alerts == [{
+        'id': 4,
+        'user_id': 1,
+        'category_id': 2,
+        'threshold': 80,
+        'actual_amount': 250,
+        'planned_amount': 300.0,
+        'created_at': '2026-10-18 12:30:00',
+    }]
+    mock_budget_alert_repo.find_by_user_id.assert_called_once_with(1, 3)
+
+
+def test_get_alerts_for_user_not_found(service, mock_user_repo, mock_budget_alert_repo):
+    mock_user_repo.find_by_id.return_value = None
+
+    with pytest.raises(NotFound):
+        service.get_alerts_for_user(1)
+
+    mock_budget_alert_repo.find_by_user_id.assert_not_called()
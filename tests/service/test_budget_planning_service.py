@@ -1,10 +1,13 @@
+import datetime
 import logging
 
 import pytest
+from werkzeug.exceptions import NotFound
 from unittest.mock import MagicMock
 from app.service.dto import CreateCategorizedBudgetEntryDto
 from app.persistent.entity import ExpenseCategoryEntity
 from app.service.budget_planning import BudgetPlanningService
+from app.service.cache import VersionedCache
 
 logging.basicConfig(level=logging.INFO)
 
@@ -27,54 +30,36 @@ def service(user_mock_repo, category_mock_repo):
     )
 
 
-def test_calculate_actual_spending_for_category(service, user_mock_repo, category_mock_repo):
-    category = ExpenseCategoryEntity(id=1, name='Rent', type_='expense')
-    category_mock_repo.find_by_id.return_value = category
-    user_mock_repo.calculate_total_expenses.return_value = 500
-    user_actual_spendings_for_category = service._calculate_actual_spending_for_category(
-        user_id=1,
-        category_id=category.id
-    )
-    assert user_actual_spendings_for_category is not None
-    assert user_actual_spendings_for_category == 500
-    category_mock_repo.find_by_id.assert_called_once_with(1)
-    user_mock_repo.calculate_total_expenses.assert_called_once_with(1, 1)
-
-
-def test_calculate_planned_spending_for_user_by_category(service, user_mock_repo, category_mock_repo):
-    user_mock_repo.find_by_id.return_value = MagicMock(id=2, name='User 1')
-    user_mock_repo.calculate_total_income.return_value = 300
-    category = MagicMock(id=3, name='Category 1', percentage=20)
-    category_mock_repo.find_by_id.return_value = category
-    planned_spending = service._calculate_planned_spending_for_user_by_category(
-        user_id=2,
-        category_id=3
+def test_build_single_budget_entry(service):
+    budget_entry = service._build_single_budget_entry(
+        user_income=300,
+        category_name='Rent',
+        percentage=20,
+        actual=100
     )
 
-    assert planned_spending is not None
-    assert planned_spending == 300 * category.percentage / 100
-    assert user_mock_repo.calculate_total_income.call_count == 1
-    assert category_mock_repo.find_by_id.call_count == 1
+    assert budget_entry == CreateCategorizedBudgetEntryDto(
+        category='Rent',
+        planned_amount=300 * 20 / 100,
+        actual_amount=100
+    ).to_dict()
 
 
 def test_generate_budget_entries_for_user_by_category(service, user_mock_repo, category_mock_repo):
     percentage = 20
-    expenses = [
-        ExpenseCategoryEntity(id=1, name='Rent', type_='expense', percentage=percentage)
-    ]
+    expense_category = ExpenseCategoryEntity(id=1, name='Rent', type_='expense', percentage=percentage)
 
-    user_mock_repo.get_expense_categories_idx.return_value = [expenses[0].id]
-    user = MagicMock(id=1, name='User 1', email='u1@gmail.com')
+    user_mock_repo.find_ledger_version.return_value = 4
     total_expense = 3000
-    user_mock_repo.calculate_total_expenses.return_value = total_expense
-    user_mock_repo.find_by_id.return_value = user
+    user_mock_repo.calculate_expenses_by_category.return_value = [
+        (expense_category.name, expense_category.percentage, total_expense)
+    ]
     total_income = 8000
     user_mock_repo.calculate_total_income.return_value = total_income
-    category_mock_repo.find_by_id.return_value = expenses[0]
 
     expected_budget = service.generate_budget_entries_for_user(user_id=1)
     budget_for_one_user = CreateCategorizedBudgetEntryDto(
-        category=expenses[0].name,
+        category=expense_category.name,
         planned_amount=total_income * percentage / 100,
         actual_amount=total_expense,
     )
@@ -83,7 +68,98 @@ def test_generate_budget_entries_for_user_by_category(service, user_mock_repo, c
         budget_for_one_user.to_dict()
     ]
 
-    assert user_mock_repo.find_by_id.call_count == 1
-    assert user_mock_repo.calculate_total_expenses.call_count == 1
-    assert user_mock_repo.calculate_total_income.call_count == 1
-    assert category_mock_repo.find_by_id.call_count == 3
+    user_mock_repo.find_ledger_version.assert_called_once_with(1)
+    user_mock_repo.calculate_expenses_by_category.assert_called_once_with(1, None, None)
+    user_mock_repo.calculate_total_income.assert_called_once_with(1, None, None)
+    category_mock_repo.find_by_id.assert_not_called()
+
+
+def test_generate_budget_entries_for_user_in_period(user_mock_repo, category_mock_repo):
+    service = BudgetPlanningService(user_mock_repo, category_mock_repo, VersionedCache())
+    user_mock_repo.find_ledger_version.return_value = 1
+    user_mock_repo.calculate_total_income.return_value = 1000
+    user_mock_repo.calculate_expenses_by_category.return_value = [('Rent', 30, 200)]
+    date_from, date_to = datetime.date(2026, 10, 1), datetime.date(2026, 10, 31)
+
+    service.generate_budget_entries_for_user(1)
+    service.generate_budget_entries_for_user(1, date_from, date_to)
+
+    user_mock_repo.calculate_total_income.assert_called_with(1, date_from, date_to)
+    user_mock_repo.calculate_expenses_by_category.assert_called_with(1, date_from, date_to)
+    assert service.budget_cache.stats()['hits'] == 0
+
+
+def test_generate_budget_entries_for_user_not_found(service, user_mock_repo):
+    user_mock_repo.find_ledger_version.return_value = None
+
+    with pytest.raises(NotFound) as err:
+        service.generate_budget_entries_for_user(user_id=1)
+
+    assert 'User not found' in str(err.value)
+    user_mock_repo.calculate_total_income.assert_not_called()
+
+
+def test_generate_budget_entries_for_user_from_cache(user_mock_repo, category_mock_repo):
+    service = BudgetPlanningService(user_mock_repo, category_mock_repo, VersionedCache())
+    user_mock_repo.find_ledger_version.return_value = 1
+    user_mock_repo.calculate_total_income.return_value = 1000
+    user_mock_repo.calculate_expenses_by_category.return_value = [('Rent', 30, 200)]
+
+    first_budget = service.generate_budget_entries_for_user(user_id=1)
+    second_budget = service.generate_budget_entries_for_user(user_id=1)
+
+    assert first_budget == second_budget
+    assert user_mock_repo.find_ledger_version.call_count == 2
+    assert user_mock_repo.calculate_expenses_by_category.call_count == 1
+    assert service.budget_cache.stats()['hits'] == 1
+
+    user_mock_repo.find_ledger_version.return_value = 2
+    service.generate_budget_entries_for_user(user_id=1)
+    assert user_mock_repo.calculate_expenses_by_category.call_count == 2
+
+
+def test_stream_budget_entries_for_all_users(service, user_mock_repo):
+    user_mock_repo.find_names_page.side_effect = [[(1, 'Ula'), (2, 'Ola')], [(3, 'Ela')], []]
+    user_mock_repo.calculate_total_incomes_for_users.side_effect = [{1: 1000}, {3: 500}]
+    user_mock_repo.calculate_expenses_by_category_for_users.side_effect = [
+        [(1, 'Rent', 30, 200)],
+        [(3, 'Food', 10, 80)],
+    ]
+
+    budget = list(service.stream_budget_entries_for_all_users(batch_size=2))
+
+    assert budget == [
+        ('1.Ula', [CreateCategorizedBudgetEntryDto('Rent', 1000 * 30 / 100, 200).to_dict()]),
+        ('2.Ola', []),
+        ('3.Ela', [CreateCategorizedBudgetEntryDto('Food', 500 * 10 / 100, 80).to_dict()]),
+    ]
+    assert [c.args for c in user_mock_repo.find_names_page.call_args_list] == [(0, 2), (2, 2, None), (3, 2, None)]
+
+
+def test_stream_budget_entries_for_all_users_not_found(service, user_mock_repo):
+    user_mock_repo.find_names_page.return_value = []
+
+    with pytest.raises(NotFound) as err:
+        service.stream_budget_entries_for_all_users(batch_size=2)
+
+    assert 'No users found' in str(err.value)
+
+
+def test_generate_budget_entries_for_shard(service, user_mock_repo):
+    user_mock_repo.find_names_page.side_effect = [[(3, 'Ula')], [(4, 'Ola')], []]
+    user_mock_repo.calculate_total_incomes_for_users.return_value = {}
+    user_mock_repo.calculate_expenses_by_category_for_users.return_value = []
+
+    budget = service._generate_budget_entries_for_shard(first_user_id=3, last_user_id=4, batch_size=1)
+
+    assert budget == [('3.Ula', []), ('4.Ola', [])]
+    assert [c.args for c in user_mock_repo.find_names_page.call_args_list] == [(2, 1, 4), (3, 1, 4), (4, 1, 4)]
+
+
+def test_generate_budget_entries_for_all_users_in_parallel_not_found(service, user_mock_repo):
+    user_mock_repo.find_id_range.return_value = None
+
+    with pytest.raises(NotFound) as err:
+        service.generate_budget_entries_for_all_users_in_parallel(workers=2)
+
+    assert 'No users found' in str(err.value)
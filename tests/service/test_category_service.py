@@ -149,7 +149,9 @@ def test_get_category_by_name_not_found(service, mock_category_repo):
 
 
 def test_delete_category_by_name(service, mock_category_repo, example_category):
-    service.delete_by_name(name=example_category.name)
+    mock_category_repo.delete_by_name.return_value = {'transactions': 3, 'recurring_transactions': 1, 'categories': 1}
+    deleted_counts = service.delete_by_name(name=example_category.name)
+    assert deleted_counts == {'transactions': 3, 'recurring_transactions': 1, 'categories': 1}
     mock_category_repo.delete_by_name.assert_called_once_with(example_category.name)
 
 
@@ -0,0 +1,70 @@
+import datetime
+import pytest
+from app.service.due_index import DueDateIndex
+
+TODAY = datetime.date(2024, 5, 1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime.datetime(2024, 5, 1, 12, 0)
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def index(clock):
+    index = DueDateIndex(clock=clock)
+    index.load(lambda: [(TODAY - datetime.timedelta(days=2), 1), (TODAY, 2), (TODAY, 3),
+                        (TODAY + datetime.timedelta(days=1), 4)])
+    return index
+
+
+def test_pop_due_returns_due_schedules_earliest_first(index):
+    assert index.pop_due(TODAY, 2)[0] == 1
+    assert index.pop_due(TODAY, 10) in ([2], [3])
+    assert index.pop_due(TODAY, 10) == []
+    assert index.stats()['size'] == 1
+
+
+def test_put_moves_and_discard_removes_schedule(index):
+    index.put(4, TODAY)
+    index.put(1, TODAY + datetime.timedelta(days=7))
+    index.discard(2)
+
+    assert sorted(index.pop_due(TODAY, 10)) == [3, 4]
+    assert index.stats()['slots'] == 1
+
+
+def test_changes_during_load_are_kept(index):
+    def keys():
+        index.put(5, TODAY)
+        index.discard(2)
+        yield TODAY, 2
+        yield TODAY, 3
+
+    assert index.load(keys) == 2
+    assert sorted(index.pop_due(TODAY, 10)) == [3, 5]
+
+
+def test_stats_report_lag_of_oldest_due_schedule(index, clock):
+    stats = index.stats()
+    assert (stats['size'], stats['slots'], stats['lag_days']) == (4, 3, 2)
+
+    clock.now += datetime.timedelta(hours=1)
+    assert index.needs_load(resync_seconds=3600)
+    assert not index.needs_load(resync_seconds=3601)
+
+
+def test_disabled_index_keeps_nothing(clock):
+    index = DueDateIndex(enabled=False, clock=clock)
+    index.put(1, TODAY)
+
+    assert not index.needs_load(resync_seconds=0)
+    assert index.pop_due(TODAY, 10) == []
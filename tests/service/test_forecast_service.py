@@ -0,0 +1,83 @@
+import datetime
+import pytest
+from unittest.mock import MagicMock
+from werkzeug.exceptions import NotFound
+
+from app.persistent.entity import Frequency
+from app.service.forecast import CashFlowForecastService
+from app.service.recurring_transactions import count_occurrences
+
+
+@pytest.fixture
+def mock_user_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_recurring_transaction_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(mock_user_repo, mock_recurring_transaction_repo):
+    return CashFlowForecastService(mock_user_repo, mock_recurring_transaction_repo)
+
+
+@pytest.mark.parametrize('interval_days', [1, 7, 28])
+def test_count_occurrences_matches_iterating_dates(interval_days):
+    first_due_date = datetime.date(2026, 10, 20)
+    dates = [first_due_date + datetime.timedelta(days=interval_days * k) for k in range(400)]
+
+    for period_start, period_end in [
+        (datetime.date(2026, 10, 1), datetime.date(2026, 10, 31)),
+        (datetime.date(2026, 10, 21), datetime.date(2026, 11, 16)),
+        (datetime.date(2027, 2, 1), datetime.date(2027, 2, 28)),
+        (datetime.date(2026, 9, 1), datetime.date(2026, 9, 30)),
+    ]:
+        expected = sum(period_start <= d <= period_end for d in dates)
+        interval = datetime.timedelta(days=interval_days)
+        assert count_occurrences(first_due_date, interval, period_start, period_end) == expected
+
+
+def test_generate_forecast_for_user(service, mock_recurring_transaction_repo):
+    mock_recurring_transaction_repo.find_schedules_by_user_id.return_value = [
+        ('income', 1, 'Salary', 5000, Frequency.MONTHLY, datetime.date(2026, 10, 25)),
+        ('expense', 2, 'Food', 10, Frequency.DAILY, datetime.date(2026, 10, 18)),
+        ('expense', 3, 'Gym', 50, Frequency.WEEKLY, datetime.date(2026, 10, 19)),
+    ]
+
+    forecast = service.generate_forecast_for_user(
+        1,
+        until=datetime.date(2026, 11, 30),
+        since=datetime.date(2026, 10, 18)
+    )
+
+    assert [period['period'] for period in forecast] == ['2026-10', '2026-11']
+    assert forecast[0] == {
+        'period': '2026-10',
+        'income': 5000,
+        'expense': 14 * 10 + 2 * 50,
+        'net': 5000 - 240,
+        'categories': [
+            {'category': 'Salary', 'income': 5000, 'expense': 0, 'net': 5000},
+            {'category': 'Food', 'income': 0, 'expense': 140, 'net': -140},
+            {'category': 'Gym', 'income': 0, 'expense': 100, 'net': -100},
+        ],
+    }
+    assert forecast[1]['income'] == 5000
+    assert forecast[1]['expense'] == 30 * 10 + 5 * 50
+    mock_recurring_transaction_repo.find_schedules_by_user_id.assert_called_once_with(1)
+
+
+def test_generate_forecast_for_user_not_found(service, mock_user_repo):
+    mock_user_repo.find_by_id.return_value = None
+
+    with pytest.raises(NotFound):
+        service.generate_forecast_for_user(1, until=datetime.date.today())
+
+
+def test_generate_forecast_for_user_until_in_past(service, mock_recurring_transaction_repo):
+    with pytest.raises(ValueError):
+        service.generate_forecast_for_user(1, until=datetime.date(2026, 1, 1), since=datetime.date(2026, 2, 1))
+
+    mock_recurring_transaction_repo.find_schedules_by_user_id.assert_not_called()
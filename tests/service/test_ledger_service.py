@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import MagicMock, call
+from flask import Flask
+from app.service.ledger import LedgerService
+
+
+@pytest.fixture
+def mock_user_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_ledger_total_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def service(mock_user_repo, mock_ledger_total_repo):
+    return LedgerService(mock_user_repo, mock_ledger_total_repo)
+
+
+@pytest.fixture
+def app_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def test_user_id_chunks(service, mock_user_repo):
+    mock_user_repo.find_id_range.return_value = (3, 10)
+    assert service._user_id_chunks(chunk_size=3) == [(3, 5), (6, 8), (9, 10)]
+
+
+def test_user_id_chunks_without_users(service, mock_user_repo):
+    mock_user_repo.find_id_range.return_value = None
+    assert service._user_id_chunks(chunk_size=3) == []
+
+
+def test_rebuild_totals(service, mock_user_repo, mock_ledger_total_repo, app_context):
+    mock_user_repo.find_id_range.return_value = (1, 4)
+    mock_ledger_total_repo.rebuild_totals.return_value = 5
+
+    assert service.rebuild_totals(workers=2, chunk_size=2) == 10
+    mock_ledger_total_repo.rebuild_totals.assert_has_calls([call(1, 2), call(3, 4)], any_order=True)
+
+
+def test_verify_totals(service, mock_user_repo, mock_ledger_total_repo, app_context):
+    mock_user_repo.find_id_range.return_value = (1, 1)
+    mock_ledger_total_repo.calculate_raw_totals.return_value = [(1, 2, 'expense', 300, 2), (1, 3, 'income', 50, 1)]
+    mock_ledger_total_repo.find_totals.return_value = [(1, 2, 'expense', 100, 1), (1, 3, 'income', 50, 1)]
+
+    assert service.verify_totals(workers=1, chunk_size=10) == [{
+        'user_id': 1,
+        'category_id': 2,
+        'type': 'expense',
+        'expected_total': 300,
+        'actual_total': 100,
+        'expected_count': 2,
+        'actual_count': 1,
+    }]
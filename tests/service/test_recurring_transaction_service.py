@@ -7,10 +7,8 @@ from unittest.mock import MagicMock
 from app.service.dto import CreateRecurringTransactionDto
 from app.persistent.entity import IncomeCategoryEntity, Frequency
 
-from app.service.recurring_transactions import RecurringTransactionsService
+from app.service.recurring_transactions import RecurringTransactionsService, FREQUENCY_INTERVALS, count_occurrences
 from app.persistent.entity import (
-    IncomeEntity,
-    ExpenseEntity,
     IncomeRecurringTransactionEntity,
     ExpenseRecurringTransactionEntity
 )
@@ -78,19 +76,6 @@ def service(
     )
 
 
-@pytest.fixture
-def example_income_recurring_entity():
-    return IncomeRecurringTransactionEntity(
-        id=10,
-        amount=100,
-        frequency=Frequency.MONTHLY,
-        user_id=11,
-        next_due_date=datetime.date(2022, 2, 12),
-        category_id=1,
-        type_='income'
-    )
-
-
 def test_add_recurring_transaction(service, mock_user_repo, mock_category_repo,
                                    mock_income_recurring_transaction_repo,
                                    current_date):
@@ -149,52 +134,6 @@ def test_get_by_id_transaction_not_found(service, mock_recurring_transaction_rep
     mock_recurring_transaction_repo.find_by_id.assert_called_once_with(1)
 
 
-def test_create_income_transaction(service, mock_income_repo, mock_income_recurring_transaction_repo, current_date):
-    recurring_transaction = IncomeRecurringTransactionEntity(
-        id=1,
-        amount=20,
-        frequency=Frequency.DAILY,
-        user_id=1,
-        next_due_date=current_date,
-        category_id=1,
-        type_='income'
-    )
-    income_transaction = IncomeEntity(
-        amount=recurring_transaction.amount,
-        user_id=recurring_transaction.user_id,
-        category_id=recurring_transaction.category_id,
-    )
-    service.create_income_transaction(recurring_transaction)
-
-    assert recurring_transaction.next_due_date == current_date + timedelta(days=1)
-    assert recurring_transaction.amount == income_transaction.amount
-    mock_income_repo.save_or_update.assert_called_once()
-    mock_income_recurring_transaction_repo.save_or_update.assert_called_once_with(recurring_transaction)
-
-
-def test_create_expense_transaction(service, mock_expense_repo, mock_expene_recurring_transaction_repo, current_date):
-    recurring_transaction = ExpenseRecurringTransactionEntity(
-        id=2,
-        amount=30,
-        frequency=Frequency.WEEKLY,
-        user_id=1,
-        next_due_date=current_date,
-        category_id=2,
-        type_='expense'
-    )
-    expense_transaction = ExpenseEntity(
-        amount=recurring_transaction.amount,
-        user_id=recurring_transaction.user_id,
-        category_id=recurring_transaction.category_id
-    )
-    service.create_expense_transaction(recurring_transaction)
-
-    assert recurring_transaction.next_due_date == current_date + timedelta(weeks=1)
-    assert recurring_transaction.amount == expense_transaction.amount
-    mock_expense_repo.save_or_update.assert_called_once()
-    mock_expene_recurring_transaction_repo.save_or_update.assert_called_once_with(recurring_transaction)
-
-
 def test_update_recurring_transaction(service, mock_recurring_transaction_repo, current_date):
     transaction = ExpenseRecurringTransactionEntity(
         id=3,
@@ -220,26 +159,78 @@ def test_update_recurring_transaction(service, mock_recurring_transaction_repo,
     mock_recurring_transaction_repo.find_by_id.assert_called_once_with(3)
 
 
-def test_validate_date_of_transaction_next_due_date_in_past(service, mock_recurring_transaction_repo,
-                                                            example_income_recurring_entity,
-                                                            current_date):
-    result = service._validate_date_of_transaction(example_income_recurring_entity, current_date)
-    assert result is None
-    mock_recurring_transaction_repo.delete_by_id.assert_called_once_with(example_income_recurring_entity.id)
-
-
-def test_validate_date_of_transaction_next_due_date_in_future(service,
-                                                              example_income_recurring_entity, current_date
-                                                              ):
-    example_income_recurring_entity.next_due_date = current_date + timedelta(days=2)
-    result = service._validate_date_of_transaction(example_income_recurring_entity, current_date)
-    assert result is None
-
-
-def validate_date_of_transaction_next_due_date_equals_current(service,
-                                                              example_income_recurring_entity,
-                                                              current_date):
-    example_income_recurring_entity.next_due_date = current_date
-    transaction = service._validate_date_of_transaction(example_income_recurring_entity, current_date)
-    assert transaction is None
-    assert isinstance(transaction, IncomeRecurringTransactionEntity)
+def test_process_recurring_transactions_in_chunks(service, mock_recurring_transaction_repo, current_date, monkeypatch):
+    monkeypatch.setattr('app.service.recurring_transactions.unit_of_work', MagicMock())
+    mock_recurring_transaction_repo.find_due_keys.side_effect = [
+        [(current_date - timedelta(days=1), 4), (current_date, 7)],
+        [(current_date, 9)],
+        []
+    ]
+    mock_recurring_transaction_repo.claim_due.side_effect = lambda due_date, schedule_ids: schedule_ids
+    mock_recurring_transaction_repo.find_missed.side_effect = [[], []]
+    mock_recurring_transaction_repo.post_due_transactions.side_effect = [1, 1]
+
+    counts = service.process_recurring_transactions(chunk_size=2, current_date=current_date)
+
+    assert counts == {'posted': 2, 'caught_up': 0}
+    assert [c.args for c in mock_recurring_transaction_repo.find_due_keys.call_args_list] == [
+        (current_date, None, 2, (0, 1)),
+        (current_date, (current_date, 7), 2, (0, 1)),
+        (current_date, (current_date, 9), 2, (0, 1))
+    ]
+    mock_recurring_transaction_repo.post_due_transactions.assert_called_with(current_date, [9])
+    mock_recurring_transaction_repo.advance_next_due_dates.assert_called_with(current_date, [9], FREQUENCY_INTERVALS)
+
+
+def test_process_recurring_transactions_skips_schedules_claimed_elsewhere(service, mock_recurring_transaction_repo,
+                                                                         current_date, monkeypatch):
+    monkeypatch.setattr('app.service.recurring_transactions.unit_of_work', MagicMock())
+    mock_recurring_transaction_repo.find_due_keys.side_effect = [[(current_date, 4)], [(current_date, 7)], [], []]
+    mock_recurring_transaction_repo.claim_due.side_effect = [[], [7]]
+    mock_recurring_transaction_repo.find_missed.return_value = []
+    mock_recurring_transaction_repo.post_due_transactions.return_value = 1
+
+    counts = service.process_recurring_transactions(current_date=current_date, shard_count=2)
+
+    assert counts == {'posted': 1, 'caught_up': 0}
+    assert [c.args[3] for c in mock_recurring_transaction_repo.find_due_keys.call_args_list] == [
+        (0, 2), (0, 2), (0, 2), (1, 2)
+    ]
+    mock_recurring_transaction_repo.post_due_transactions.assert_called_once_with(current_date, [7])
+
+
+@pytest.mark.parametrize('days_missed, interval, expected', [
+    (-1, timedelta(days=1), 0),
+    (0, timedelta(days=1), 1),
+    (30, timedelta(days=1), 31),
+    (13, timedelta(weeks=1), 2),
+    (14, timedelta(weeks=1), 3),
+])
+def test_count_occurrences(current_date, days_missed, interval, expected):
+    next_due_date = current_date - timedelta(days=days_missed)
+    assert count_occurrences(next_due_date, interval, next_due_date, current_date) == expected
+
+
+def test_catch_up_books_missed_occurrences(service, mock_recurring_transaction_repo, mock_expense_repo,
+                                           current_date, monkeypatch):
+    monkeypatch.setattr('app.service.recurring_transactions.unit_of_work', MagicMock())
+    schedule = ExpenseRecurringTransactionEntity(id=5, amount=30, frequency=Frequency.WEEKLY, user_id=1,
+                                                 category_id=2, next_due_date=current_date - timedelta(days=15))
+    mock_recurring_transaction_repo.find_due_keys.side_effect = [[(schedule.next_due_date, 5)], []]
+    mock_recurring_transaction_repo.claim_due.return_value = [5]
+    mock_recurring_transaction_repo.find_missed.return_value = [schedule]
+    mock_recurring_transaction_repo.find_booked_dates.return_value = {(5, schedule.next_due_date)}
+    mock_expense_repo.bulk_insert.side_effect = lambda rows: len(rows)
+    service.income_repository.bulk_insert.return_value = 0
+    mock_recurring_transaction_repo.post_due_transactions.return_value = 0
+
+    counts = service.process_recurring_transactions()
+
+    assert counts == {'posted': 0, 'caught_up': 2}
+    assert [row['booked_at'] for row in mock_expense_repo.bulk_insert.call_args.args[0]] == [
+        current_date - timedelta(days=8),
+        current_date - timedelta(days=1)
+    ]
+    mock_recurring_transaction_repo.update_next_due_dates.assert_called_once_with(
+        {5: current_date + timedelta(days=6)}
+    )
@@ -1,8 +1,9 @@
+import datetime
 import logging
 
 import pytest
 from unittest.mock import MagicMock
-from app.service.dto import CreateTransactionDto
+from app.service.dto import CreateTransactionDto, PageRequestDto
 from app.persistent.entity import UserEntity, CategoryEntity
 from app.service.transactions import TransactionService
 from app.persistent.entity import  IncomeEntity, ExpenseEntity
@@ -76,6 +77,7 @@ def test_add_transaction(service, mock_user_repo, mock_category_repo):
     assert added_transaction['amount'] == 100
     assert added_transaction['user_id'] == 1
     assert added_transaction['category_id'] == 10
+    assert added_transaction['booked_at'] == datetime.date.today().strftime('%Y-%m-%d')
 
     mock_user_repo.find_by_id.assert_called_once_with(1)
     mock_category_repo.find_by_id.assert_called_once_with(10)
@@ -140,3 +142,14 @@ def test_get_expense_transactions_higher_than(service, mock_expense_repo):
     assert expected_transactions[0]['amount'] == 50
     assert expected_transactions[1]['amount'] == 150
     mock_expense_repo.find_higher_than.assert_called_once_with(expected_amount)
+
+
+def test_get_transactions_for_category_page(service, mock_category_repo, mock_expense_repo):
+    mock_category_repo.find_by_name.return_value = MagicMock(id=7, type_='expense')
+    mock_expense_repo.find_page.return_value = [ExpenseEntity(id=i, amount=10, user_id=1, category_id=7) for i in (9, 8)]
+
+    page = service.get_transactions_for_category_page('rent', PageRequestDto(limit=1, order='desc'))
+
+    assert [t['id'] for t in page['items']] == [9]
+    assert page['next_cursor'] == PageRequestDto.encode_cursor(9, 'desc')
+    mock_expense_repo.find_page.assert_called_once_with(None, 2, 'desc', category_id=7)
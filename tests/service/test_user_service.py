@@ -2,7 +2,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from app.persistent.entity import UserEntity
-from app.service.dto import CreateUserDto
+from app.service.dto import CreateUserDto, PageRequestDto
 from app.service.users import UserService
 from werkzeug.exceptions import NotFound
 
@@ -96,6 +96,7 @@ def test_get_total_income(user_service, mock_user_repo, example_user):
 
     total_income = user_service.get_total_income(1)
     assert total_income == 5000
+    mock_user_repo.calculate_total_income.assert_called_once_with(1, None, None)
 
 
 def test_get_total_income_user_not_found(user_service, mock_user_repo):
@@ -105,3 +106,26 @@ def test_get_total_income_user_not_found(user_service, mock_user_repo):
         user_service.get_total_income(1)
 
     assert str(err.value) == '404 Not Found: User not found'
+
+
+def test_get_users_page_returns_cursor_when_more_users_exist(user_service, mock_user_repo):
+    mock_user_repo.find_page.return_value = [
+        UserEntity(id=i, name=f'U{i}', hashed_password='p', email=f'u{i}@gmail.com', roles='user') for i in (4, 5, 6)
+    ]
+
+    page = user_service.get_users_page(PageRequestDto(limit=2, after_id=3))
+
+    assert [u['id'] for u in page['items']] == [4, 5]
+    assert PageRequestDto.from_args({'cursor': page['next_cursor']}) == PageRequestDto(after_id=5)
+    mock_user_repo.find_page.assert_called_once_with(3, 3, 'asc')
+
+
+def test_get_users_page_last_page_has_no_cursor(user_service, mock_user_repo):
+    mock_user_repo.find_page.return_value = [
+        UserEntity(id=1, name='U1', hashed_password='p', email='u1@gmail.com', roles='user')
+    ]
+
+    page = user_service.get_users_page(PageRequestDto(limit=2))
+
+    assert len(page['items']) == 1
+    assert page['next_cursor'] is None
@@ -0,0 +1,63 @@
+import pytest
+from app.service.cache import VersionedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return VersionedCache(max_size=2, ttl_seconds=10, clock=clock)
+
+
+def test_hit_for_same_version(cache):
+    cache.put(1, 3, ['entry'])
+
+    assert cache.get(1, 3) == ['entry']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 0
+
+
+def test_miss_for_other_version(cache):
+    cache.put(1, 3, ['entry'])
+
+    assert cache.get(1, 4) is None
+    assert cache.get(1, 3) is None
+    assert cache.stats()['misses'] == 2
+
+
+def test_miss_after_ttl(cache, clock):
+    cache.put(1, 3, ['entry'])
+    clock.now = 11
+
+    assert cache.get(1, 3) is None
+    assert cache.stats()['size'] == 0
+
+
+def test_least_recently_used_evicted(cache):
+    cache.put(1, 1, 'a')
+    cache.put(2, 1, 'b')
+    cache.get(1, 1)
+    cache.put(3, 1, 'c')
+
+    assert cache.get(2, 1) is None
+    assert cache.get(1, 1) == 'a'
+    assert cache.get(3, 1) == 'c'
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = VersionedCache(enabled=False, clock=clock)
+    cache.put(1, 1, 'a')
+
+    assert cache.get(1, 1) is None
+    assert cache.stats()['hits'] == cache.stats()['misses'] == 0